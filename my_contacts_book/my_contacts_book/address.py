@@ -9,6 +9,8 @@ class Address(Field):
         value (str): The address value as a string.
     """
 
+    __slots__ = ()
+
     def __init__(self, value: str):
         """
         Initializes an Address instance.
@@ -1,7 +1,21 @@
+import copy
+from bisect import bisect_left, insort
 from collections import UserDict
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 from record import Record
-from datetime import datetime, timedelta
+from note import Note
+from name import Name
+from storage import Storage
+from note_index import NoteIndex
+from tag_index import TagIndex
+from name_index import NameIndex
+from birthday import day_of_year, upcoming_days
+from datetime import date
+
+RECORD_OPS = {
+    "add_phone", "remove_phone", "edit_phone", "add_birthday",
+    "add_email", "add_address", "change_note", "remove_note",
+}
 
 
 class AddressBook(UserDict):
@@ -10,11 +24,101 @@ class AddressBook(UserDict):
 
     Methods:
         add_record(record): Adds a record to the address book.
+        add_records(records): Adds many new records to the address book at once.
         find(name): Finds a record by name.
         delete(name): Deletes a record by name.
-        get_upcoming_birthdays(): Gets contacts with upcoming birthdays within the next 7 days.
+        rename(old_name, new_name): Renames a record.
+        find_names(fragment, limit): Finds the names closest to a fragment.
+        names_starting_with(prefix): Iterates over the names with a prefix in alphabetical order.
+        sorted_records(): Iterates over the records in alphabetical order of their names.
+        find_by_phone(phone): Finds the names of the records a phone number belongs to.
+        get_upcoming_birthdays(days): Gets contacts with upcoming birthdays within the next days.
+        born_in(month): Gets the contacts born in a month.
+        aged(minimum, maximum): Gets the contacts whose age is within a range.
+        birthday_histogram(year): Counts the birthdays celebrated in every week of a year.
+        find_notes(title, tag): Finds notes by title and/or tag.
+        notes_sorted_by_tag(): Iterates over all notes in tag order.
+        tag_counts(): Gets the number of notes with every tag.
+        search_notes(query, limit): Finds the notes best matching the query terms.
+        record_will_change(record, op): Keeps a copy of a record about to change, if a snapshot is being saved.
+        record_changed(record, op, *args): Receives mutations reported by records.
+        begin_copy_on_write(): Starts keeping the records as they are now, for a snapshot.
+        end_copy_on_write(): Stops keeping copies of changed records.
+        apply(op, name, *args): Applies a journaled mutation.
+
+    Attributes:
+        storage (Optional[Storage]): The storage backend holding the records, or None if
+            they are kept in memory.
+        journal (Optional[Journal]): The journal mutations are appended to, if any.
+        journal_seq (int): The sequence number of the last journaled mutation in this book.
+        version (int): The number of mutations made to the book since it was created or loaded.
+        compression (Optional[str]): The compression its snapshots are written with, or None
+            for plain pickles.
     """
 
+    storage = None
+    journal = None
+    journal_seq = 0
+    version = 0
+    compression: Optional[str] = None
+    _copies: Optional[Dict[int, Record]] = None
+    _phone_index: Optional[Dict[str, Set[str]]] = None
+    _birthday_index: Optional[List[Set[str]]] = None
+    _birthday_arrays = None
+    _note_index: Optional[NoteIndex] = None
+    _tag_index: Optional[TagIndex] = None
+    _name_index: Optional[NameIndex] = None
+    _sorted_names: Optional[List[str]] = None
+    _sorted_names_changes = 0
+
+    def __init__(self, storage: Optional[Storage] = None) -> None:
+        """
+        Initializes an AddressBook instance.
+
+        Args:
+            storage (Optional[Storage]): The storage backend to keep the records in.
+                Records are kept in memory if it is not given.
+        """
+        super().__init__()
+        if storage is not None:
+            storage.owner = self
+            self.storage = storage
+            self.data = storage
+
+    def __getstate__(self) -> dict:
+        """
+        Returns the picklable state of the address book, without the attached journal.
+
+        Returns:
+            dict: The address book state.
+        """
+        return {"data": self.data, "journal_seq": self.journal_seq}
+
+    def __setstate__(self, state: dict) -> None:
+        """
+        Restores the address book from its pickled state and links the records back to it.
+
+        Args:
+            state (dict): The address book state.
+        """
+        self.data = state["data"]
+        self.journal_seq = state.get("journal_seq", 0)
+        for record in self.data.values():
+            record._book = self
+
+    def _log(self, op: str, name: str, *args) -> None:
+        """
+        Counts a mutation and appends it to the journal, if one is attached.
+
+        Args:
+            op (str): The name of the mutation.
+            name (str): The name of the affected record.
+            *args: The arguments of the mutation.
+        """
+        self.version += 1
+        if self.journal is not None:
+            self.journal_seq = self.journal.append(op, name, *args)
+
     def add_record(self, record: Record) -> None:
         """
         Adds a record to the address book.
@@ -26,6 +130,36 @@ class AddressBook(UserDict):
             print(f"Contact {record.name} already exists.")
         else:
             self.data[record.name.value] = record
+            record._book = self
+            self._index_record(record)
+            self._log("add_record", record.name.value, record.to_dict())
+
+    def add_records(self, records: List[Record]) -> None:
+        """
+        Adds many new records to the address book at once.
+
+        Records whose name is already in the book are skipped. A storage backend gets the
+        records in a single batch, and the sorted names are sorted once for the batch.
+
+        Args:
+            records (List[Record]): The records to add.
+        """
+        records = [record for record in records if record.name.value not in self.data]
+        if self.storage is not None:
+            self.storage.add_many(records)
+        else:
+            for record in records:
+                self.data[record.name.value] = record
+        names, self._sorted_names = self._sorted_names, None
+        for record in records:
+            record._book = self
+            self._index_record(record)
+            self._log("add_record", record.name.value, record.to_dict())
+        if names is not None:
+            names.extend(record.name.value for record in records)
+            names.sort(key=str.lower)
+            self._sorted_names = names
+            self._sorted_names_changes += 1
 
     def find(self, name: str) -> Optional[Record]:
         """
@@ -39,6 +173,24 @@ class AddressBook(UserDict):
         """
         return self.data.get(name, None)
 
+    def values(self):
+        """
+        Returns the records of the book.
+
+        Returns:
+            The records, read lazily from the storage backend if there is one.
+        """
+        return self.data.values()
+
+    def items(self):
+        """
+        Returns the names and records of the book.
+
+        Returns:
+            The name and record pairs, read lazily from the storage backend if there is one.
+        """
+        return self.data.items()
+
     def delete(self, name: str) -> None:
         """
         Deletes a record by name.
@@ -47,23 +199,501 @@ class AddressBook(UserDict):
             name (str): The name of the record to delete.
         """
         if name in self.data:
-            del self.data[name]
+            record = self.data.pop(name)
+            record._book = None
+            self._unindex_record(record)
+            self._log("delete", name)
         else:
             print(f"Contact {name} not found.")
 
-    def get_upcoming_birthdays(self) -> List[Record]:
+    def rename(self, old_name: str, new_name: str) -> None:
+        """
+        Renames a record.
+
+        Args:
+            old_name (str): The current name of the record.
+            new_name (str): The new name of the record.
+        """
+        record = self.data.pop(old_name)
+        self._unindex_record(record)
+        self.record_will_change(record)
+        record.name = Name(new_name)
+        self.data[new_name] = record
+        self._index_record(record)
+        self._log("rename", old_name, new_name)
+
+    def find_names(self, fragment: str, limit: int = 10) -> List[Tuple[float, str]]:
+        """
+        Finds the names closest to a fragment, such as a name with typos or its beginning.
+
+        The trigram index of the names is built on first use and then kept up to date by
+        every added, deleted and renamed record, so a search does not scan the records.
+
+        Args:
+            fragment (str): The text to look for.
+            limit (int): The maximum number of names.
+
+        Returns:
+            List[Tuple[float, str]]: The similarity, between 0 and 1, and name of the best
+                matches, best first.
+        """
+        if self._name_index is None:
+            name_index = NameIndex()
+            for name in self.data.keys():
+                name_index.add(name)
+            self._name_index = name_index
+        return self._name_index.search(fragment, limit)
+
+    def _names(self) -> List[str]:
+        """
+        Gets the names in case-insensitive alphabetical order, sorting them on first use.
+
+        Returns:
+            List[str]: The sorted names, kept sorted by every mutation afterwards.
+        """
+        if self._sorted_names is None:
+            self._sorted_names = sorted(self.data.keys(), key=str.lower)
+        return self._sorted_names
+
+    def names_starting_with(self, prefix: str) -> Iterator[str]:
+        """
+        Iterates over the names starting with a prefix, ignoring case, in alphabetical order.
+
+        The first name is found with a binary search over the sorted names, so listing k
+        names costs O(log n + k).
+
+        Args:
+            prefix (str): The prefix.
+
+        Returns:
+            Iterator[str]: The names.
+
+        Raises:
+            RuntimeError: If a name is added or removed while the names are iterated.
+        """
+        names = self._names()
+        changes = self._sorted_names_changes
+        key = prefix.lower()
+        i = bisect_left(names, key, key=str.lower)
+        while i < len(names) and names[i].lower().startswith(key):
+            yield names[i]
+            if self._sorted_names_changes != changes:
+                raise RuntimeError("The names changed during iteration.")
+            i += 1
+
+    def sorted_records(self) -> Iterator[Record]:
+        """
+        Iterates over the records in case-insensitive alphabetical order of their names.
+
+        Returns:
+            Iterator[Record]: The records.
+
+        Raises:
+            RuntimeError: If a record is added or removed while the records are iterated.
+        """
+        for name in self.names_starting_with(""):
+            yield self.data[name]
+
+    def _index_record(self, record: Record) -> None:
+        """
+        Adds a record to every index that has been built.
+
+        Args:
+            record (Record): The record.
+        """
+        for phone in record.phones:
+            self._index_phone(phone.value, record.name.value)
+        self._index_birthday(record)
+        if self._note_index is not None:
+            for note in record.notes:
+                self._note_index.add(record.name.value, note.title.value, note.text.value, note.tag.value)
+        if self._tag_index is not None:
+            for note in record.notes:
+                self._tag_index.add(record.name.value, note.title.value, note.tag.value)
+        if self._name_index is not None:
+            self._name_index.add(record.name.value)
+        if self._sorted_names is not None:
+            insort(self._sorted_names, record.name.value, key=str.lower)
+            self._sorted_names_changes += 1
+
+    def _unindex_record(self, record: Record) -> None:
+        """
+        Removes a record from every index that has been built.
+
+        Args:
+            record (Record): The record.
+        """
+        for phone in record.phones:
+            self._unindex_phone(phone.value, record.name.value)
+        self._unindex_birthday(record)
+        if self._note_index is not None:
+            for note in record.notes:
+                self._note_index.remove(record.name.value, note.title.value)
+        if self._tag_index is not None:
+            for note in record.notes:
+                self._tag_index.remove(record.name.value, note.title.value)
+        if self._name_index is not None:
+            self._name_index.remove(record.name.value)
+        if self._sorted_names is not None:
+            names, name = self._sorted_names, record.name.value
+            i = bisect_left(names, name.lower(), key=str.lower)
+            while i < len(names) and names[i] != name and names[i].lower() == name.lower():
+                i += 1
+            if i < len(names) and names[i] == name:
+                del names[i]
+                self._sorted_names_changes += 1
+
+    def _index_phone(self, phone: str, name: str) -> None:
+        """
+        Adds a phone number of a record to the phone index, if it has been built.
+
+        Args:
+            phone (str): The phone number.
+            name (str): The name of the record.
+        """
+        if self._phone_index is not None:
+            self._phone_index.setdefault(phone, set()).add(name)
+
+    def _unindex_phone(self, phone: str, name: str) -> None:
+        """
+        Removes a phone number of a record from the phone index, if it has been built.
+
+        Args:
+            phone (str): The phone number.
+            name (str): The name of the record.
+        """
+        if self._phone_index is not None and phone in self._phone_index:
+            self._phone_index[phone].discard(name)
+            if not self._phone_index[phone]:
+                del self._phone_index[phone]
+
+    def find_by_phone(self, phone: str) -> List[str]:
+        """
+        Finds the names of the records a phone number belongs to.
+
+        The phone to name index is built on first use and then kept up to date by every
+        mutation, so lookups do not scan the records.
+
+        Args:
+            phone (str): The phone number to find.
+
+        Returns:
+            List[str]: The names of the records with this phone number.
+        """
+        if self.storage is not None:
+            return self.storage.find_by_phone(phone)
+        if self._phone_index is None:
+            index: Dict[str, Set[str]] = {}
+            for record in self.data.values():
+                for p in record.phones:
+                    index.setdefault(p.value, set()).add(record.name.value)
+            self._phone_index = index
+        return sorted(self._phone_index.get(phone, ()))
+
+    def _index_birthday(self, record: Record) -> None:
         """
-        Gets contacts with upcoming birthdays within the next 7 days.
+        Adds a record to its day of the year bucket, if the birthday index has been built.
+
+        Args:
+            record (Record): The record.
+        """
+        if self._birthday_index is not None and record.birthday:
+            self._birthday_index[day_of_year(*record.birthday.day_month())].add(record.name.value)
+        if self._birthday_arrays is not None and record.birthday:
+            self._birthday_arrays.add(record.name.value, record.birthday.to_date())
+
+    def _unindex_birthday(self, record: Record) -> None:
+        """
+        Removes a record from its day of the year bucket, if the birthday index has been built.
+
+        Args:
+            record (Record): The record.
+        """
+        if self._birthday_index is not None and record.birthday:
+            self._birthday_index[day_of_year(*record.birthday.day_month())].discard(record.name.value)
+        if self._birthday_arrays is not None:
+            self._birthday_arrays.remove(record.name.value)
+
+    def get_upcoming_birthdays(self, days: int = 7) -> List[Record]:
+        """
+        Gets contacts with upcoming birthdays within the next days, today included.
+
+        The birthday index of 366 day of the year buckets is built on first use and then
+        kept up to date by every mutation, so a query costs O(days + matches).
+
+        Args:
+            days (int): The number of days after today the window spans.
 
         Returns:
-            List[Record]: A list of records with upcoming birthdays.
+            List[Record]: A list of records with upcoming birthdays, in the order they are celebrated.
         """
-        today = datetime.today()
+        if self.storage is not None:
+            return self.storage.upcoming_birthdays(date.today(), days)
+        if self._birthday_index is None:
+            buckets: List[Set[str]] = [set() for _ in range(366)]
+            for record in self.data.values():
+                if record.birthday:
+                    buckets[day_of_year(*record.birthday.day_month())].add(record.name.value)
+            self._birthday_index = buckets
         upcoming_birthdays = []
-        for record in self.data.values():
-            if record.birthday:
-                birthday = datetime.strptime(record.birthday.value, "%d.%m.%Y")
-                birthday = birthday.replace(year=today.year)
-                if today <= birthday <= today + timedelta(days=7):
-                    upcoming_birthdays.append(record)
+        for day, month in upcoming_days(date.today(), days):
+            for name in sorted(self._birthday_index[day_of_year(day, month)]):
+                upcoming_birthdays.append(self.data[name])
         return upcoming_birthdays
+
+    def _birthdays(self):
+        """
+        Gets the birthday arrays, filling them on first use.
+
+        Returns:
+            BirthdayArrays: The birthdays of the contacts, kept up to date by every
+                mutation afterwards.
+
+        Raises:
+            ImportError: If NumPy is not installed.
+        """
+        if self._birthday_arrays is None:
+            from birthday_arrays import BirthdayArrays
+
+            self._birthday_arrays = BirthdayArrays(
+                (record.name.value, record.birthday.to_date()) for record in self.data.values() if record.birthday)
+        return self._birthday_arrays
+
+    def born_in(self, month: int) -> List[Record]:
+        """
+        Gets the contacts born in a month.
+
+        Args:
+            month (int): The month, from 1 to 12.
+
+        Returns:
+            List[Record]: The records, in the order of the days of their birthdays.
+
+        Raises:
+            ImportError: If NumPy is not installed.
+        """
+        return [self.data[name] for name in self._birthdays().born_in(month)]
+
+    def aged(self, minimum: int, maximum: int) -> List[Record]:
+        """
+        Gets the contacts whose age today is within a range, both ends included.
+
+        Args:
+            minimum (int): The lowest age.
+            maximum (int): The highest age.
+
+        Returns:
+            List[Record]: The records, youngest first.
+
+        Raises:
+            ImportError: If NumPy is not installed.
+        """
+        return [self.data[name] for name in self._birthdays().aged(minimum, maximum, date.today())]
+
+    def birthday_histogram(self, year: Optional[int] = None) -> List[int]:
+        """
+        Counts the birthdays celebrated in every week of a year, weeks being counted from
+        1 January.
+
+        Args:
+            year (Optional[int]): The year, the current one if not given.
+
+        Returns:
+            List[int]: The number of birthdays in each of the 53 weeks.
+
+        Raises:
+            ImportError: If NumPy is not installed.
+        """
+        return self._birthdays().weekly_histogram(year or date.today().year)
+
+    def find_notes(self, title: str = None, tag: str = None) -> Iterator[Tuple[str, Note]]:
+        """
+        Finds notes by exact title and/or case-insensitive tag.
+
+        Args:
+            title (str): The title to match, or None to match any title.
+            tag (str): The tag to match, or None to match any tag.
+
+        Returns:
+            Iterator[Tuple[str, Note]]: Pairs of contact name and matching note.
+        """
+        if self.storage is not None:
+            yield from self.storage.find_notes(title, tag)
+            return
+        if tag is not None:
+            for name, note_title in self._tags().find(tag):
+                if title is None or note_title == title:
+                    yield name, self.data[name].find_note(note_title)
+            return
+        for record in self.data.values():
+            for note in record.notes:
+                if title is not None and note.title.value != title:
+                    continue
+                if tag is not None and note.tag.value.lower() != tag.lower():
+                    continue
+                yield record.name.value, note
+
+    def _tags(self) -> TagIndex:
+        """
+        Gets the tag index, building it on first use.
+
+        Returns:
+            TagIndex: The tag index, kept up to date by every mutation afterwards.
+        """
+        if self._tag_index is None:
+            tag_index = TagIndex()
+            for record in self.data.values():
+                for note in record.notes:
+                    tag_index.add(record.name.value, note.title.value, note.tag.value)
+            self._tag_index = tag_index
+        return self._tag_index
+
+    def notes_sorted_by_tag(self) -> Iterator[Tuple[str, Note]]:
+        """
+        Iterates over all notes in case-insensitive tag order.
+
+        Returns:
+            Iterator[Tuple[str, Note]]: Pairs of contact name and note.
+        """
+        if self.storage is not None:
+            yield from self.storage.notes_sorted_by_tag()
+            return
+        for name, title in self._tags().sorted_notes():
+            yield name, self.data[name].find_note(title)
+
+    def tag_counts(self) -> List[Tuple[str, int]]:
+        """
+        Gets the number of notes with every tag.
+
+        Returns:
+            List[Tuple[str, int]]: The lowercase tags in sorted order and their note counts.
+        """
+        if self.storage is not None:
+            return self.storage.tag_counts()
+        return self._tags().counts()
+
+    def search_notes(self, query: str, limit: int = 10) -> List[Tuple[str, Note, float]]:
+        """
+        Finds the notes whose title, text or tag best match the query terms.
+
+        The inverted index is built on first use and then kept up to date by every
+        mutation; results are ranked with BM25.
+
+        Args:
+            query (str): The query text.
+            limit (int): The maximum number of results.
+
+        Returns:
+            List[Tuple[str, Note, float]]: The contact name, note and score of the best
+                matches, best first.
+        """
+        if self._note_index is None:
+            note_index = NoteIndex()
+            for record in self.data.values():
+                for note in record.notes:
+                    note_index.add(record.name.value, note.title.value, note.text.value, note.tag.value)
+            self._note_index = note_index
+        results = []
+        for name, title, score in self._note_index.search(query, limit):
+            note = self.data[name].find_note(title)
+            if note:
+                results.append((name, note, score))
+        return results
+
+    def begin_copy_on_write(self) -> Tuple[Dict[str, Record], Dict[int, Record]]:
+        """
+        Starts keeping the records as they are now, for a snapshot saved while the book is
+        in use.
+
+        Nothing is copied up front: the records are shared with the snapshot, and a record
+        is copied only before its first change, so a snapshot costs O(n) references plus
+        the records changed while it is saved. Must be called while no change is in progress.
+
+        Returns:
+            Tuple[Dict[str, Record], Dict[int, Record]]: The records by name, and the copies
+                of the records changed since, by the id of the shared record; the copies
+                fill in as records change.
+        """
+        self._copies = {}
+        return dict(self.data), self._copies
+
+    def end_copy_on_write(self) -> None:
+        """
+        Stops keeping copies of changed records.
+        """
+        self._copies = None
+
+    def record_will_change(self, record: Record, op: Optional[str] = None) -> None:
+        """
+        Keeps a copy of a record about to change, if a snapshot is being saved and the
+        record has not been copied yet, and takes a birthday about to be replaced out of
+        the birthday indexes.
+
+        Args:
+            record (Record): The record.
+            op (Optional[str]): The name of the mutating method, if the record reports it.
+        """
+        if self._copies is not None and id(record) not in self._copies:
+            self._copies[id(record)] = copy.deepcopy(record)
+        if op == "add_birthday":
+            self._unindex_birthday(record)
+
+    def record_changed(self, record: Record, op: str, *args) -> None:
+        """
+        Receives a mutation reported by one of the records in the book.
+
+        Args:
+            record (Record): The mutated record.
+            op (str): The name of the mutating method.
+            *args: The arguments the method was called with.
+        """
+        name = record.name.value
+        if self.storage is not None:
+            self.storage.record_changed(record, op, *args)
+        if op == "add_phone":
+            self._index_phone(args[0], name)
+        elif op == "remove_phone":
+            self._unindex_phone(args[0], name)
+        elif op == "edit_phone":
+            self._unindex_phone(args[0], name)
+            self._index_phone(args[1], name)
+        elif op == "add_birthday":
+            self._index_birthday(record)
+        elif op in ("add_note", "change_note"):
+            title, text, tag = args
+            if self._note_index is not None:
+                self._note_index.add(name, title, text, tag)
+            if self._tag_index is not None:
+                self._tag_index.add(name, title, tag)
+        elif op == "remove_note":
+            if self._note_index is not None:
+                self._note_index.remove(name, *args)
+            if self._tag_index is not None:
+                self._tag_index.remove(name, *args)
+        self._log(op, name, *args)
+
+    def apply(self, op: str, name: str, *args) -> None:
+        """
+        Applies a journaled mutation to the book.
+
+        Args:
+            op (str): The name of the mutation.
+            name (str): The name of the affected record.
+            *args: The arguments of the mutation.
+
+        Raises:
+            KeyError: If the affected record does not exist.
+            ValueError: If the mutation is unknown.
+        """
+        if op == "add_record":
+            self.add_record(Record.from_dict(args[0]))
+        elif op == "delete":
+            self.delete(name)
+        elif op == "rename":
+            self.rename(name, args[0])
+        elif op == "add_note":
+            self.data[name].add_note(Note(*args))
+        elif op in RECORD_OPS:
+            getattr(self.data[name], op)(*args)
+        else:
+            raise ValueError(f"Unknown journal operation: {op}")
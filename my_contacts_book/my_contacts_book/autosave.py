@@ -0,0 +1,218 @@
+import copyreg
+import os
+import pickle
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+from address_book import AddressBook
+from compressed_snapshot import dictionary_dispatch_table, open_compressed
+from journal import ROTATED_SUFFIX
+from record import Record
+
+AUTOSAVE_INTERVAL = 60
+BATCH_SIZE = 512
+
+
+class SaveCancelled(Exception):
+    """
+    Raised inside a save that is stopped before it is finished.
+    """
+
+
+class Autosaver:
+    """
+    Class to represent a background thread saving the address book while it is used.
+
+    Every interval the thread checks the version of the book and, if it changed since the
+    last save, writes a snapshot of the book as it was at that moment into a temporary
+    file and atomically moves it into place. The snapshot is copy-on-write: the records
+    are pickled in place, and only a record changed while the snapshot is written is
+    copied, just before its change. Records are pickled in batches, and between two
+    batches the thread lets waiting changes in, so a save never holds up a command for
+    more than a batch.
+
+    The journal is rotated when a save starts and the rotated journal is removed once
+    the snapshot holding its entries is in place, so the journal only keeps the changes
+    made since the last save, and shutting down only has to flush those.
+
+    Books with a compression are written through it, a batch of records at a time, so
+    compressing also happens between the changes let in. Books with a storage backend that stores changes only when synced, such as a sharded
+    book, are synced instead, which writes only the parts that changed.
+
+    Attributes:
+        book (AddressBook): The address book to save.
+        filename (str): The snapshot filename.
+        interval (float): The number of seconds between two checks.
+        saved_version (int): The version of the book in the last snapshot.
+        saves (int): The number of snapshots written.
+    """
+
+    def __init__(self, book: AddressBook, filename: str = "addressbook.pkl",
+                 interval: float = AUTOSAVE_INTERVAL) -> None:
+        """
+        Initializes an Autosaver instance for the book, without starting the thread.
+
+        Args:
+            book (AddressBook): The address book to save.
+            filename (str): The snapshot filename.
+            interval (float): The number of seconds between two checks.
+        """
+        self.book = book
+        self.filename = filename
+        self.interval = interval
+        self.saved_version = book.version
+        self.saves = 0
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._waiting_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """
+        Starts the background thread.
+        """
+        self._thread = threading.Thread(target=self._run, name="autosave", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops the background thread, cancelling a save in progress. A cancelled save
+        leaves the last snapshot and the journal as they were.
+        """
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    @contextmanager
+    def holding(self):
+        """
+        Keeps a save from starting or going on for the duration of the block. Every
+        command that changes the book must run inside it.
+        """
+        with self._waiting_lock:
+            self._waiting += 1
+        self._lock.acquire()
+        with self._waiting_lock:
+            self._waiting -= 1
+        try:
+            yield
+        finally:
+            self._lock.release()
+
+    def _run(self) -> None:
+        """
+        Saves the book every interval if it has changed, until stopped.
+        """
+        while not self._stopping.wait(self.interval):
+            if self.book.version == self.saved_version:
+                continue
+            try:
+                self.save()
+            except SaveCancelled:
+                break
+            except OSError as e:
+                print(f"Could not autosave the address book: {e.strerror}.", file=sys.stderr)
+
+    def save(self) -> bool:
+        """
+        Writes a snapshot of the book as it is now, letting changes in while it is written.
+
+        Returns:
+            bool: False if the snapshot could not start because the journal is still being
+                folded into a snapshot by its own compaction.
+
+        Raises:
+            SaveCancelled: If the autosaver is stopped while the snapshot is written.
+        """
+        book = self.book
+        if book.storage is not None:
+            with self._lock:
+                version = book.version
+                book.storage.sync()
+            self.saved_version = version
+            self.saves += 1
+            return True
+        tmp_filename = self.filename + ".tmp"
+        with self._lock:
+            if book.journal is not None and not book.journal.rotate():
+                return False
+            version = book.version
+            records, copies = book.begin_copy_on_write()
+            try:
+                with open(tmp_filename, "wb") as raw:
+                    if book.compression is None:
+                        self._dump(records, copies, book.journal_seq, raw)
+                    else:
+                        with open_compressed(raw, "wb", book.compression) as f:
+                            self._dump(records, copies, book.journal_seq, f, dictionary_dispatch_table())
+            except BaseException:
+                os.remove(tmp_filename)
+                raise
+            finally:
+                book.end_copy_on_write()
+        with open(tmp_filename, "rb+") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_filename, self.filename)
+        if book.journal is not None:
+            try:
+                os.remove(self.filename + ROTATED_SUFFIX)
+            except FileNotFoundError:
+                pass
+        self.saved_version = version
+        self.saves += 1
+        return True
+
+    def _dump(self, records: Dict[str, Record], copies: Dict[int, Record], journal_seq: int, f,
+              dispatch_table: Optional[dict] = None) -> None:
+        """
+        Pickles the records into a file exactly as write_snapshot pickles a book.
+
+        Must be called holding the lock, which is let go between two batches of records
+        if a change is waiting for it.
+
+        Args:
+            records (Dict[str, Record]): The records shared with the book.
+            copies (Dict[int, Record]): The copies of the records changed since the snapshot started.
+            journal_seq (int): The sequence number of the last journaled mutation in the snapshot.
+            f: The binary file to write to.
+            dispatch_table (Optional[dict]): The reducers to pickle with, the default ones if
+                not given.
+        """
+        snapshot = AddressBook()
+        snapshot.data = records
+        snapshot.journal_seq = journal_seq
+        count = 0
+
+        def reduce_record(record: Record):
+            nonlocal count
+            count += 1
+            if count % BATCH_SIZE == 0:
+                self._pause()
+            state = copies.get(id(record), record).__getstate__()
+            return copyreg.__newobj__, (Record,), state
+
+        pickler = pickle.Pickler(f)
+        pickler.dispatch_table = copyreg.dispatch_table.copy() if dispatch_table is None else dispatch_table
+        pickler.dispatch_table[Record] = reduce_record
+        pickler.dump(snapshot)
+
+    def _pause(self) -> None:
+        """
+        Lets waiting changes run between two batches of records.
+
+        Raises:
+            SaveCancelled: If the autosaver is being stopped.
+        """
+        if self._stopping.is_set():
+            raise SaveCancelled()
+        if self._waiting:
+            self._lock.release()
+            try:
+                while self._waiting:
+                    time.sleep(0.0005)
+            finally:
+                self._lock.acquire()
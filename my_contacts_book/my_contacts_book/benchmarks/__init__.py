@@ -0,0 +1,4 @@
+"""
+Benchmarks for the contact book bot. Run them from the package directory, for example
+python -m benchmarks.cold_start
+"""
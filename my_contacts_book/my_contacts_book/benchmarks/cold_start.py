@@ -0,0 +1,56 @@
+import os
+import statistics
+import sys
+import tempfile
+from startup import run_probe
+
+STARTUP_BUDGET_MS = 100
+RUNS = 7
+
+
+def measure(runs: int = RUNS) -> dict:
+    """
+    Starts the bot with an empty address book several times and takes the median timings.
+
+    Args:
+        runs (int): The number of cold starts.
+
+    Returns:
+        dict: The median milliseconds of every start-up step and in total, and the lazily
+            imported modules that were loaded before the first command.
+    """
+    samples, loaded = [], set()
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "addressbook.pkl")
+        for _ in range(runs):
+            timings, modules, _ = run_probe(filename)
+            samples.append(timings)
+            loaded.update(modules)
+    result = {step: statistics.median(sample[step] for sample in samples) * 1000 for step in samples[0]}
+    result["total"] = statistics.median(sum(sample.values()) for sample in samples) * 1000
+    result["loaded"] = sorted(loaded)
+    return result
+
+
+def main() -> int:
+    """
+    Checks the cold start against its time budget and the lazy imports.
+
+    Returns:
+        int: The exit status, 1 if the budget is exceeded or a lazy module was imported.
+    """
+    result = measure()
+    for step in ("imports", "load_data", "commands", "total"):
+        print(f"{step:<12}{result[step]:8.1f} ms")
+    failures = []
+    if result["total"] > STARTUP_BUDGET_MS:
+        failures.append(f"start-up took {result['total']:.1f} ms, over the budget of {STARTUP_BUDGET_MS} ms")
+    if result["loaded"]:
+        failures.append(f"imported before the first command: {', '.join(result['loaded'])}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+import os
+import sys
+import tempfile
+import time
+from typing import List, Optional
+from benchmarks.generator import generate_book
+from compressed_snapshot import COMPRESSIONS
+from journal import read_snapshot, write_snapshot
+
+SIZES = (10_000, 100_000)
+SEED = 0
+
+
+def measure(size: int, seed: int = SEED) -> List[dict]:
+    """
+    Saves and loads a generated book as a plain pickle and in every compression.
+
+    Args:
+        size (int): The number of contacts.
+        seed (int): The random seed.
+
+    Returns:
+        List[dict]: For every format, its file size in bytes, its ratio to the plain
+            pickle and the seconds it took to save and load the book.
+    """
+    book = generate_book(size, seed)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for compression in (None,) + COMPRESSIONS:
+            filename = os.path.join(directory, f"{compression or 'plain'}.pkl")
+            book.compression = compression
+            start = time.perf_counter()
+            write_snapshot(book, filename)
+            saved = time.perf_counter() - start
+            start = time.perf_counter()
+            loaded = read_snapshot(filename)
+            loaded_in = time.perf_counter() - start
+            if len(loaded) != len(book):
+                raise AssertionError(f"{filename} holds {len(loaded)} of {len(book)} contacts")
+            results.append({"format": compression or "plain", "bytes": os.path.getsize(filename),
+                            "save": saved, "load": loaded_in})
+    for result in results:
+        result["ratio"] = results[0]["bytes"] / result["bytes"]
+    return results
+
+
+def option(name: str, default: Optional[str] = None) -> Optional[str]:
+    """
+    Gets the value of a command line option.
+
+    Args:
+        name (str): The option.
+        default (Optional[str]): The value to use if the option is not given.
+
+    Returns:
+        Optional[str]: The value of the option.
+    """
+    if name in sys.argv[1:-1]:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
+
+
+def main() -> None:
+    """
+    Prints the size, compression ratio, save and load time of every snapshot format on
+    generated books. --sizes takes comma-separated book sizes and --seed the random seed.
+    """
+    sizes = [int(size) for size in option("--sizes").split(",")] if option("--sizes") else SIZES
+    seed = int(option("--seed", str(SEED)))
+    print(f"{'contacts':>9} {'format':>7} {'MB':>8} {'ratio':>6} {'save s':>8} {'load s':>8}")
+    for size in sizes:
+        for result in measure(size, seed):
+            print(f"{size:>9} {result['format']:>7} {result['bytes'] / 2 ** 20:>8.2f} {result['ratio']:>6.2f} "
+                  f"{result['save']:>8.2f} {result['load']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import random
+from datetime import date
+from itertools import accumulate
+from typing import List
+from address_book import AddressBook
+from note import Note
+from record import Record
+
+FIRST_NAMES = (
+    "Olena", "Andrii", "Iryna", "Taras", "Oksana", "Dmytro", "Nataliia", "Serhii", "Yuliia", "Mykola",
+    "Kateryna", "Oleksandr", "Sofiia", "Bohdan", "Anna", "Ivan", "Mariia", "Petro", "Daryna", "Vasyl",
+)
+STREETS = ("Main", "Shevchenka", "Franka", "Lesi Ukrainky", "Sadova", "Lisova", "Shkilna", "Central")
+CITIES = ("Kyiv", "Lviv", "Odesa", "Kharkiv", "Dnipro", "Poltava", "Chernihiv", "Uzhhorod")
+DOMAINS = ("gmail.com", "ukr.net", "outlook.com", "i.ua", "example.org")
+WORDS = (
+    "call", "meeting", "gift", "project", "dinner", "trip", "report", "invoice", "birthday", "book",
+    "doctor", "school", "car", "flight", "hotel", "payment", "contract", "review", "party", "photo",
+    "recipe", "garden", "repair", "lesson", "concert", "match", "training", "exam", "visa", "wedding",
+)
+TAGS = tuple(WORDS[:20]) + tuple(f"topic{i}" for i in range(80))
+ZIPF_EXPONENT = 1.1
+TAG_WEIGHTS = tuple(accumulate(1 / (rank + 1) ** ZIPF_EXPONENT for rank in range(len(TAGS))))
+FIRST_BIRTHDAY = date(1950, 1, 1).toordinal()
+LAST_BIRTHDAY = date(2010, 12, 31).toordinal()
+
+
+def generate_records(size: int, seed: int = 0) -> List[Record]:
+    """
+    Generates realistic contacts that pass every validation of the fields.
+
+    Every contact has a unique name and ten-digit phone number; a fifth of them have a
+    second phone. Most have an email, an address and a birthday drawn uniformly between
+    1950 and 2010, so leap days and every day of the year occur. Up to three notes per
+    contact carry tags drawn from a Zipf distribution, a few tags being very common and
+    most of them rare, like real tags.
+
+    Args:
+        size (int): The number of contacts.
+        seed (int): The random seed; the same seed always gives the same contacts.
+
+    Returns:
+        List[Record]: The contacts.
+    """
+    rng = random.Random(seed)
+    phones = rng.sample(range(10 ** 9), size + size // 5 + 1)
+    records = []
+    for i in range(size):
+        first = rng.choice(FIRST_NAMES)
+        record = Record(f"{first}{i}")
+        record.add_phone(f"{3 * 10 ** 9 + phones[i]:010d}")
+        if rng.random() < 0.2:
+            record.add_phone(f"{3 * 10 ** 9 + phones[size + i // 5]:010d}")
+        if rng.random() < 0.9:
+            record.add_birthday(date.fromordinal(rng.randint(FIRST_BIRTHDAY, LAST_BIRTHDAY)).strftime("%d.%m.%Y"))
+        if rng.random() < 0.8:
+            record.add_email(f"{first.lower()}.{i}@{rng.choice(DOMAINS)}")
+        if rng.random() < 0.7:
+            record.add_address(f"{rng.randint(1, 200)} {rng.choice(STREETS)} Street, {rng.choice(CITIES)}")
+        for j, tag in enumerate(rng.choices(TAGS, cum_weights=TAG_WEIGHTS, k=rng.choice((0, 1, 1, 2, 3)))):
+            title = f"{rng.choice(WORDS).capitalize()}{j}"
+            text = " ".join(rng.choices(WORDS, k=rng.randint(3, 12)))
+            record.add_note(Note(title, text, tag))
+        records.append(record)
+    return records
+
+
+def generate_book(size: int, seed: int = 0) -> AddressBook:
+    """
+    Generates an address book of realistic contacts, see generate_records.
+
+    Args:
+        size (int): The number of contacts.
+        seed (int): The random seed.
+
+    Returns:
+        AddressBook: The address book, kept in memory and without a journal.
+    """
+    book = AddressBook()
+    book.add_records(generate_records(size, seed))
+    return book
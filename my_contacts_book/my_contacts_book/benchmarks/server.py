@@ -0,0 +1,166 @@
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Optional, Tuple
+from client import parse_address
+
+LEVELS = (1, 10, 100)
+REQUESTS = 5000
+CONTACTS = 1000
+WRITE_SHARE = 0.1
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def connect(address: str) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """
+    Opens a connection to the server.
+
+    Args:
+        address (str): The server address.
+
+    Returns:
+        Tuple[asyncio.StreamReader, asyncio.StreamWriter]: The connection streams.
+    """
+    kind, *location = parse_address(address)
+    if kind == "unix":
+        return await asyncio.open_unix_connection(location[0])
+    return await asyncio.open_connection(*location)
+
+
+async def run_client(address: str, commands: List[str]) -> None:
+    """
+    Sends commands one at a time, waiting for every response before the next command.
+
+    Args:
+        address (str): The server address.
+        commands (List[str]): The command lines.
+    """
+    reader, writer = await connect(address)
+    for command in commands:
+        writer.write(command.encode("utf-8") + b"\n")
+        await writer.drain()
+        await reader.readline()
+    writer.close()
+    await writer.wait_closed()
+
+
+def workload(requests: int, seed: int, write_share: float = WRITE_SHARE) -> List[str]:
+    """
+    Generates a mix of lookups and, for a share of the requests, address changes.
+
+    Args:
+        requests (int): The number of commands.
+        seed (int): The random seed.
+        write_share (float): The share of address changes.
+
+    Returns:
+        List[str]: The command lines.
+    """
+    rng = random.Random(seed)
+    commands = []
+    for _ in range(requests):
+        i = rng.randrange(CONTACTS)
+        if rng.random() < write_share:
+            commands.append(f"change-address person{i} {rng.randrange(1, 200)} Main Street")
+        else:
+            commands.append(rng.choice([f"phone person{i}", f"contact person{i}", f"show-email person{i}"]))
+    return commands
+
+
+async def measure(address: str, clients: int, requests: int = REQUESTS, write_share: float = WRITE_SHARE) -> float:
+    """
+    Runs the workload split between concurrent clients.
+
+    Args:
+        address (str): The server address.
+        clients (int): The number of concurrent clients.
+        requests (int): The total number of commands.
+        write_share (float): The share of address changes.
+
+    Returns:
+        float: The requests served per second.
+    """
+    share = requests // clients
+    start = time.perf_counter()
+    await asyncio.gather(*(run_client(address, workload(share, seed, write_share)) for seed in range(clients)))
+    return share * clients / (time.perf_counter() - start)
+
+
+async def benchmark(address: str, write_share: float = WRITE_SHARE) -> None:
+    """
+    Fills the book and prints the requests per second at every concurrency level.
+
+    Args:
+        address (str): The server address.
+        write_share (float): The share of address changes.
+    """
+    await run_client(address, [f"add person{i} {5000000000 + i}" for i in range(CONTACTS)])
+    print(f"{'clients':>8} {'requests/s':>12}")
+    for clients in LEVELS:
+        print(f"{clients:>8} {await measure(address, clients, write_share=write_share):>12.0f}")
+
+
+def start_server(directory: str, processes: Optional[int] = None) -> Tuple[subprocess.Popen, str]:
+    """
+    Starts a server with an empty book in a directory.
+
+    Args:
+        directory (str): The working directory of the server.
+        processes (Optional[int]): The number of worker processes answering lookups, if any.
+
+    Returns:
+        Tuple[subprocess.Popen, str]: The server process and its address.
+    """
+    address = "unix:" + os.path.join(directory, "addressbook.sock")
+    command = [sys.executable, os.path.join(PACKAGE_DIR, "main.py"), "--serve", address]
+    if processes:
+        command += ["--processes", str(processes)]
+    process = subprocess.Popen(command, cwd=directory, stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        if os.path.exists(address[len("unix:"):]):
+            break
+        time.sleep(0.05)
+    return process, address
+
+
+def option(name: str, default: Optional[str] = None) -> Optional[str]:
+    """
+    Gets the value of a command line option.
+
+    Args:
+        name (str): The option.
+        default (Optional[str]): The value to use if the option is not given.
+
+    Returns:
+        Optional[str]: The value of the option.
+    """
+    if name in sys.argv[1:-1]:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
+
+
+def main() -> None:
+    """
+    Benchmarks the server given with --address, or a fresh one with an empty book and
+    --processes worker processes. --writes sets the share of address changes.
+    """
+    write_share = float(option("--writes", str(WRITE_SHARE)))
+    if option("--address"):
+        asyncio.run(benchmark(option("--address"), write_share))
+        return
+    processes = option("--processes")
+    with tempfile.TemporaryDirectory() as directory:
+        process, address = start_server(directory, int(processes) if processes else None)
+        try:
+            asyncio.run(benchmark(address, write_share))
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
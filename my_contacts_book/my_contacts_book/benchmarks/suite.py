@@ -0,0 +1,336 @@
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+import handlers
+from address_book import AddressBook
+from autosave import Autosaver
+from benchmarks.generator import TAGS, WORDS, generate_book
+from columnar_storage import write_columnar
+from dedupe import profile, score_chunk
+from main import load_data, save_data
+from record import Record
+from sharded_storage import CACHE_SIZE, DEFAULT_SHARDS, shard_of, write_sharded
+from sqlite_storage import SQLiteStorage
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+CALLS = 200
+SEED = 0
+
+# A case is its name, the number of timed calls, the timed function and an untimed
+# function preparing each call; both get the number of the call.
+Case = Tuple[str, int, Callable[[int], object], Optional[Callable[[int], object]]]
+
+
+def handler_cases(book: AddressBook, names: List[str], directory: str) -> List[Case]:
+    """
+    Builds a case for every handler, with arguments that hit existing contacts and notes.
+
+    Read-only handlers run first. Every handler that changes the book gets its own
+    contacts to change, so the cases do not depend on each other.
+
+    Args:
+        book (AddressBook): The generated address book.
+        names (List[str]): The names of the contacts in random order.
+        directory (str): A directory for the exported files.
+
+    Returns:
+        List[Case]: The cases.
+    """
+    rng = random.Random(SEED)
+    lower = [name.lower() for name in names]
+    calls = max(1, min(CALLS, len(names) // 16))
+    targets = iter(range(0, len(names), calls))
+
+    def own() -> List[str]:
+        start = next(targets)
+        return lower[start:start + calls]
+
+    def phone(i: int) -> str:
+        return book.find(names[i % len(names)]).phones[0].value
+
+    def note(i: int) -> Tuple[str, str]:
+        for name in names[i % len(names):]:
+            record = book.find(name)
+            if record.notes:
+                return name.lower(), record.notes[0].title.value
+        return names[0].lower(), "Call0"
+
+    def check_dedupe(i: int) -> None:
+        # Of a name and its spelling typed with the Cyrillic layout on, the name is kept
+        # whichever of the two was added first.
+        first, second = Record("Olena"), Record("Щдутф")
+        for record in (first, second):
+            record.add_phone("0501234567")
+        for pair in ((first, second), (second, first)):
+            proposals = score_chunk([(profile(pair[0]), profile(pair[1]))])
+            if [proposal[1:3] for proposal in proposals] != [("Olena", "Щдутф")]:
+                raise AssertionError(f"dedupe proposes {proposals} for {pair[0].name} and {pair[1].name}")
+
+    tags = rng.choices(TAGS, k=calls)
+    words = [" ".join(rng.sample(WORDS, 2)) for _ in range(calls)]
+    change, rename, birthday, email, address = own(), own(), own(), own(), own()
+    note_add, note_change, note_delete, delete = own(), own(), own(), own()
+    formats = {"jsonl": "jsonl", "csv": "csv", "vcard": "vcf"}
+    exported = os.path.join(directory, "export.jsonl")
+
+    cases: List[Case] = [
+        ("show_contact", calls, lambda i: handlers.show_contact([lower[i]], book), None),
+        ("show_phone", calls, lambda i: handlers.show_phone([lower[i]], book), None),
+        ("find_contacts", calls, lambda i: handlers.find_contacts([lower[i][:-1]], book), None),
+        ("show_starting", calls, lambda i: handlers.show_starting([lower[i][:3]], book), None),
+        ("show_phone_owner", calls, lambda i: handlers.show_phone_owner([phone(i)], book), None),
+        ("show_birthday", calls, lambda i: handlers.show_birthday([lower[i]], book), None),
+        ("birthdays", calls, lambda i: handlers.birthdays([str(7 + i % 24)], book), None),
+        ("born_in", calls, lambda i: handlers.born_in([str(1 + i % 12)], book), None),
+        ("aged", calls, lambda i: handlers.aged([str(i % 60), str(i % 60 + 10)], book), None),
+        ("birthday_weeks", calls, lambda i: handlers.birthday_weeks([str(2000 + i % 30)], book), None),
+        ("show_email", calls, lambda i: handlers.show_email([lower[i]], book), None),
+        ("show_address", calls, lambda i: handlers.show_address([lower[i]], book), None),
+        ("show_notes", calls, lambda i: handlers.show_notes([lower[i]], book), None),
+        ("show_all", calls, lambda i: handlers.show_all(["--page", str(1 + i % 3)], book), None),
+        ("show_more", calls, lambda i: handlers.show_more(), lambda i: handlers.show_all([], book)),
+        ("show_all_notes", calls, lambda i: handlers.show_all_notes([], book), None),
+        ("show_all_notes_sorted_by_tag", calls, lambda i: handlers.show_all_notes_sorted_by_tag([], book), None),
+        ("find_note_by_title", calls, lambda i: handlers.find_note_by_title([note(i)[1]], book), None),
+        ("find_note_by_tag", calls, lambda i: handlers.find_note_by_tag([tags[i]], book), None),
+        ("show_tags", calls, lambda i: handlers.show_tags(book), None),
+        ("search_notes", calls, lambda i: handlers.search_notes(words[i].split(), book), None),
+        ("show_stats", calls, lambda i: handlers.show_stats([]), None),
+    ]
+    for name, extension in formats.items():
+        path = os.path.join(directory, f"export.{extension}")
+        cases.append((f"export_contacts[{name}]", 1,
+                      lambda i, name=name, path=path: handlers.export_contacts([name, path], book), None))
+    cases += [
+        ("dedupe", 1, lambda i: handlers.dedupe([], book), check_dedupe),
+        ("import_contacts", 1, lambda i: handlers.import_contacts([exported], AddressBook()), None),
+        ("add_contact", calls, lambda i: handlers.add_contact([f"new{i}", f"{2 * 10 ** 9 + i:010d}"], book), None),
+        ("change_contact", calls,
+         lambda i: handlers.change_contact([change[i], book.find(change[i].capitalize()).phones[0].value,
+                                            f"{2 * 10 ** 9 + calls + i:010d}"], book), None),
+        ("change_name", calls, lambda i: handlers.change_name([rename[i], f"{rename[i]}x"], book), None),
+        ("add_birthday", calls, lambda i: handlers.add_birthday([birthday[i], "29.02.2000"], book, "add-birthday"), None),
+        ("add_email", calls, lambda i: handlers.add_email([email[i], f"new{i}@example.org"], book, "add-email"), None),
+        ("delete_email", calls, lambda i: handlers.delete_email([email[i]], book), None),
+        ("add_address", calls, lambda i: handlers.add_address([address[i], "1 New Street"], book, "add-address"), None),
+        ("delete_address", calls, lambda i: handlers.delete_address([address[i]], book), None),
+        ("add_note", calls,
+         lambda i: handlers.add_note([note_add[i], "Benchmark", "work", "timed", "note"], book, False), None),
+        ("change_note", calls,
+         lambda i: handlers.change_note([note_change[i], "Benchmark", "home", "changed"], book, False),
+         lambda i: handlers.add_note([note_change[i], "Benchmark", "work", "timed"], book, False)),
+        ("delete_note", calls, lambda i: handlers.delete_note([note_delete[i], "Benchmark"], book),
+         lambda i: handlers.add_note([note_delete[i], "Benchmark", "work", "timed"], book, False)),
+        ("delete_contact", calls, lambda i: handlers.delete_contact([delete[i]], book), None),
+    ]
+    return cases
+
+
+def persistence_cases(book: AddressBook, directory: str) -> List[Case]:
+    """
+    Builds a case for saving and loading the book in every storage format, and for a
+    background autosave of it.
+
+    Args:
+        book (AddressBook): The generated address book.
+        directory (str): A directory for the files.
+
+    Returns:
+        List[Case]: The cases.
+    """
+    pickled = os.path.join(directory, "addressbook.pkl")
+    columnar = os.path.join(directory, "columnar.pkl")
+    database = os.path.join(directory, "addressbook.db")
+    autosaved = os.path.join(directory, "autosave.pkl")
+    sharded = os.path.join(directory, "addressbook.shards")
+    name = next(iter(book.keys()))
+
+    def load(filename: str) -> AddressBook:
+        loaded = load_data(filename)
+        if loaded.journal is not None:
+            loaded.journal.close()
+        if loaded.storage is not None:
+            loaded.storage.close()
+        return loaded
+
+    def reshard(i: int) -> float:
+        opened = load_data(sharded)
+        # A change in each of the first shards fills the cache with dirty shards, which
+        # reshard evicts while it writes the new shards with the same numbers.
+        dirty: Dict[int, str] = {}
+        for contact in opened.keys():
+            if shard_of(contact, DEFAULT_SHARDS) < CACHE_SIZE:
+                dirty.setdefault(shard_of(contact, DEFAULT_SHARDS), contact)
+        for contact in dirty.values():
+            opened.find(contact).add_address("1 Resharded Street")
+        start = time.perf_counter()
+        handlers.reshard(["16"], opened)
+        elapsed = time.perf_counter() - start
+        opened.journal.close()
+        reloaded = load(sharded)
+        if len(list(reloaded.values())) != len(book):
+            raise AssertionError(f"{sharded} holds {len(list(reloaded.values()))} of {len(book)} contacts after reshard")
+        return elapsed
+
+    def save_sqlite(i: int) -> float:
+        source = load_data(pickled)
+        source.journal.close()
+        copy = AddressBook(SQLiteStorage(database))
+        start = time.perf_counter()
+        copy.add_records(list(source.values()))
+        copy.storage.close()
+        return time.perf_counter() - start
+
+    return [
+        ("save_data[pickle]", 1, lambda i: save_data(book, pickled), None),
+        ("load_data[pickle]", 1, lambda i: load(pickled), None),
+        ("write_columnar", 1, lambda i: write_columnar(book.values(), columnar), None),
+        ("load_data[columnar]", 1, lambda i: load(columnar), None),
+        ("add_records[sqlite]", 1, save_sqlite, None),
+        ("load_data[sqlite]", 1, lambda i: load(database), None),
+        ("write_sharded", 1, lambda i: write_sharded(book.values(), sharded), None),
+        ("load_data[sharded]", 1, lambda i: load(sharded).find(name), None),
+        ("reshard", 1, reshard, None),
+        ("Autosaver.save", 1, lambda i: Autosaver(book, autosaved).save(), None),
+    ]
+
+
+def run_case(case: Case, size: int) -> dict:
+    """
+    Times the calls of a case.
+
+    A timed function may return its own duration in seconds, to leave out work it has
+    to do before the part that is measured.
+
+    Args:
+        case (Case): The case.
+        size (int): The number of contacts in the book.
+
+    Returns:
+        dict: The case name, the size, the number of calls and the timings in microseconds.
+    """
+    name, calls, call, prepare = case
+    timings = []
+    for i in range(calls):
+        if prepare is not None:
+            prepare(i)
+        start = time.perf_counter()
+        result = call(i)
+        elapsed = time.perf_counter() - start
+        timings.append(result if isinstance(result, float) else elapsed)
+    timings.sort()
+    return {
+        "case": name,
+        "size": size,
+        "calls": calls,
+        "total_s": sum(timings),
+        "median_us": statistics.median(timings) * 1e6,
+        "p95_us": timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1e6,
+        "min_us": timings[0] * 1e6,
+    }
+
+
+def uncovered(cases: List[Case]) -> List[str]:
+    """
+    Lists the handlers no case times, so that new handlers are not forgotten.
+
+    Args:
+        cases (List[Case]): The cases.
+
+    Returns:
+        List[str]: The names of the handlers without a case.
+    """
+    covered = {name.split("[")[0] for name, *_ in cases}
+    return sorted(name for name, value in vars(handlers).items()
+                  if hasattr(value, "__wrapped__") and name not in covered)
+
+
+def benchmark(sizes=SIZES, seed: int = SEED, log=sys.stderr) -> dict:
+    """
+    Times every handler and the persistence functions on generated books of several sizes.
+
+    Args:
+        sizes: The numbers of contacts.
+        seed (int): The random seed of the generated books.
+        log: The stream progress is printed to.
+
+    Returns:
+        dict: The results, with the Python version and platform they were measured on.
+    """
+    results = []
+    for size in sizes:
+        start = time.perf_counter()
+        book = generate_book(size, seed)
+        print(f"{size} contacts generated in {time.perf_counter() - start:.1f} s", file=log)
+        names = list(book.keys())
+        random.Random(seed).shuffle(names)
+        with tempfile.TemporaryDirectory() as directory:
+            cases = persistence_cases(book, directory) + handler_cases(book, names, directory)
+            missing = uncovered(cases)
+            if missing:
+                print(f"Handlers without a benchmark: {', '.join(missing)}", file=log)
+            for case in cases:
+                result = run_case(case, size)
+                results.append(result)
+                print(f"  {result['case']:<32}{result['median_us']:12.1f} us", file=log)
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": seed,
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict) -> str:
+    """
+    Compares the median timings of two runs.
+
+    Args:
+        baseline (dict): The results of the earlier run.
+        current (dict): The results of the later run.
+
+    Returns:
+        str: A table of the medians and the ratio of the later to the earlier one.
+    """
+    before: Dict[Tuple[str, int], float] = {(r["case"], r["size"]): r["median_us"] for r in baseline["results"]}
+    lines = [f"{'case':<32}{'size':>9}{'before us':>12}{'after us':>12}{'ratio':>8}"]
+    for result in current["results"]:
+        key = (result["case"], result["size"])
+        if key in before:
+            ratio = result["median_us"] / before[key] if before[key] else float("inf")
+            lines.append(f"{key[0]:<32}{key[1]:>9}{before[key]:12.1f}{result['median_us']:12.1f}{ratio:8.2f}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    """
+    Runs the suite and prints the results as JSON, or writes them to the file given with
+    --output. --sizes takes comma-separated book sizes, --seed the random seed, and
+    --compare an earlier results file to print the change against.
+    """
+    options = sys.argv[1:]
+
+    def option(name: str) -> Optional[str]:
+        return options[options.index(name) + 1] if name in options[:-1] else None
+
+    sizes = [int(size) for size in option("--sizes").split(",")] if option("--sizes") else SIZES
+    results = benchmark(sizes, int(option("--seed") or SEED))
+    text = json.dumps(results, indent=2)
+    if option("--output"):
+        with open(option("--output"), "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if option("--compare"):
+        with open(option("--compare"), "r", encoding="utf-8") as f:
+            print(compare(json.load(f), results), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,66 @@
-from datetime import datetime
+from datetime import date, timedelta
+from typing import List, Tuple
 from field import Field
 
+
+def day_of_year(day: int, month: int) -> int:
+    """
+    Gets the zero-based day of the year of a day and month in a leap year.
+
+    Every day of the calendar, including 29 February, gets its own number from 0 to 365.
+
+    Args:
+        day (int): The day of the month.
+        month (int): The month.
+
+    Returns:
+        int: The day of the year.
+    """
+    return date(2000, month, day).timetuple().tm_yday - 1
+
+
+def upcoming_days(start: date, days: int) -> List[Tuple[int, int]]:
+    """
+    Gets the birthdays, as (day, month) pairs, celebrated within a window of days.
+
+    The window may span New Year. Birthdays on 29 February are celebrated on 1 March in
+    years that are not leap years.
+
+    Args:
+        start (date): The first day of the window.
+        days (int): The number of days after the first one the window spans.
+
+    Returns:
+        List[Tuple[int, int]]: The (day, month) pairs in the order they are celebrated.
+    """
+    result = []
+    seen = set()
+    for offset in range(min(days, 365) + 1):
+        current = start + timedelta(days=offset)
+        pairs = [(current.day, current.month)]
+        if (current.day, current.month) == (1, 3) and (current - timedelta(days=1)).day == 28:
+            pairs.insert(0, (29, 2))
+        for pair in pairs:
+            if pair not in seen:
+                seen.add(pair)
+                result.append(pair)
+    return result
+
+
 class Birthday(Field):
     """
     Class to represent a birthday field.
 
+    The date is stored as a proleptic Gregorian ordinal rather than a string to save memory.
+
     Attributes:
         value (str): The birthday value in DD.MM.YYYY format.
     """
 
+    __slots__ = ()
+    # The ordinal is kept in the value slot of Field, which the value property hides.
+    _ordinal = Field.value
+
     def __init__(self, value: str):
         """
         Initializes a Birthday instance.
@@ -16,7 +68,25 @@ class Birthday(Field):
         Args:
             value (str): The birthday value in DD.MM.YYYY format.
         """
-        self.value = self.validate_birthday(value)
+        self.value = value
+
+    @property
+    def value(self) -> str:
+        born = date.fromordinal(self._ordinal)
+        return f"{born.day:02d}.{born.month:02d}.{born.year:04d}"
+
+    @value.setter
+    def value(self, value: str) -> None:
+        self._ordinal = self.parse_birthday(value).toordinal()
+
+    def __getstate__(self) -> dict:
+        """
+        Returns the picklable state of the birthday.
+
+        Returns:
+            dict: The packed birthday.
+        """
+        return {"_ordinal": self._ordinal}
 
     def validate_birthday(self, value: str) -> str:
         """
@@ -31,8 +101,47 @@ class Birthday(Field):
         Raises:
             ValueError: If the birthday value is not in the correct format.
         """
+        self.parse_birthday(value)
+        return value
+
+    @staticmethod
+    def parse_birthday(value: str) -> date:
+        """
+        Parses a birthday value, accepting the same dates as strptime with "%d.%m.%Y" without its overhead.
+
+        Args:
+            value (str): The birthday value in DD.MM.YYYY format.
+
+        Returns:
+            date: The birthday.
+
+        Raises:
+            ValueError: If the birthday value is not in the correct format.
+        """
+        parts = value.split(".")
+        if (len(parts) != 3 or not all(part.isascii() and part.isdigit() for part in parts)
+                or not 1 <= len(parts[0]) <= 2 or not 1 <= len(parts[1]) <= 2 or len(parts[2]) != 4):
+            raise ValueError("Invalid date format. Use DD.MM.YYYY")
         try:
-            datetime.strptime(value, "%d.%m.%Y")
+            return date(int(parts[2]), int(parts[1]), int(parts[0]))
         except ValueError:
             raise ValueError("Invalid date format. Use DD.MM.YYYY")
-        return value
\ No newline at end of file
+
+    def to_date(self) -> date:
+        """
+        Gets the birthday as a date.
+
+        Returns:
+            date: The birthday.
+        """
+        return date.fromordinal(self._ordinal)
+
+    def day_month(self) -> Tuple[int, int]:
+        """
+        Gets the day and month of the birthday.
+
+        Returns:
+            Tuple[int, int]: The day and the month.
+        """
+        born = date.fromordinal(self._ordinal)
+        return born.day, born.month
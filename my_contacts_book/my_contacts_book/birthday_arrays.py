@@ -0,0 +1,169 @@
+from datetime import date
+from typing import Dict, Iterable, List, Tuple
+import numpy as np
+
+INITIAL_CAPACITY = 64
+WEEKS = 53
+# The zero-based day of the year each month starts on, in a year that is not a leap year.
+MONTH_STARTS = np.array([0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334], dtype=np.int16)
+
+
+class BirthdayArrays:
+    """
+    Class to represent the birthdays of the contacts as NumPy arrays of days, months and
+    years, so queries over every birthday run as array operations instead of a loop.
+
+    Every contact with a birthday gets a slot, the same index into the three arrays. The
+    slots of removed contacts are reused, and empty slots have a month of 0, so they
+    never match a query. The arrays double in size when they run out of slots.
+
+    Birthdays on 29 February are celebrated on 1 March in years that are not leap years,
+    as by get_upcoming_birthdays, so that is also when those contacts turn a year older.
+    """
+
+    def __init__(self, birthdays: Iterable[Tuple[str, date]] = ()) -> None:
+        """
+        Initializes a BirthdayArrays instance, filling the arrays at once.
+
+        Args:
+            birthdays (Iterable[Tuple[str, date]]): The names and birthdays of the contacts.
+        """
+        birthdays = list(birthdays)
+        capacity = max(INITIAL_CAPACITY, len(birthdays))
+        self.day = np.zeros(capacity, dtype=np.int8)
+        self.month = np.zeros(capacity, dtype=np.int8)
+        self.year = np.zeros(capacity, dtype=np.int16)
+        self._names: List[str] = [name for name, _ in birthdays]
+        self._slots: Dict[str, int] = {name: slot for slot, name in enumerate(self._names)}
+        self._free: List[int] = []
+        count = len(birthdays)
+        self.day[:count] = [born.day for _, born in birthdays]
+        self.month[:count] = [born.month for _, born in birthdays]
+        self.year[:count] = [born.year for _, born in birthdays]
+
+    def __len__(self) -> int:
+        """
+        Returns the number of contacts with a birthday.
+
+        Returns:
+            int: The number of contacts.
+        """
+        return len(self._slots)
+
+    def add(self, name: str, born: date) -> None:
+        """
+        Adds the birthday of a contact, replacing the one it had.
+
+        Args:
+            name (str): The name of the contact.
+            born (date): The birthday.
+        """
+        slot = self._slots.get(name)
+        if slot is None:
+            if self._free:
+                slot = self._free.pop()
+                self._names[slot] = name
+            else:
+                slot = len(self._names)
+                if slot == len(self.day):
+                    self._grow()
+                self._names.append(name)
+            self._slots[name] = slot
+        self.day[slot], self.month[slot], self.year[slot] = born.day, born.month, born.year
+
+    def remove(self, name: str) -> None:
+        """
+        Removes the birthday of a contact, if it has one.
+
+        Args:
+            name (str): The name of the contact.
+        """
+        slot = self._slots.pop(name, None)
+        if slot is None:
+            return
+        self.month[slot] = 0
+        self._names[slot] = ""
+        self._free.append(slot)
+
+    def _grow(self) -> None:
+        """
+        Doubles the number of slots in the arrays.
+        """
+        for field in ("day", "month", "year"):
+            array = getattr(self, field)
+            grown = np.zeros(2 * len(array), dtype=array.dtype)
+            grown[:len(array)] = array
+            setattr(self, field, grown)
+
+    def born_in(self, month: int) -> List[str]:
+        """
+        Finds the contacts born in a month.
+
+        Args:
+            month (int): The month, from 1 to 12.
+
+        Returns:
+            List[str]: The names, in the order of the days of their birthdays.
+        """
+        slots = np.flatnonzero(self.month == month)
+        slots = slots[np.argsort(self.day[slots], kind="stable")]
+        return [self._names[slot] for slot in slots]
+
+    def ages(self, today: date) -> np.ndarray:
+        """
+        Gets the age of every slot on a day.
+
+        Args:
+            today (date): The day.
+
+        Returns:
+            np.ndarray: The ages, meaningless for empty slots.
+        """
+        later = (self.month > today.month) | ((self.month == today.month) & (self.day > today.day))
+        return today.year - self.year.astype(np.int32) - later
+
+    def aged(self, minimum: int, maximum: int, today: date) -> List[str]:
+        """
+        Finds the contacts whose age on a day is within a range.
+
+        Args:
+            minimum (int): The lowest age.
+            maximum (int): The highest age.
+            today (date): The day.
+
+        Returns:
+            List[str]: The names, youngest first.
+        """
+        ages = self.ages(today)
+        slots = np.flatnonzero((self.month > 0) & (ages >= minimum) & (ages <= maximum))
+        order = np.lexsort((self.day[slots], self.month[slots], self.year[slots]))[::-1]
+        return [self._names[slot] for slot in slots[order]]
+
+    def celebrated_on(self, year: int) -> np.ndarray:
+        """
+        Gets the zero-based day of the year every slot celebrates its birthday on in a year.
+
+        Args:
+            year (int): The year.
+
+        Returns:
+            np.ndarray: The days of the year, meaningless for empty slots.
+        """
+        leap = year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+        months = np.maximum(self.month, 1) - 1
+        # In a year that is not a leap year, 29 February falls on day 59, the day of 1 March.
+        return MONTH_STARTS[months] + self.day - 1 + (leap & (self.month > 2))
+
+    def weekly_histogram(self, year: int) -> List[int]:
+        """
+        Counts the birthdays celebrated in every week of a year, weeks being counted from
+        1 January; the 53rd week holds the last one or two days of the year.
+
+        Args:
+            year (int): The year.
+
+        Returns:
+            List[int]: The number of birthdays in each of the 53 weeks.
+        """
+        days = self.celebrated_on(year)[self.month > 0]
+        return np.bincount(days // 7, minlength=WEEKS).tolist()
@@ -0,0 +1,126 @@
+import json
+import socket
+import sys
+from typing import Tuple, Union
+
+DEFAULT_ADDRESS = "127.0.0.1:8765"
+UNIX_PREFIX = "unix:"
+
+
+def parse_address(address: str) -> Union[Tuple[str, str], Tuple[str, str, int]]:
+    """
+    Parses a server address.
+
+    Args:
+        address (str): unix:<path> for a Unix socket, or <host>:<port> for a TCP socket.
+
+    Returns:
+        Union[Tuple[str, str], Tuple[str, str, int]]: ("unix", path) or ("tcp", host, port).
+
+    Raises:
+        ValueError: If the address is neither.
+    """
+    if address.startswith(UNIX_PREFIX):
+        return "unix", address[len(UNIX_PREFIX):]
+    host, _, port = address.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"Invalid address {address}. Use unix:<path> or <host>:<port>.")
+    return "tcp", host, int(port)
+
+
+class Client:
+    """
+    Class to represent a connection to an address book server.
+
+    Every request is one command line, and every response one line holding the
+    JSON-encoded response text.
+    """
+
+    def __init__(self, address: str = DEFAULT_ADDRESS) -> None:
+        """
+        Connects to a server.
+
+        Args:
+            address (str): The server address, see parse_address.
+        """
+        kind, *location = parse_address(address)
+        if kind == "unix":
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.socket.connect(location[0])
+        else:
+            self.socket = socket.create_connection(tuple(location))
+        self._file = self.socket.makefile("rwb")
+
+    def request(self, command: str) -> str:
+        """
+        Sends a command and waits for its response.
+
+        Args:
+            command (str): The command line.
+
+        Returns:
+            str: The response text.
+
+        Raises:
+            ConnectionError: If the server closed the connection.
+        """
+        self._file.write(command.replace("\n", " ").encode("utf-8") + b"\n")
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("The server closed the connection.")
+        return json.loads(line)
+
+    def close(self) -> None:
+        """
+        Closes the connection.
+        """
+        self._file.close()
+        self.socket.close()
+
+
+def run_client(address: str = DEFAULT_ADDRESS) -> None:
+    """
+    Runs the interactive prompt against a server instead of a local address book.
+
+    Commands are corrected and note texts asked for locally, then sent to the server.
+
+    Args:
+        address (str): The server address, see parse_address.
+    """
+    from main import COMMANDS, EXIT_COMMANDS, parse_input
+    from transliteration import CommandSuggester
+
+    try:
+        client = Client(address)
+    except OSError as e:
+        print(f"Could not connect to {address}: {e.strerror or e}.", file=sys.stderr)
+        return
+    suggester = CommandSuggester(COMMANDS)
+    print(f"Connected to {address}. Enter 'help' to see the available commands.")
+    try:
+        while True:
+            user_input = input("Enter a command:\n").strip()
+            if not user_input:
+                continue
+            action, args = parse_input(user_input)
+            suggested_command = suggester.suggest(action)
+            if suggested_command and suggested_command != action:
+                confirm = input(f"Do you mean '{suggested_command}'? (y/n): ").strip().lower()
+                if confirm == 'y':
+                    action = suggested_command
+            if action in ("add-note", "change-note") and len(args) == 2:
+                text = input("Enter the text of the note: ").strip()
+                tag = ""
+                while not tag:
+                    tag = input("Enter the tag for the note: ").strip()
+                args += [tag, text]
+            print(client.request(" ".join([action, *args])))
+            if action in EXIT_COMMANDS:
+                break
+    except (KeyboardInterrupt, EOFError):
+        print("\nProgram stopped. Exiting...")
+    except ConnectionError as e:
+        print(e, file=sys.stderr)
+    finally:
+        client.close()
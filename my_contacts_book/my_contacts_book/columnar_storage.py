@@ -0,0 +1,495 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from record import Record
+from note import Note
+from storage import Storage
+from birthday import day_of_year, upcoming_days
+
+MAGIC = b"CBKSNAP1"
+HEADER = struct.Struct("<8sQQQQ")
+SECTION = struct.Struct("<QQ")
+SECTIONS = (
+    "name_offsets", "name_data",
+    "birthday_offsets", "birthday_data",
+    "email_offsets", "email_data",
+    "address_offsets", "address_data",
+    "phone_index", "phone_offsets", "phone_data",
+    "note_index", "title_offsets", "title_data", "text_offsets", "text_data", "tag_offsets", "tag_data",
+    "name_order",
+)
+DATA_START = HEADER.size + SECTION.size * len(SECTIONS)
+
+
+def is_columnar(filename: str) -> bool:
+    """
+    Checks whether a file is a columnar snapshot.
+
+    Args:
+        filename (str): The snapshot filename.
+
+    Returns:
+        bool: True if the file starts with the columnar snapshot magic bytes.
+    """
+    try:
+        with open(filename, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except FileNotFoundError:
+        return False
+
+
+class _StringColumn:
+    """
+    Accumulates strings into an offsets table and a contiguous UTF-8 buffer.
+    """
+
+    def __init__(self) -> None:
+        self.offsets = array("Q", [0])
+        self.data = bytearray()
+
+    def append(self, value: Optional[str]) -> None:
+        self.data += (value or "").encode("utf-8")
+        self.offsets.append(len(self.data))
+
+
+def write_columnar(records: Iterable[Record], filename: str, journal_seq: int = 0) -> None:
+    """
+    Writes records as a columnar snapshot into a temporary file and atomically moves it into place.
+
+    Args:
+        records (Iterable[Record]): The records to write.
+        filename (str): The snapshot filename.
+        journal_seq (int): The sequence number of the last journaled mutation the records contain.
+    """
+    names, birthdays, emails, addresses = _StringColumn(), _StringColumn(), _StringColumn(), _StringColumn()
+    phones, titles, texts, tags = _StringColumn(), _StringColumn(), _StringColumn(), _StringColumn()
+    phone_index, note_index = array("Q", [0]), array("Q", [0])
+    for record in records:
+        names.append(record.name.value)
+        birthdays.append(record.birthday.value if record.birthday else None)
+        emails.append(record.email.value if record.email else None)
+        addresses.append(record.address.value if record.address else None)
+        for phone in record.phones:
+            phones.append(phone.value)
+        phone_index.append(len(phones.offsets) - 1)
+        for note in record.notes:
+            titles.append(note.title.value)
+            texts.append(note.text.value)
+            tags.append(note.tag.value)
+        note_index.append(len(titles.offsets) - 1)
+
+    count = len(names.offsets) - 1
+    name_view = memoryview(names.data)
+    name_order = array("Q", sorted(
+        range(count), key=lambda i: bytes(name_view[names.offsets[i]:names.offsets[i + 1]])))
+    sections = (
+        names.offsets, names.data, birthdays.offsets, birthdays.data,
+        emails.offsets, emails.data, addresses.offsets, addresses.data,
+        phone_index, phones.offsets, phones.data,
+        note_index, titles.offsets, titles.data, texts.offsets, texts.data, tags.offsets, tags.data,
+        name_order,
+    )
+
+    tmp_filename = filename + ".tmp"
+    with open(tmp_filename, "wb") as f:
+        f.write(bytes(DATA_START))
+        table = []
+        for section in sections:
+            f.write(bytes(-f.tell() % 8))
+            start = f.tell()
+            f.write(section)
+            table.append((start, f.tell() - start))
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, count, len(phones.offsets) - 1, len(titles.offsets) - 1, journal_seq))
+        for start, length in table:
+            f.write(SECTION.pack(start, length))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_filename, filename)
+
+
+class ColumnarView:
+    """
+    Class to represent a read-only, memory-mapped columnar snapshot.
+
+    Opening a view only maps the file; records are decoded one by one when they are
+    accessed, and names are looked up by binary search over the sorted name order.
+
+    Attributes:
+        count (int): The number of records in the snapshot.
+        journal_seq (int): The sequence number of the last journaled mutation in the snapshot.
+    """
+
+    def __init__(self, filename: str) -> None:
+        """
+        Maps a columnar snapshot file.
+
+        Args:
+            filename (str): The snapshot filename.
+
+        Raises:
+            ValueError: If the file is not a columnar snapshot.
+        """
+        with open(filename, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, _, _, self.journal_seq = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{filename} is not a columnar snapshot.")
+        self._buffer = memoryview(self._mmap)
+        self._sections = {}
+        for i, name in enumerate(SECTIONS):
+            start, length = SECTION.unpack_from(self._mmap, HEADER.size + i * SECTION.size)
+            section = self._buffer[start:start + length]
+            self._sections[name] = section if name.endswith("_data") else section.cast("Q")
+
+    def _string(self, column: str, i: int) -> str:
+        """
+        Decodes one string of a string column.
+
+        Args:
+            column (str): The column name without the _offsets/_data suffix.
+            i (int): The position of the string in the column.
+
+        Returns:
+            str: The decoded string.
+        """
+        offsets = self._sections[column + "_offsets"]
+        return str(self._sections[column + "_data"][offsets[i]:offsets[i + 1]], "utf-8")
+
+    def name(self, i: int) -> str:
+        """
+        Decodes the name of a record.
+
+        Args:
+            i (int): The position of the record.
+
+        Returns:
+            str: The name.
+        """
+        return self._string("name", i)
+
+    def birthday(self, i: int) -> str:
+        """
+        Decodes the birthday of a record.
+
+        Args:
+            i (int): The position of the record.
+
+        Returns:
+            str: The birthday value, or an empty string if it is not set.
+        """
+        return self._string("birthday", i)
+
+    def index(self, name: str) -> Optional[int]:
+        """
+        Finds the position of a record by binary search over the sorted name order.
+
+        Args:
+            name (str): The name to find.
+
+        Returns:
+            Optional[int]: The position of the record, or None if it is not in the snapshot.
+        """
+        order = self._sections["name_order"]
+        key = name.encode("utf-8")
+        offsets, data = self._sections["name_offsets"], self._sections["name_data"]
+        pos = bisect_left(range(self.count), key, key=lambda k: bytes(data[offsets[order[k]]:offsets[order[k] + 1]]))
+        if pos < self.count and self.name(order[pos]) == name:
+            return order[pos]
+        return None
+
+    def notes(self, i: int) -> List[Tuple[str, str, str]]:
+        """
+        Decodes the notes of a record.
+
+        Args:
+            i (int): The position of the record.
+
+        Returns:
+            List[Tuple[str, str, str]]: The title, text and tag of every note.
+        """
+        index = self._sections["note_index"]
+        return [(self._string("title", n), self._string("text", n), self._string("tag", n))
+                for n in range(index[i], index[i + 1])]
+
+    def phone_positions(self) -> Dict[str, List[int]]:
+        """
+        Builds a phone number to record positions index from the phone column.
+
+        Returns:
+            Dict[str, List[int]]: The positions of the records every phone number belongs to.
+        """
+        index = self._sections["phone_index"]
+        positions: Dict[str, List[int]] = {}
+        for i in range(self.count):
+            for p in range(index[i], index[i + 1]):
+                positions.setdefault(self._string("phone", p), []).append(i)
+        return positions
+
+    def birthday_positions(self) -> List[List[int]]:
+        """
+        Builds a day of the year to record positions index from the birthday column.
+
+        Returns:
+            List[List[int]]: 366 buckets with the positions of the records born on that day.
+        """
+        buckets: List[List[int]] = [[] for _ in range(366)]
+        for i in range(self.count):
+            birthday = self.birthday(i)
+            if birthday:
+                day, month, _ = birthday.split(".")
+                buckets[day_of_year(int(day), int(month))].append(i)
+        return buckets
+
+    def record(self, i: int) -> Record:
+        """
+        Decodes a record.
+
+        Args:
+            i (int): The position of the record.
+
+        Returns:
+            Record: The decoded record.
+        """
+        record = Record(self.name(i))
+        index = self._sections["phone_index"]
+        for p in range(index[i], index[i + 1]):
+            record.add_phone(self._string("phone", p))
+        birthday = self.birthday(i)
+        if birthday:
+            record.add_birthday(birthday)
+        email = self._string("email", i)
+        if email:
+            record.add_email(email)
+        address = self._string("address", i)
+        if address:
+            record.add_address(address)
+        for title, text, tag in self.notes(i):
+            record.add_note(Note(title, text, tag))
+        return record
+
+    def close(self) -> None:
+        """
+        Unmaps the snapshot.
+        """
+        for section in self._sections.values():
+            section.release()
+        self._sections.clear()
+        self._buffer.release()
+        self._mmap.close()
+
+
+class ColumnarStorage(Storage):
+    """
+    Class to represent an address book storage on top of a memory-mapped columnar snapshot.
+
+    The snapshot itself is never modified: added and changed records go to an in-memory
+    overlay, and deleted or overlaid snapshot records are hidden.
+
+    Attributes:
+        view (ColumnarView): The read-only snapshot view.
+        journal_seq (int): The sequence number of the last journaled mutation in the snapshot.
+    """
+
+    def __init__(self, filename: str) -> None:
+        """
+        Opens a columnar snapshot.
+
+        Args:
+            filename (str): The snapshot filename.
+        """
+        self.view = ColumnarView(filename)
+        self.journal_seq = self.view.journal_seq
+        self._overlay: Dict[str, Record] = {}
+        self._hidden: Set[str] = set()
+        self._phone_positions: Optional[Dict[str, List[int]]] = None
+        self._birthday_positions: Optional[List[List[int]]] = None
+
+    def _decode(self, i: int) -> Record:
+        """
+        Decodes a snapshot record and links it to the owning address book.
+
+        Args:
+            i (int): The position of the record in the snapshot.
+
+        Returns:
+            Record: The record.
+        """
+        record = self.view.record(i)
+        record._book = self.owner
+        return record
+
+    def __getitem__(self, name: str) -> Record:
+        if name in self._overlay:
+            return self._overlay[name]
+        if name not in self._hidden:
+            i = self.view.index(name)
+            if i is not None:
+                return self._decode(i)
+        raise KeyError(name)
+
+    def __setitem__(self, name: str, record: Record) -> None:
+        self._overlay[name] = record
+        if self.view.index(name) is not None:
+            self._hidden.add(name)
+
+    def __delitem__(self, name: str) -> None:
+        if name in self._overlay:
+            del self._overlay[name]
+        elif name in self._hidden or self.view.index(name) is None:
+            raise KeyError(name)
+        else:
+            self._hidden.add(name)
+
+    def __contains__(self, name: object) -> bool:
+        if name in self._overlay:
+            return True
+        return name not in self._hidden and self.view.index(name) is not None
+
+    def __len__(self) -> int:
+        return self.view.count - len(self._hidden) + len(self._overlay)
+
+    def __iter__(self) -> Iterator[str]:
+        for name, _ in self._entries():
+            yield name
+
+    def _entries(self) -> Iterator[Tuple[str, Optional[int]]]:
+        """
+        Iterates over the visible names in snapshot order, followed by the added ones.
+
+        Returns:
+            Iterator[Tuple[str, Optional[int]]]: Pairs of name and snapshot position, or
+                None as the position if the record lives in the overlay.
+        """
+        for i in range(self.view.count):
+            name = self.view.name(i)
+            if name not in self._hidden:
+                yield name, i
+            elif name in self._overlay:
+                yield name, None
+        for name in self._overlay:
+            if name not in self._hidden:
+                yield name, None
+
+    def values(self) -> Iterator[Record]:
+        """
+        Iterates over the records, decoding snapshot records one at a time.
+
+        Returns:
+            Iterator[Record]: The records.
+        """
+        for name, i in self._entries():
+            yield self._overlay[name] if i is None else self._decode(i)
+
+    def items(self) -> Iterator[Tuple[str, Record]]:
+        """
+        Iterates over the names and records, decoding snapshot records one at a time.
+
+        Returns:
+            Iterator[Tuple[str, Record]]: The name and record pairs.
+        """
+        for record in self.values():
+            yield record.name.value, record
+
+    def record_changed(self, record: Record, op: str, *args) -> None:
+        """
+        Moves a changed record into the overlay.
+
+        Args:
+            record (Record): The mutated record.
+            op (str): The name of the mutating method.
+            *args: The arguments the method was called with.
+        """
+        self[record.name.value] = record
+
+    def find_by_phone(self, phone: str) -> List[str]:
+        """
+        Finds the names of the records a phone number belongs to.
+
+        The snapshot phone index is built from the phone column on first use; the overlay
+        is searched directly.
+
+        Args:
+            phone (str): The phone number to find.
+
+        Returns:
+            List[str]: The names of the records with this phone number.
+        """
+        if self._phone_positions is None:
+            self._phone_positions = self.view.phone_positions()
+        names = {self.view.name(i) for i in self._phone_positions.get(phone, ())}
+        names -= self._hidden
+        names.update(name for name, record in self._overlay.items() if record.find_phone(phone))
+        return sorted(names)
+
+    def upcoming_birthdays(self, start: date, days: int) -> List[Record]:
+        """
+        Gets the records with a birthday within the given window, in the order they are
+        celebrated, decoding only the matches.
+
+        The snapshot birthday index is built from the birthday column on first use; the
+        overlay is searched directly.
+
+        Args:
+            start (date): The first day of the window.
+            days (int): The number of days after the first one the window spans.
+
+        Returns:
+            List[Record]: The records with a birthday in the window.
+        """
+        if self._birthday_positions is None:
+            self._birthday_positions = self.view.birthday_positions()
+        window = upcoming_days(start, days)
+        position = {pair: i for i, pair in enumerate(window)}
+        upcoming = []
+        for day, month in window:
+            for i in self._birthday_positions[day_of_year(day, month)]:
+                name = self.view.name(i)
+                if name not in self._hidden:
+                    upcoming.append((position[(day, month)], self._decode(i)))
+        for record in self._overlay.values():
+            if record.birthday and record.birthday.day_month() in position:
+                upcoming.append((position[record.birthday.day_month()], record))
+        return [record for _, record in sorted(upcoming, key=lambda item: item[0])]
+
+    def close(self) -> None:
+        """
+        Unmaps the snapshot. Changes in the overlay are kept only in the journal.
+        """
+        self.view.close()
+
+
+def main() -> None:
+    """
+    Converts an address book file into a columnar snapshot:
+    python -m columnar_storage <source> <destination>.
+    """
+    from main import load_data
+
+    options = sys.argv[1:]
+    if len(options) != 2:
+        print("Usage: python -m columnar_storage <source> <destination>", file=sys.stderr)
+        return
+    source, destination = options
+    book = load_data(source)
+    count = len(book)
+    try:
+        write_columnar(book.values(), destination, book.journal_seq)
+    except OSError as e:
+        print(f"Could not write {destination}: {e.strerror}.", file=sys.stderr)
+        return
+    finally:
+        if book.journal is not None:
+            book.journal.close()
+        if book.storage is not None:
+            book.storage.close()
+    print(f"Wrote {count} contacts into the columnar snapshot {destination}.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+from itertools import islice
+from typing import Iterable, List
+from address_book import AddressBook
+
+MAX_COMPLETIONS = 100
+
+
+def enable_completion(book: AddressBook, commands: Iterable[str]) -> bool:
+    """
+    Completes commands and contact names with the Tab key at the prompt, if the readline
+    module is available.
+
+    The first word completes to a command and the following words to contact names,
+    looked up by prefix in the sorted names of the book.
+
+    Args:
+        book (AddressBook): The address book whose names to complete.
+        commands (Iterable[str]): The available commands.
+
+    Returns:
+        bool: True if completion was enabled.
+    """
+    try:
+        import readline
+    except ImportError:
+        return False
+
+    commands = sorted(commands)
+    matches: List[str] = []
+
+    def complete(text: str, state: int):
+        nonlocal matches
+        if state == 0:
+            line = readline.get_line_buffer()[:readline.get_begidx()]
+            if not line.strip():
+                matches = [command for command in commands if command.startswith(text.lower())]
+            else:
+                matches = list(islice(book.names_starting_with(text), MAX_COMPLETIONS))
+        return matches[state] if state < len(matches) else None
+
+    readline.set_completer_delims(" \t\n")
+    readline.set_completer(complete)
+    if "libedit" in (readline.__doc__ or ""):
+        readline.parse_and_bind("bind ^I rl_complete")
+    else:
+        readline.parse_and_bind("tab: complete")
+    return True
@@ -0,0 +1,169 @@
+import copyreg
+import os
+import pickle
+from typing import IO, Dict, Optional
+from address import Address
+from address_book import AddressBook
+from email import Email
+
+COMPRESSIONS = ("lzma", "zlib", "bz2")
+MAGIC_NUMBERS = {b"\xfd7zXZ\x00": "lzma", b"\x1f\x8b": "zlib", b"BZh": "bz2"}
+
+
+def detect_compression(filename: str) -> Optional[str]:
+    """
+    Detects the compression of a snapshot file from its first bytes.
+
+    Args:
+        filename (str): The snapshot filename.
+
+    Returns:
+        Optional[str]: "lzma", "zlib" or "bz2", or None if the file is not compressed or
+            does not exist.
+    """
+    try:
+        with open(filename, "rb") as f:
+            head = f.read(6)
+    except (FileNotFoundError, IsADirectoryError):
+        return None
+    for magic, compression in MAGIC_NUMBERS.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def open_compressed(raw: IO[bytes], mode: str, compression: str) -> IO[bytes]:
+    """
+    Wraps a binary file in a file object compressing what is written to it or
+    decompressing what is read from it, a block at a time.
+
+    zlib compression is written in the gzip container, which adds a header to find it by
+    and a checksum to the zlib stream.
+
+    Args:
+        raw (IO[bytes]): The underlying binary file.
+        mode (str): "rb" or "wb".
+        compression (str): "lzma", "zlib" or "bz2".
+
+    Returns:
+        IO[bytes]: The file object.
+
+    Raises:
+        ValueError: If the compression is unknown.
+    """
+    if compression == "lzma":
+        import lzma
+        return lzma.open(raw, mode)
+    if compression == "zlib":
+        import gzip
+        return gzip.GzipFile(fileobj=raw, mode=mode)
+    if compression == "bz2":
+        import bz2
+        return bz2.open(raw, mode)
+    raise ValueError(f"Unknown compression: {compression}. Use {', '.join(COMPRESSIONS)}.")
+
+
+def restore_email(local: str, domain: Optional[str] = None) -> Email:
+    """
+    Rebuilds an email field from its parts without validating it again.
+
+    Args:
+        local (str): The part before the @, or the whole value if it has no @.
+        domain (Optional[str]): The domain, shared by every email with the same domain.
+
+    Returns:
+        Email: The email field.
+    """
+    email = Email.__new__(Email)
+    email.value = local if domain is None else f"{local}@{domain}"
+    return email
+
+
+def restore_address(*words: str) -> Address:
+    """
+    Rebuilds an address field from its words.
+
+    Args:
+        *words (str): The words of the address, shared by every address using them.
+
+    Returns:
+        Address: The address field.
+    """
+    address = Address.__new__(Address)
+    address.value = " ".join(words)
+    return address
+
+
+def dictionary_dispatch_table() -> Dict[type, object]:
+    """
+    Builds a pickle dispatch table that splits emails and addresses into parts taken from
+    a string dictionary, so every email domain and every address word is written once
+    and referred to afterwards.
+
+    Equal strings are replaced by a single string object from the dictionary, which the
+    pickle memo then writes only the first time it is seen. Tags need no dictionary, as
+    notes intern them and share a single string per tag already.
+
+    Returns:
+        Dict[type, object]: The dispatch table, including the default reducers.
+    """
+    strings: Dict[str, str] = {}
+
+    def shared(text: str) -> str:
+        return strings.setdefault(text, text)
+
+    def reduce_email(email: Email):
+        local, at, domain = email.value.rpartition("@")
+        if not at:
+            return restore_email, (email.value,)
+        return restore_email, (local, shared(domain))
+
+    def reduce_address(address: Address):
+        return restore_address, tuple(shared(word) for word in address.value.split(" "))
+
+    table = copyreg.dispatch_table.copy()
+    table[Email] = reduce_email
+    table[Address] = reduce_address
+    return table
+
+
+def write_compressed(book: AddressBook, filename: str, compression: str) -> None:
+    """
+    Writes the address book as a compressed snapshot into a temporary file and atomically
+    moves it into place.
+
+    The book is pickled straight into the compressing file object, so neither the
+    pickle nor the compressed data is ever held in memory as a whole.
+
+    Args:
+        book (AddressBook): The address book to save.
+        filename (str): The snapshot filename.
+        compression (str): "lzma", "zlib" or "bz2".
+    """
+    tmp_filename = filename + ".tmp"
+    with open(tmp_filename, "wb") as raw:
+        with open_compressed(raw, "wb", compression) as f:
+            pickler = pickle.Pickler(f)
+            pickler.dispatch_table = dictionary_dispatch_table()
+            pickler.dump(book)
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(tmp_filename, filename)
+
+
+def read_compressed(filename: str, compression: str) -> AddressBook:
+    """
+    Loads the address book from a compressed snapshot, decompressing it as it is unpickled.
+
+    Args:
+        filename (str): The snapshot filename.
+        compression (str): "lzma", "zlib" or "bz2".
+
+    Returns:
+        AddressBook: The loaded address book, which is written with the same compression again.
+    """
+    with open(filename, "rb") as raw:
+        with open_compressed(raw, "rb", compression) as f:
+            book = pickle.load(f)
+    book.compression = compression
+    return book
@@ -0,0 +1,280 @@
+import os
+from itertools import combinations, islice
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from address_book import AddressBook
+from importer import chunked
+from record import Record
+from transliteration import edit_distance, transliterate
+
+PREFIX_LENGTH = 4
+MAX_BLOCK_SIZE = 16
+WINDOW = 4
+CHUNK_SIZE = 5000
+POOL_THRESHOLD = 20000
+THRESHOLD = 0.7
+NAME_WEIGHT = 0.7
+PREFIX_SIMILARITY = 0.9
+CONTACT_WEIGHT = 0.3
+BIRTHDAY_WEIGHT = 0.2
+BIRTHDAY_CONFLICT_WEIGHT = 0.3
+
+# A profile is what scoring needs of a contact: its name, its name case-folded and
+# transliterated, its phone numbers, its case-folded email, the ordinal of its birthday
+# (0 if it has none) and the number of its filled-in fields.
+Profile = Tuple[str, str, Tuple[str, ...], str, int, int]
+# A proposal is the score, the contact to keep, the contact to merge into it and why.
+Proposal = Tuple[float, str, str, str]
+
+
+def normalize_phone(phone: str) -> str:
+    """
+    Normalizes a phone number to its last ten digits.
+
+    Args:
+        phone (str): The phone number.
+
+    Returns:
+        str: The digits.
+    """
+    return "".join(char for char in phone if char.isdigit())[-10:]
+
+
+def profile(record: Record) -> Profile:
+    """
+    Takes the normalized fields of a record that duplicates are found by.
+
+    Args:
+        record (Record): The record.
+
+    Returns:
+        Profile: The profile.
+    """
+    email = record.email.value.casefold() if record.email else ""
+    birthday = record.birthday.to_date().toordinal() if record.birthday else 0
+    fields = len(record.phones) + len(record.notes) + bool(email) + bool(birthday) + bool(record.address)
+    return (record.name.value, transliterate(record.name.value.casefold()),
+            tuple(normalize_phone(phone.value) for phone in record.phones), email, birthday, fields)
+
+
+def blocking_keys(contact: Profile) -> Iterator[str]:
+    """
+    Gets the keys of the blocks a contact falls into; only contacts sharing a block are compared.
+
+    Args:
+        contact (Profile): The profile of the contact.
+
+    Returns:
+        Iterator[str]: The keys, one per phone number, one for the email and one for the
+            beginning of the transliterated name.
+    """
+    for phone in contact[2]:
+        yield "phone:" + phone
+    if contact[3]:
+        yield "email:" + contact[3]
+    yield "name:" + contact[1][:PREFIX_LENGTH]
+
+
+def candidate_pairs(profiles: List[Profile]) -> Set[Tuple[int, int]]:
+    """
+    Pairs up the contacts sharing a block.
+
+    Every pair in a block of at most MAX_BLOCK_SIZE contacts is a candidate. Larger
+    blocks, such as the names starting alike in a large book, are sorted by transliterated
+    name and every contact is paired with the next WINDOW ones only, so the number of
+    candidates grows linearly with the book.
+
+    Args:
+        profiles (List[Profile]): The profiles of the contacts.
+
+    Returns:
+        Set[Tuple[int, int]]: The positions of both contacts of every candidate pair in
+            the profiles, the lower one first.
+    """
+    blocks: Dict[str, List[int]] = {}
+    for i, contact in enumerate(profiles):
+        for key in blocking_keys(contact):
+            blocks.setdefault(key, []).append(i)
+    pairs: Set[Tuple[int, int]] = set()
+    for members in blocks.values():
+        if len(members) <= MAX_BLOCK_SIZE:
+            pairs.update(combinations(members, 2))
+            continue
+        members.sort(key=lambda i: profiles[i][1])
+        for position, i in enumerate(members):
+            for j in members[position + 1:position + 1 + WINDOW]:
+                pairs.add((i, j) if i < j else (j, i))
+    return pairs
+
+
+def name_similarity(a: str, b: str, lowest: float = 0.0) -> float:
+    """
+    Measures how alike two transliterated names are.
+
+    A name that is the first words of the other, such as a first name and the full name,
+    counts as PREFIX_SIMILARITY alike.
+
+    Args:
+        a (str): The first name.
+        b (str): The second name.
+        lowest (float): The similarity below which the exact value does not matter, so
+            the edit distance can stop early.
+
+    Returns:
+        float: 1 for the same name, down to 0 for names with nothing in common, or a
+            value below lowest if they are less alike than that.
+    """
+    shorter, longer = sorted((a.split(), b.split()), key=len)
+    if shorter and shorter != longer and longer[:len(shorter)] == shorter:
+        return PREFIX_SIMILARITY
+    if lowest >= 1:
+        return 1.0 if a == b else 0.0
+    longest = max(len(a), len(b)) or 1
+    limit = max(0, int((1 - lowest) * longest))
+    return 1 - edit_distance(a, b, limit) / longest
+
+
+def score_pair(a: Profile, b: Profile, threshold: float = 0.0) -> Tuple[float, str]:
+    """
+    Scores how likely two contacts are the same person.
+
+    How alike the names are makes up to NAME_WEIGHT of the score. A shared phone number
+    or email adds CONTACT_WEIGHT, and the same birthday adds BIRTHDAY_WEIGHT while
+    different birthdays take BIRTHDAY_CONFLICT_WEIGHT away. The same name alone is enough
+    for a proposal, unless the birthdays differ; names that are only alike need a shared
+    phone, email or birthday.
+    The names, the costly part, are only compared if the pair can still reach the threshold.
+
+    Args:
+        a (Profile): The profile of the first contact.
+        b (Profile): The profile of the second contact.
+        threshold (float): The score below which the exact value does not matter.
+
+    Returns:
+        Tuple[float, str]: The score, from 0 to 1, and the reasons for it, or 0 and no
+            reasons if the score is below the threshold.
+    """
+    score, reasons = 0.0, []
+    if set(a[2]) & set(b[2]):
+        score += CONTACT_WEIGHT
+        reasons.append("same phone")
+    elif a[3] and a[3] == b[3]:
+        score += CONTACT_WEIGHT
+        reasons.append("same email")
+    if a[4] and b[4]:
+        if a[4] == b[4]:
+            score += BIRTHDAY_WEIGHT
+            reasons.append("same birthday")
+        else:
+            score -= BIRTHDAY_CONFLICT_WEIGHT
+            reasons.append("different birthdays")
+    if score + NAME_WEIGHT < threshold:
+        return 0.0, ""
+    similarity = name_similarity(a[1], b[1], (threshold - score) / NAME_WEIGHT)
+    score += NAME_WEIGHT * similarity
+    if score < threshold:
+        return 0.0, ""
+    reasons.insert(0, "same name" if similarity == 1 else f"names {similarity:.0%} alike")
+    return max(score, 0.0), ", ".join(reasons)
+
+
+def keep_first(a: Profile, b: Profile) -> bool:
+    """
+    Decides which of two duplicates to keep.
+
+    A name typed with the Cyrillic keyboard layout on, which transliterate turns into the
+    other name, is never kept over that name. Otherwise the contact with more fields
+    filled in is kept, and on a tie the older one.
+
+    Args:
+        a (Profile): The profile of the older contact.
+        b (Profile): The profile of the newer contact.
+
+    Returns:
+        bool: True to keep the first contact, False to keep the second.
+    """
+    a_mistyped = a[1] != a[0].casefold()
+    b_mistyped = b[1] != b[0].casefold()
+    if a[1] == b[1] and a_mistyped != b_mistyped:
+        return b_mistyped
+    return a[5] >= b[5]
+
+
+def score_chunk(pairs: List[Tuple[Profile, Profile]], threshold: float = THRESHOLD) -> List[Proposal]:
+    """
+    Scores a chunk of candidate pairs and proposes merging the likely duplicates.
+
+    Runs in a worker process. Of two duplicates, the one keep_first chooses is kept, and
+    the other is proposed to be merged into it.
+
+    Args:
+        pairs (List[Tuple[Profile, Profile]]): The profiles of the candidate pairs, the
+            older contact first.
+        threshold (float): The lowest score to propose a merge for.
+
+    Returns:
+        List[Proposal]: The proposals.
+    """
+    proposals = []
+    for a, b in pairs:
+        score, reasons = score_pair(a, b, threshold)
+        if reasons:
+            keep, merge = (a, b) if keep_first(a, b) else (b, a)
+            proposals.append((score, keep[0], merge[0], reasons))
+    return proposals
+
+
+def score_pairs(pairs: Iterable[Tuple[Profile, Profile]], count: int,
+                workers: Optional[int] = None) -> Iterator[List[Proposal]]:
+    """
+    Scores candidate pairs in chunks, in a pool of worker processes if there are enough
+    of them to make up for starting it.
+
+    At most two chunks per worker are in flight at a time, so memory stays bounded.
+
+    Args:
+        pairs (Iterable[Tuple[Profile, Profile]]): The profiles of the candidate pairs.
+        count (int): The number of pairs.
+        workers (Optional[int]): The number of worker processes, the CPU count by default.
+
+    Returns:
+        Iterator[List[Proposal]]: The proposals of every chunk.
+    """
+    chunks = chunked(pairs, CHUNK_SIZE)
+    workers = workers or os.cpu_count() or 1
+    if count < POOL_THRESHOLD or workers == 1:
+        yield from map(score_chunk, chunks)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = [pool.submit(score_chunk, chunk) for chunk in islice(chunks, workers * 2)]
+        while pending:
+            results = pending.pop(0).result()
+            for chunk in islice(chunks, 1):
+                pending.append(pool.submit(score_chunk, chunk))
+            yield results
+
+
+def find_duplicates(book: AddressBook, workers: Optional[int] = None) -> List[Proposal]:
+    """
+    Finds the contacts of the book that are likely the same person.
+
+    Contacts are taken in the order the book keeps them, which is the order they were
+    added for a book kept in memory, so the older contact of a pair comes first.
+    Contacts are only compared within blocks sharing a phone number, an email or the
+    beginning of the transliterated name, so the work grows about linearly with the book
+    instead of with the number of all pairs.
+
+    Args:
+        book (AddressBook): The address book.
+        workers (Optional[int]): The number of worker processes, the CPU count by default.
+
+    Returns:
+        List[Proposal]: The merge proposals, highest score first.
+    """
+    profiles = [profile(record) for record in book.values()]
+    pairs = candidate_pairs(profiles)
+    proposals = [proposal for chunk in score_pairs(((profiles[i], profiles[j]) for i, j in pairs), len(pairs), workers)
+                 for proposal in chunk]
+    proposals.sort(key=lambda proposal: (-proposal[0], proposal[1].lower(), proposal[2].lower()))
+    return proposals
@@ -3,6 +3,8 @@ from field import Field
 
 
 class Email(Field):
+    __slots__ = ()
+
     def __init__(self, email: str):
         """
         Initializes the Email field with a validated email address.
@@ -0,0 +1,150 @@
+import csv
+import json
+from typing import IO, Iterable
+from record import Record
+from importer import CSV_FIELDS, NOTE_PROPERTY
+
+BUFFER_SIZE = 1 << 20
+VCARD_LINE_LENGTH = 75
+
+
+def write_jsonl(records: Iterable[Record], f: IO[str]) -> int:
+    """
+    Writes contacts as JSON lines, one contact per line.
+
+    Args:
+        records (Iterable[Record]): The records to write.
+        f (IO[str]): The output file.
+
+    Returns:
+        int: The number of contacts written.
+    """
+    count = 0
+    for record in records:
+        f.write(json.dumps(record.to_dict(), ensure_ascii=False))
+        f.write("\n")
+        count += 1
+    return count
+
+
+def write_csv(records: Iterable[Record], f: IO[str]) -> int:
+    """
+    Writes contacts as CSV rows in the format read by importer.read_csv.
+
+    Args:
+        records (Iterable[Record]): The records to write.
+        f (IO[str]): The output file.
+
+    Returns:
+        int: The number of contacts written.
+    """
+    writer = csv.writer(f)
+    writer.writerow(CSV_FIELDS)
+    count = 0
+    for record in records:
+        data = record.to_dict()
+        writer.writerow([
+            data["name"],
+            ";".join(data["phones"]),
+            data["birthday"] or "",
+            data["email"] or "",
+            data["address"] or "",
+            json.dumps(data["notes"], ensure_ascii=False) if data["notes"] else "",
+        ])
+        count += 1
+    return count
+
+
+def escape_vcard(value: str) -> str:
+    """
+    Escapes a text value for a vCard content line.
+
+    Args:
+        value (str): The text.
+
+    Returns:
+        str: The escaped value.
+    """
+    return (value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def fold_vcard(line: str) -> str:
+    """
+    Folds a vCard content line into lines of at most 75 characters.
+
+    Args:
+        line (str): The content line.
+
+    Returns:
+        str: The folded line, ending with CRLF.
+    """
+    parts = [line[:VCARD_LINE_LENGTH]]
+    for i in range(VCARD_LINE_LENGTH, len(line), VCARD_LINE_LENGTH - 1):
+        parts.append(" " + line[i:i + VCARD_LINE_LENGTH - 1])
+    return "\r\n".join(parts) + "\r\n"
+
+
+def write_vcard(records: Iterable[Record], f: IO[str]) -> int:
+    """
+    Writes contacts as vCard 3.0 cards in the format read by importer.read_vcard.
+
+    Notes are written as X-CONTACTS-NOTE properties holding title;text;tag.
+
+    Args:
+        records (Iterable[Record]): The records to write.
+        f (IO[str]): The output file.
+
+    Returns:
+        int: The number of contacts written.
+    """
+    count = 0
+    for record in records:
+        data = record.to_dict()
+        name = escape_vcard(data["name"])
+        lines = ["BEGIN:VCARD", "VERSION:3.0", f"FN:{name}", f"N:{name};;;;"]
+        lines.extend(f"TEL:{phone}" for phone in data["phones"])
+        if data["birthday"]:
+            day, month, year = data["birthday"].split(".")
+            lines.append(f"BDAY:{year}-{month}-{day}")
+        if data["email"]:
+            lines.append(f"EMAIL:{escape_vcard(data['email'])}")
+        if data["address"]:
+            lines.append(f"ADR:;;{escape_vcard(data['address'])};;;;")
+        lines.extend(f"{NOTE_PROPERTY}:" + ";".join(escape_vcard(part) for part in note) for note in data["notes"])
+        lines.append("END:VCARD")
+        f.write("".join(fold_vcard(line) for line in lines))
+        count += 1
+    return count
+
+
+EXPORT_FORMATS = {
+    "jsonl": write_jsonl,
+    "csv": write_csv,
+    "vcard": write_vcard,
+}
+
+
+def write_contacts(records: Iterable[Record], filename: str, format: str) -> int:
+    """
+    Streams contacts to a file in one of the export formats.
+
+    Records are consumed one at a time and written through a large write buffer, so
+    memory use does not depend on the number of contacts.
+
+    Args:
+        records (Iterable[Record]): The records to write.
+        filename (str): The output filename.
+        format (str): The format, one of jsonl, csv or vcard.
+
+    Returns:
+        int: The number of contacts written.
+
+    Raises:
+        ValueError: If the format is unknown.
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown format {format}. Use {', '.join(EXPORT_FORMATS)}.")
+    newline = "" if format in ("csv", "vcard") else None
+    with open(filename, "w", encoding="utf-8", newline=newline, buffering=BUFFER_SIZE) as f:
+        return EXPORT_FORMATS[format](records, f)
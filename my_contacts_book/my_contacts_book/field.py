@@ -1,6 +1,38 @@
 class Field:
+    """
+    Base class for record fields.
+
+    Fields use __slots__ instead of a per-instance __dict__ to keep millions of them small.
+
+    Attributes:
+        value: The value of the field.
+    """
+
+    __slots__ = ("value",)
+
     def __init__(self, value):
         self.value = value
 
     def __str__(self):
-        return str(self.value)
\ No newline at end of file
+        return str(self.value)
+
+    def __getstate__(self) -> dict:
+        """
+        Returns the picklable state of the field.
+
+        Returns:
+            dict: The field attributes.
+        """
+        return {"value": self.value}
+
+    def __setstate__(self, state: dict) -> None:
+        """
+        Restores the field from its pickled state.
+
+        Also accepts the __dict__ of fields pickled before __slots__ were introduced.
+
+        Args:
+            state (dict): The field attributes.
+        """
+        for attribute, value in state.items():
+            setattr(self, attribute, value)
@@ -1,3 +1,4 @@
+import os
 from functools import wraps
 from typing import List
 from address_book import AddressBook
@@ -6,8 +7,23 @@ from record import Record
 from email import Email
 from note import Note
 from colorama import Fore, Style
-from prettytable import PrettyTable
 from field import Field
+from importer import CHUNK_SIZE, validate_contacts
+from exporter import EXPORT_FORMATS, write_contacts
+from pager import parse_page_args, render, render_more
+import instrumentation
+
+
+def new_table():
+    """
+    Creates an empty table, importing prettytable on first use.
+
+    Returns:
+        PrettyTable: The table.
+    """
+    from prettytable import PrettyTable
+
+    return PrettyTable()
 
 
 def input_error(func):
@@ -26,6 +42,7 @@ def input_error(func):
         try:
             return func(*args, **kwargs)
         except (KeyError, ValueError, IndexError) as e:
+            instrumentation.note_error(e)
             return f"{Fore.YELLOW}Error: {str(e)}{Style.RESET_ALL}"
 
     return inner
@@ -50,9 +67,13 @@ def add_contact(args: List[str], book: AddressBook) -> str:
     name = name.capitalize()
     birthday = optional_args[0] if optional_args else None
 
-    existing_record = book.find(name)
-    if existing_record and any(phone == p.value for p in existing_record.phones):
+    owners = book.find_by_phone(phone)
+    if name in owners:
         return f"{Fore.YELLOW}Contact with name {name} and phone {phone} number already exists.{Style.RESET_ALL}"
+    if owners:
+        return f"{Fore.YELLOW}Phone number {phone} already belongs to {owners[0]}.{Style.RESET_ALL}"
+
+    existing_record = book.find(name)
 
     if existing_record:
         existing_record.add_phone(phone)
@@ -84,6 +105,9 @@ def change_contact(args: List[str], book: AddressBook) -> str:
         name = name.capitalize()
         record = book.find(name)
         if record:
+            owners = [owner for owner in book.find_by_phone(new_phone) if owner != name]
+            if owners:
+                return f"{Fore.YELLOW}Phone number {new_phone} already belongs to {owners[0]}.{Style.RESET_ALL}"
             record.edit_phone(old_phone, new_phone)
             return f"{Fore.GREEN}Phone number updated.{Style.RESET_ALL}"
         return f"{Fore.YELLOW}Contact {name} not found.{Style.RESET_ALL}"
@@ -122,7 +146,7 @@ def show_contact(args: List[str], book: AddressBook) -> str:
     name = args[0].capitalize()
     record = book.find(name)
     if record:
-        table = PrettyTable()
+        table = new_table()
         table.field_names = ["Name", "Phones", "Birthday", "Email", "Address"]
 
         phones = ", ".join([str(phone) for phone in record.phones])
@@ -182,10 +206,7 @@ def change_name(args: list[str], book: AddressBook) -> str:
     if new_name in book:
         return f"{Fore.YELLOW}Contact with this name {new_name} already exists.{Style.RESET_ALL}"
 
-    contact = book[old_name]
-    del book[old_name]
-    contact.name = new_name
-    book[new_name] = contact
+    book.rename(old_name, new_name)
     return f"{Fore.GREEN}Contact name changed from '{old_name}' to '{new_name}'.{Style.RESET_ALL}"
 
 
@@ -207,7 +228,7 @@ def show_phone(args: List[str], book: AddressBook) -> str:
     name = args[0].capitalize()
     record = book.find(name)
     if record:
-        table = PrettyTable()
+        table = new_table()
         table.field_names = ["Name", "Phones"]
         phones = ", ".join([str(phone) for phone in record.phones])
         table.add_row([name, phones])
@@ -215,6 +236,58 @@ def show_phone(args: List[str], book: AddressBook) -> str:
     return f"{Fore.YELLOW}Contact {name} not found.{Style.RESET_ALL}"
 
 
+@input_error
+def show_phone_owner(args: List[str], book: AddressBook) -> str:
+    """
+    Shows the contacts the specified phone number belongs to.
+
+    Args:
+        args (List[str]): The arguments for the command.
+        book (AddressBook): The address book instance.
+
+    Returns:
+        str: The response message.
+    """
+    if len(args) != 1:
+        raise ValueError("Give me phone, please.")
+
+    phone = args[0]
+    owners = book.find_by_phone(phone)
+    if owners:
+        table = new_table()
+        table.field_names = ["Phone", "Name"]
+        for name in owners:
+            table.add_row([phone, name])
+        return f"{Fore.GREEN}{table}{Style.RESET_ALL}"
+    return f"{Fore.YELLOW}Phone number {phone} not found.{Style.RESET_ALL}"
+
+
+@input_error
+def find_contacts(args: List[str], book: AddressBook) -> str:
+    """
+    Shows the contacts whose names are closest to a fragment, even with typos.
+
+    Args:
+        args (List[str]): The arguments for the command.
+        book (AddressBook): The address book instance.
+
+    Returns:
+        str: The response message.
+    """
+    if len(args) != 1:
+        raise ValueError("Give me a name or a part of it, please.")
+
+    matches = book.find_names(args[0])
+    if not matches:
+        return f"{Fore.YELLOW}No contacts with names like {args[0]}.{Style.RESET_ALL}"
+    table = new_table()
+    table.field_names = ["Name", "Phones", "Match"]
+    for similarity, name in matches:
+        phones = ", ".join([str(phone) for phone in book.find(name).phones])
+        table.add_row([name, phones, f"{similarity:.0%}"])
+    return f"{Fore.GREEN}{table}{Style.RESET_ALL}"
+
+
 @input_error
 def add_birthday(args: List[str], book: AddressBook, action: str) -> str:
     """
@@ -260,7 +333,7 @@ def show_birthday(args: List[str], book: AddressBook) -> str:
     name = args[0].capitalize()
     record = book.find(name)
     if record:
-        table = PrettyTable()
+        table = new_table()
         table.field_names = ["Name", "Birthday"]
         birthday = str(record.birthday) if record.birthday else "No birthday set"
         table.add_row([name, birthday])
@@ -271,7 +344,7 @@ def show_birthday(args: List[str], book: AddressBook) -> str:
 @input_error
 def birthdays(args: List[str], book: AddressBook) -> str:
     """
-    Shows upcoming birthdays within the next 7 days.
+    Shows upcoming birthdays within the next days (7 by default).
 
     Args:
         args (List[str]): The arguments for the command.
@@ -280,10 +353,14 @@ def birthdays(args: List[str], book: AddressBook) -> str:
     Returns:
         str: The response message.
     """
-    upcoming_birthdays = book.get_upcoming_birthdays()
+    if len(args) > 1 or (args and not args[0].isdigit()):
+        raise ValueError("Give me the number of days, please.")
+
+    days = int(args[0]) if args else 7
+    upcoming_birthdays = book.get_upcoming_birthdays(days)
     if not upcoming_birthdays:
-        return f"{Fore.YELLOW}No birthdays in the next 7 days.{Style.RESET_ALL}"
-    table = PrettyTable()
+        return f"{Fore.YELLOW}No birthdays in the next {days} days.{Style.RESET_ALL}"
+    table = new_table()
     table.field_names = ["Name", "Birthday", "Phones"]
     for record in upcoming_birthdays:
         phones = ", ".join([str(phone) for phone in record.phones])
@@ -291,6 +368,99 @@ def birthdays(args: List[str], book: AddressBook) -> str:
     return f"{Fore.GREEN}{table}{Style.RESET_ALL}"
 
 
+NUMPY_MISSING = "Birthday statistics need NumPy. Install it with pip install my_contacts_book_bot[stats]."
+HISTOGRAM_WIDTH = 40
+
+
+@input_error
+def born_in(args: List[str], book: AddressBook) -> str:
+    """
+    Shows the contacts born in a month, given by its number or English name, one page at a time.
+
+    Args:
+        args (List[str]): The month and the optional --page and --size arguments.
+        book (AddressBook): The address book instance.
+
+    Returns:
+        str: The response message.
+    """
+    import calendar
+
+    args, page, size = parse_page_args(args)
+    months = [name.lower() for name in calendar.month_name]
+    if len(args) != 1 or not (args[0].isdigit() and 1 <= int(args[0]) <= 12 or args[0].lower() in months[1:]):
+        raise ValueError("Give me the month, please.")
+    month = int(args[0]) if args[0].isdigit() else months.index(args[0].lower())
+    try:
+        records = book.born_in(month)
+    except ImportError:
+        return f"{Fore.YELLOW}{NUMPY_MISSING}{Style.RESET_ALL}"
+    table = render(["Name", "Phones", "Birthday", "Email", "Address"], contact_rows(records), page, size)
+    if not table:
+        return f"{Fore.YELLOW}Nobody was born in {calendar.month_name[month]}.{Style.RESET_ALL}"
+    return f"{Fore.GREEN}{table}{Style.RESET_ALL}"
+
+
+@input_error
+def aged(args: List[str], book: AddressBook) -> str:
+    """
+    Shows the contacts whose age is within a range, youngest first, one page at a time.
+
+    Args:
+        args (List[str]): The lowest and highest age and the optional --page and --size arguments.
+        book (AddressBook): The address book instance.
+
+    Returns:
+        str: The response message.
+    """
+    args, page, size = parse_page_args(args)
+    if len(args) not in (1, 2) or not all(arg.isdigit() for arg in args):
+        raise ValueError("Give me the lowest and highest age, please.")
+    minimum, maximum = int(args[0]), int(args[-1])
+    try:
+        records = book.aged(minimum, maximum)
+    except ImportError:
+        return f"{Fore.YELLOW}{NUMPY_MISSING}{Style.RESET_ALL}"
+    table = render(["Name", "Phones", "Birthday", "Email", "Address"], contact_rows(records), page, size)
+    if not table:
+        return f"{Fore.YELLOW}Nobody is {minimum} to {maximum} years old.{Style.RESET_ALL}"
+    return f"{Fore.GREEN}{table}{Style.RESET_ALL}"
+
+
+@input_error
+def birthday_weeks(args: List[str], book: AddressBook) -> str:
+    """
+    Shows how many birthdays are celebrated in every week of a year (the current one by default).
+
+    Args:
+        args (List[str]): The arguments for the command.
+        book (AddressBook): The address book instance.
+
+    Returns:
+        str: The response message.
+    """
+    from datetime import date, timedelta
+
+    if len(args) > 1 or (args and not (args[0].isdigit() and 1 <= int(args[0]) <= 9999)):
+        raise ValueError("Give me the year, please.")
+    year = int(args[0]) if args else date.today().year
+    try:
+        counts = book.birthday_histogram(year)
+    except ImportError:
+        return f"{Fore.YELLOW}{NUMPY_MISSING}{Style.RESET_ALL}"
+    if not any(counts):
+        return f"{Fore.YELLOW}No birthdays in the address book.{Style.RESET_ALL}"
+    most = max(counts)
+    table = new_table()
+    table.field_names = ["Week", "From", "Birthdays", ""]
+    table.align[""] = "l"
+    first = date(year, 1, 1)
+    for week, count in enumerate(counts):
+        start = first + timedelta(days=7 * week)
+        table.add_row([week + 1, start.strftime("%d.%m"), count, "#" * round(HISTOGRAM_WIDTH * count / most)])
+    return f"{Fore.GREEN}{table}{Style.RESET_ALL}"
+
+
 @input_error
 def add_email(args: List[str], book: AddressBook, action:str) -> str:
     """
@@ -359,7 +529,7 @@ def show_email(args: List[str], book: AddressBook) -> str:
     name = args[0].capitalize()
     record = book.find(name)
     if record:
-        table = PrettyTable()
+        table = new_table()
         table.field_names = ["Name", "Email"]
         email = str(record.email) if record.email else "-"
         table.add_row([name, email])
@@ -437,7 +607,7 @@ def show_address(args: List[str], book: AddressBook) -> str:
     name = args[0].capitalize()
     record = book.find(name)
     if record:
-        table = PrettyTable()
+        table = new_table()
         table.field_names = ["Name", "Address"]
         address = str(record.address) if record.address else "-"
         table.add_row([name, address])
@@ -445,24 +615,29 @@ def show_address(args: List[str], book: AddressBook) -> str:
     return f"{Fore.YELLOW}Contact {name} not found.{Style.RESET_ALL}"
 
 @input_error
-def add_note(args: list[str], book: AddressBook) -> str:
+def add_note(args: list[str], book: AddressBook, interactive: bool = True) -> str:
     """
     Adds a new note to the specified contact in the address book.
 
+    The tag and text of the note follow the title, or are asked for if they are left out.
+
     Args:
-        args (list[str]): A list containing the contact name and the note title.
+        args (list[str]): A list containing the contact name, the note title and optionally
+            the tag and the words of the text.
         book (AddressBook): The address book where the contact is stored.
+        interactive (bool): Whether a missing tag and text may be asked for.
 
     Returns:
         str: A message indicating the result of the operation.
 
     Raises:
-        ValueError: If the number of arguments provided is not equal to 2.
+        ValueError: If the contact name or the note title is missing, or the tag is missing
+            and cannot be asked for.
     """
-    if len(args) != 2:
-        raise ValueError("Provide the contact name and the note title.")
+    if len(args) < 2 or (len(args) == 2 and not interactive):
+        raise ValueError("Provide the contact name, the note title, the tag and the text.")
 
-    name, title_value = args
+    name, title_value, *inline = args
     record = book.find(name.capitalize())
 
     if not record:
@@ -470,12 +645,14 @@ def add_note(args: list[str], book: AddressBook) -> str:
 
     title_value = title_value.capitalize()
 
-    for note in record.notes:
-        if note.title.value == title_value:
-            return f"{Fore.YELLOW}Error: Note with title '{title_value}' already exists for {name}.{Style.RESET_ALL}"
+    if record.find_note(title_value):
+        return f"{Fore.YELLOW}Error: Note with title '{title_value}' already exists for {name}.{Style.RESET_ALL}"
 
-    text_value = input("Enter the text of the note: ").strip()
-    tag_value = input("Enter the tag for the note: ").strip()
+    if inline:
+        tag_value, text_value = inline[0], " ".join(inline[1:])
+    else:
+        text_value = input("Enter the text of the note: ").strip()
+        tag_value = input("Enter the tag for the note: ").strip()
 
     note = Note(title_value, text_value, tag_value)
     record.add_note(note)
@@ -506,7 +683,7 @@ def show_notes(args: list[str], book: AddressBook) -> str:
     if not record.notes:
         return f"{Fore.YELLOW}Contact {name} has no notes.{Style.RESET_ALL}"
 
-    table = PrettyTable()
+    table = new_table()
     table.field_names = ["Title", "Text", "Tag"]
 
     for note in record.notes:
@@ -516,24 +693,29 @@ def show_notes(args: list[str], book: AddressBook) -> str:
 
 
 @input_error
-def change_note(args: list[str], book: AddressBook) -> str:
+def change_note(args: list[str], book: AddressBook, interactive: bool = True) -> str:
     """
     Updates the text and tag of an existing note for a specified contact in the address book.
 
+    The new tag and text of the note follow the title, or are asked for if they are left out.
+
     Args:
-        args (list[str]): A list containing the contact name and the note title.
+        args (list[str]): A list containing the contact name, the note title and optionally
+            the new tag and the words of the new text.
         book (AddressBook): The address book where the contact is stored.
+        interactive (bool): Whether a missing tag and text may be asked for.
 
     Returns:
         str: A message indicating the result of the operation.
 
     Raises:
-        ValueError: If the number of arguments provided is not equal to 2.
+        ValueError: If the contact name or the note title is missing, or the tag is missing
+            and cannot be asked for.
     """
-    if len(args) != 2:
-        raise ValueError("Provide the contact name and the note title.")
+    if len(args) < 2 or (len(args) == 2 and not interactive):
+        raise ValueError("Provide the contact name, the note title, the tag and the text.")
 
-    name, title_value = args
+    name, title_value, *inline = args
     record = book.find(name.capitalize())
 
     if not record:
@@ -541,13 +723,14 @@ def change_note(args: list[str], book: AddressBook) -> str:
     
     title_value = title_value.capitalize()  
 
-    for note in record.notes:
-        if note.title.value == title_value:
+    if record.find_note(title_value):
+        if inline:
+            new_tag, new_text = inline[0], " ".join(inline[1:])
+        else:
             new_text = input("Enter the new text for the note: ").strip()
             new_tag = input("Enter the new tag for the note: ").strip()
-            note.text.value = new_text
-            note.tag.value = new_tag
-            return f"{Fore.GREEN}Note '{title_value}' has been updated for {name}.{Style.RESET_ALL}"
+        record.change_note(title_value, new_text, new_tag)
+        return f"{Fore.GREEN}Note '{title_value}' has been updated for {name}.{Style.RESET_ALL}"
 
     return f"{Fore.YELLOW}Error: Note with title '{title_value}' not found for {name}.{Style.RESET_ALL}"
 
@@ -577,69 +760,83 @@ def delete_note(args: list[str], book: AddressBook) -> str:
 
     title_value = title_value.capitalize()  
 
-    for note in record.notes:
-        if note.title.value == title_value:
-            record.notes.remove(note)
-            return f"{Fore.GREEN}Note '{title_value}' has been deleted from {name}'s record.{Style.RESET_ALL}"
+    if record.find_note(title_value):
+        record.remove_note(title_value)
+        return f"{Fore.GREEN}Note '{title_value}' has been deleted from {name}'s record.{Style.RESET_ALL}"
 
     return f"{Fore.YELLOW}Error: Note with title '{title_value}' not found for {name}.{Style.RESET_ALL}"
 
+def contact_rows(records):
+    """
+    Turns contacts into table rows.
+
+    Args:
+        records: The contacts.
+
+    Returns:
+        The rows of name, phones, birthday, email and address, made as they are read.
+    """
+    for record in records:
+        phones = ", ".join([str(phone) for phone in record.phones])
+        birthday = str(record.birthday) if record.birthday else "–"
+        email = str(record.email) if record.email else "–"
+        address = str(record.address) if hasattr(record, 'address') and record.address else "–"
+        yield record.name, phones, birthday, email, address
+
+
+def note_rows(notes):
+    """
+    Turns pairs of contact name and note into table rows.
+
+    Args:
+        notes: Pairs of contact name and note.
+
+    Returns:
+        The rows of name, title, text and tag.
+    """
+    for name, note in notes:
+        yield name, note.title.value, note.text.value, note.tag.value
+
+
 @input_error
-def show_all_notes(book: AddressBook) -> str:
+def show_all_notes(args: list[str], book: AddressBook) -> str:
     """
-    Displays all contacts with their corresponding notes in a tabular format.
+    Displays all contacts with their corresponding notes in a tabular format, one page at a time.
 
     Args:
+        args (list[str]): The optional --page and --size arguments.
         book (AddressBook): The address book containing the contacts and their notes.
 
     Returns:
         str: A formatted table of contacts with notes, or a message if no contacts with notes are found.
     """
-    table = PrettyTable()
-    table.field_names = ["Name", "Title", "Text", "Tag"]
+    _, page, size = parse_page_args(args)
+    notes = ((record.name.value, note) for record in book.values() for note in record.notes)
+    table = render(["Name", "Title", "Text", "Tag"], note_rows(notes), page, size)
 
-    notes_found = False
-
-    for record in book.values():
-        if record.notes: 
-            for note in record.notes:
-                table.add_row([record.name.value, note.title.value, note.text.value, note.tag.value])
-            notes_found = True
-
-    if notes_found:
+    if table:
         return f"{Fore.GREEN}All contacts with notes:\n{table}{Style.RESET_ALL}"
     else:
         return f"{Fore.YELLOW}No contacts with notes found.{Style.RESET_ALL}"
     
 @input_error
-def show_all_notes_sorted_by_tag(book: AddressBook) -> str:
+def show_all_notes_sorted_by_tag(args: list[str], book: AddressBook) -> str:
     """
-    Displays all contacts with their corresponding notes, sorted by the note's tag, in a tabular format.
+    Displays all contacts with their corresponding notes, sorted by the note's tag, in a tabular format,
+    one page at a time.
 
     Args:
+        args (list[str]): The optional --page and --size arguments.
         book (AddressBook): The address book containing the contacts and their notes.
 
     Returns:
         str: A formatted table of contacts with notes sorted by tag, or a message if no contacts with notes are found.
     """
-    table = PrettyTable()
-    table.field_names = ["Name", "Title", "Text", "Tag"]
-
-    notes_list = []
-
-    for record in book.values():
-        if record.notes:  
-            for note in record.notes:
-                notes_list.append((record.name.value, note.title.value, note.text.value, note.tag.value))
+    _, page, size = parse_page_args(args)
+    table = render(["Name", "Title", "Text", "Tag"], note_rows(book.notes_sorted_by_tag()), page, size)
 
-    if not notes_list:
+    if not table:
         return f"{Fore.YELLOW}No contacts with notes found.{Style.RESET_ALL}"
- 
-    notes_list.sort(key=lambda x: x[3].lower())  
-
-    
-    for name, title, text, tag in notes_list:
-        table.add_row([name, title, text, tag])
 
     return f"{Fore.GREEN}All contacts with notes (sorted by tag):\n{table}{Style.RESET_ALL}"
 
@@ -649,7 +846,8 @@ def find_note_by_title(args: list[str], book: AddressBook) -> str:
     Searches for and displays all notes with a specific title across all contacts in the address book.
 
     Args:
-        args (list[str]): A list containing a single string, the title of the note to search for.
+        args (list[str]): A list containing a single string, the title of the note to search for,
+            and the optional --page and --size arguments.
         book (AddressBook): The address book containing the contacts and their notes.
 
     Returns:
@@ -658,26 +856,16 @@ def find_note_by_title(args: list[str], book: AddressBook) -> str:
     Raises:
         ValueError: If the number of arguments is not equal to one (i.e., the title is not provided).
     """
+    args, page, size = parse_page_args(args)
     if len(args) != 1:
        raise ValueError("Provide the title of the note to search.")
 
     title_value = args[0].capitalize()  
-    table = PrettyTable()
-    table.field_names = ["Name", "Title", "Text", "Tag"]
-
-    found_notes = []
-
-    for record in book.values():
-        for note in record.notes:
-            if note.title.value == title_value:
-                found_notes.append((record.name.value, note.title.value, note.text.value, note.tag.value))
+    table = render(["Name", "Title", "Text", "Tag"], note_rows(book.find_notes(title=title_value)), page, size)
 
-    if not found_notes:
+    if not table:
         return f"{Fore.YELLOW}No notes found with Title '{title_value}'.{Style.RESET_ALL}"
 
-    for name, title, text, tag in found_notes:
-        table.add_row([name, title, text, tag])
-
     return f"{Fore.GREEN}Notes with Title '{title_value}':\n{table}{Style.RESET_ALL}"
 
 @input_error
@@ -686,7 +874,8 @@ def find_note_by_tag(args: list[str], book: AddressBook) -> str:
     Searches for and displays all notes with a specific tag across all contacts in the address book.
 
     Args:
-        args (list[str]): A list containing a single string, the tag of the note to search for.
+        args (list[str]): A list containing a single string, the tag of the note to search for,
+            and the optional --page and --size arguments.
         book (AddressBook): The address book containing the contacts and their notes.
 
     Returns:
@@ -695,49 +884,329 @@ def find_note_by_tag(args: list[str], book: AddressBook) -> str:
     Raises:
         ValueError: If the number of arguments is not equal to one (i.e., the tag is not provided).
     """
+    args, page, size = parse_page_args(args)
     if len(args) != 1:
         raise ValueError("Provide the tag of the note to search.")
 
     tag_value = args[0].lower()
-    table = PrettyTable()
-    table.field_names = ["Name", "Title", "Text", "Tag"]
+    table = render(["Name", "Title", "Text", "Tag"], note_rows(book.find_notes(tag=tag_value)), page, size)
 
-    found_notes = []
+    if not table:
+        return f"{Fore.YELLOW}No notes found with Tag '{tag_value}'.{Style.RESET_ALL}"
 
-    for record in book.values():
-        for note in record.notes:
-            if note.tag.value.lower() == tag_value:
-                found_notes.append((record.name.value, note.title.value, note.text.value, note.tag.value))
+    return f"{Fore.GREEN}Notes with Tag '{tag_value}':\n{table}{Style.RESET_ALL}"
 
-    if not found_notes:
-        return f"{Fore.YELLOW}No notes found with Tag '{tag_value}'.{Style.RESET_ALL}"
 
-    for name, title, text, tag in found_notes:
-        table.add_row([name, title, text, tag])
+@input_error
+def show_tags(book: AddressBook) -> str:
+    """
+    Displays all note tags with the number of notes that have them.
 
-    return f"{Fore.GREEN}Notes with Tag '{tag_value}':\n{table}{Style.RESET_ALL}"
+    Args:
+        book (AddressBook): The address book containing the contacts and their notes.
+
+    Returns:
+        str: A formatted table of tags and note counts, or a message if there are no notes.
+    """
+    tag_counts = book.tag_counts()
+
+    if not tag_counts:
+        return f"{Fore.YELLOW}No contacts with notes found.{Style.RESET_ALL}"
+
+    table = new_table()
+    table.field_names = ["Tag", "Notes"]
+    for tag, count in tag_counts:
+        table.add_row([tag, count])
+
+    return f"{Fore.GREEN}All tags:\n{table}{Style.RESET_ALL}"
+
+
+@input_error
+def search_notes(args: list[str], book: AddressBook) -> str:
+    """
+    Searches the title, text and tag of all notes for the given terms and displays the best matches.
+
+    Args:
+        args (list[str]): The search terms and the optional --page and --size arguments.
+        book (AddressBook): The address book containing the contacts and their notes.
+
+    Returns:
+        str: A formatted table of the best matching notes ranked by relevance, or a message if no notes match.
+
+    Raises:
+        ValueError: If no search terms are provided.
+    """
+    args, page, size = parse_page_args(args, size=10)
+    if not args:
+        raise ValueError("Provide the terms to search for.")
+
+    query = " ".join(args)
+
+    def ranked_rows():
+        shown, limit = 0, page * size + 1
+        while True:
+            found_notes = book.search_notes(query, limit)
+            for name, note, score in found_notes[shown:]:
+                yield name, note.title.value, note.text.value, note.tag.value, f"{score:.2f}"
+            if len(found_notes) < limit:
+                return
+            shown, limit = len(found_notes), limit * 2
+
+    table = render(["Name", "Title", "Text", "Tag", "Score"], ranked_rows(), page, size)
+
+    if not table:
+        return f"{Fore.YELLOW}No notes found for '{query}'.{Style.RESET_ALL}"
+
+    return f"{Fore.GREEN}Notes matching '{query}':\n{table}{Style.RESET_ALL}"
 
 
 @input_error
-def show_all(book: AddressBook) -> str:
+def show_all(args: List[str], book: AddressBook) -> str:
     """
-    Shows all contacts in the address book.
+    Shows all contacts in the address book in alphabetical order, one page at a time.
 
     Args:
+        args (List[str]): The optional --page and --size arguments.
         book (AddressBook): The address book instance.
 
     Returns:
         str: The response message.
     """
+    _, page, size = parse_page_args(args)
     if not book:
         return f"{Fore.YELLOW}The address book is empty.{Style.RESET_ALL}"
 
-    table = PrettyTable()
-    table.field_names = ["Name", "Phones", "Birthday", "Email", "Address"]
-    for name, record in book.data.items():
-        phones = ", ".join([str(phone) for phone in record.phones])
-        birthday = str(record.birthday) if record.birthday else "–"
-        email = str(record.email) if record.email else "–"
-        address = str(record.address) if hasattr(record, 'address') and record.address else "–"
-        table.add_row([record.name, phones, birthday, email, address])
-    return f"{Fore.GREEN}{table}{Style.RESET_ALL}"
\ No newline at end of file
+    table = render(["Name", "Phones", "Birthday", "Email", "Address"], contact_rows(book.sorted_records()), page, size)
+    return f"{Fore.GREEN}{table}{Style.RESET_ALL}"
+
+
+@input_error
+def show_starting(args: List[str], book: AddressBook) -> str:
+    """
+    Shows the contacts whose names start with a prefix in alphabetical order, one page at a time.
+
+    Args:
+        args (List[str]): The prefix and the optional --page and --size arguments.
+        book (AddressBook): The address book instance.
+
+    Returns:
+        str: The response message.
+    """
+    args, page, size = parse_page_args(args)
+    if len(args) != 1:
+        raise ValueError("Give me the beginning of the name, please.")
+
+    records = (book.find(name) for name in book.names_starting_with(args[0]))
+    table = render(["Name", "Phones", "Birthday", "Email", "Address"], contact_rows(records), page, size)
+    if not table:
+        return f"{Fore.YELLOW}No contacts with names starting with {args[0]}.{Style.RESET_ALL}"
+    return f"{Fore.GREEN}{table}{Style.RESET_ALL}"
+
+
+@input_error
+def show_more() -> str:
+    """
+    Shows the next page of the last paged listing.
+
+    Returns:
+        str: The response message.
+    """
+    table = render_more()
+    if not table:
+        return f"{Fore.YELLOW}Nothing more to show.{Style.RESET_ALL}"
+    return f"{Fore.GREEN}{table}{Style.RESET_ALL}"
+
+
+@input_error
+def import_contacts(args: List[str], book: AddressBook) -> str:
+    """
+    Imports contacts from a CSV, vCard or JSON lines file.
+
+    Rows are streamed from the file, validated in worker processes and added to the book
+    in batches. Rows that fail validation, or whose name or phone is already in the book,
+    are skipped and reported.
+
+    Args:
+        args (List[str]): The arguments for the command.
+        book (AddressBook): The address book instance.
+
+    Returns:
+        str: The response message.
+    """
+    if len(args) != 1:
+        raise ValueError("Give me the file to import, please.")
+
+    filename = args[0]
+    if not os.path.isfile(filename):
+        return f"{Fore.YELLOW}File {filename} not found.{Style.RESET_ALL}"
+
+    imported, errors = 0, []
+    batch, batch_phones = {}, {}
+    for line, record, error in validate_contacts(filename):
+        if record is not None:
+            name = record.name.value
+            taken = [(phone.value, owner) for phone in record.phones
+                     for owner in book.find_by_phone(phone.value) + [batch_phones.get(phone.value)]
+                     if owner and owner != name]
+            if name in book or name in batch:
+                error = f"Contact {name} already exists."
+            elif taken:
+                error = "Phone number {} already belongs to {}.".format(*taken[0])
+        if error:
+            errors.append(f"Line {line}: {error}")
+            continue
+        batch[name] = record
+        batch_phones.update((phone.value, name) for phone in record.phones)
+        if len(batch) >= CHUNK_SIZE:
+            book.add_records(list(batch.values()))
+            imported += len(batch)
+            batch.clear()
+            batch_phones.clear()
+    book.add_records(list(batch.values()))
+    imported += len(batch)
+
+    message = f"{Fore.GREEN}Imported {imported} contacts from {filename}.{Style.RESET_ALL}"
+    if errors:
+        shown = "\n".join(errors[:20])
+        more = f"\n... and {len(errors) - 20} more." if len(errors) > 20 else ""
+        message += f"\n{Fore.YELLOW}Skipped {len(errors)} rows:\n{shown}{more}{Style.RESET_ALL}"
+    return message
+
+
+@input_error
+def export_contacts(args: List[str], book: AddressBook) -> str:
+    """
+    Exports all contacts to a JSON lines, CSV or vCard file.
+
+    Contacts are written one at a time as they are read from the book, so memory use does
+    not depend on the size of the book.
+
+    Args:
+        args (List[str]): The arguments for the command.
+        book (AddressBook): The address book instance.
+
+    Returns:
+        str: The response message.
+    """
+    if len(args) != 2:
+        raise ValueError("Give me the format and the file, please.")
+
+    format, filename = args
+    format = format.lower()
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown format {format}. Use {', '.join(EXPORT_FORMATS)}.")
+
+    try:
+        count = write_contacts(book.values(), filename, format)
+    except OSError as e:
+        return f"{Fore.YELLOW}Could not write {filename}: {e.strerror}.{Style.RESET_ALL}"
+    return f"{Fore.GREEN}Exported {count} contacts to {filename}.{Style.RESET_ALL}"
+
+
+@input_error
+def show_stats(args: List[str]) -> str:
+    """
+    Shows the measurements of every command, or turns measuring on or off.
+
+    Args:
+        args (List[str]): Nothing to show the measurements, "on" (with "memory" to trace
+            allocations too), "off", "reset", or "dump" and a file to write them to as JSON.
+
+    Returns:
+        str: The response message.
+    """
+    option = args[0].lower() if args else ""
+    if option == "on":
+        if len(args) > 2 or (len(args) == 2 and args[1].lower() != "memory"):
+            raise ValueError("Use stats on, or stats on memory to trace allocations too.")
+        instrumentation.enable(trace_memory=len(args) == 2)
+        return f"{Fore.GREEN}Measuring every command from now on.{Style.RESET_ALL}"
+    if option == "off":
+        instrumentation.disable()
+        return f"{Fore.GREEN}Stopped measuring commands.{Style.RESET_ALL}"
+
+    recorder = instrumentation.recorder
+    if recorder is None:
+        return f"{Fore.YELLOW}Commands are not measured. Enter 'stats on' to start.{Style.RESET_ALL}"
+    if option == "reset":
+        recorder.reset()
+        return f"{Fore.GREEN}Measurements cleared.{Style.RESET_ALL}"
+    if option == "dump":
+        if len(args) != 2:
+            raise ValueError("Give me the file to write the measurements to, please.")
+        try:
+            recorder.dump(args[1])
+        except OSError as e:
+            return f"{Fore.YELLOW}Could not write {args[1]}: {e.strerror}.{Style.RESET_ALL}"
+        return f"{Fore.GREEN}Measurements written to {args[1]}.{Style.RESET_ALL}"
+    if args:
+        raise ValueError("Use stats, stats on [memory], stats off, stats reset or stats dump <file>.")
+
+    commands = recorder.to_dict()["commands"]
+    if not commands:
+        return f"{Fore.YELLOW}No commands measured yet.{Style.RESET_ALL}"
+    table = new_table()
+    columns = ["Command", "Calls", "Errors", "Total ms", "Mean ms", "p50 ms", "p95 ms", "p99 ms"]
+    if recorder.trace_memory:
+        columns += ["Allocated KiB", "Peak KiB"]
+    table.field_names = columns
+    for command, stats in commands.items():
+        row = [command, stats["calls"], sum(stats["errors"].values()), f"{stats['total_ms']:.1f}",
+               f"{stats['mean_ms']:.2f}", f"{stats['p50_ms']:.2f}", f"{stats['p95_ms']:.2f}", f"{stats['p99_ms']:.2f}"]
+        if recorder.trace_memory:
+            row += [f"{stats['allocated_bytes'] / 1024:.1f}", f"{stats['peak_bytes'] / 1024:.1f}"]
+        table.add_row(row)
+    return f"{Fore.GREEN}{table}{Style.RESET_ALL}"
+
+
+@input_error
+def reshard(args: List[str], book: AddressBook) -> str:
+    """
+    Spreads the contacts of a sharded address book over a new number of shard files,
+    while the book stays open.
+
+    Args:
+        args (List[str]): The arguments for the command.
+        book (AddressBook): The address book instance.
+
+    Returns:
+        str: The response message.
+    """
+    from sharded_storage import ShardedStorage
+
+    if len(args) != 1 or not args[0].isdigit() or int(args[0]) < 1:
+        raise ValueError("Give me the number of shards, please.")
+    if not isinstance(book.storage, ShardedStorage):
+        return f"{Fore.YELLOW}The address book is not sharded.{Style.RESET_ALL}"
+    shards = int(args[0])
+    try:
+        book.storage.reshard(shards)
+    except OSError as e:
+        return f"{Fore.YELLOW}Could not reshard the address book: {e.strerror}.{Style.RESET_ALL}"
+    return f"{Fore.GREEN}The address book now has {shards} shards.{Style.RESET_ALL}"
+
+
+@input_error
+def dedupe(args: List[str], book: AddressBook) -> str:
+    """
+    Shows the contacts that are likely the same person, with which one to keep and which
+    one to merge into it, one page at a time.
+
+    Args:
+        args (List[str]): The optional --page and --size arguments.
+        book (AddressBook): The address book instance.
+
+    Returns:
+        str: The response message.
+    """
+    from dedupe import find_duplicates
+
+    args, page, size = parse_page_args(args)
+    if args:
+        raise ValueError("dedupe takes no arguments but --page and --size.")
+    proposals = find_duplicates(book)
+    rows = ((keep, merge, f"{score:.2f}", reasons) for score, keep, merge, reasons in proposals)
+    table = render(["Keep", "Merge", "Score", "Why"], rows, page, size)
+    if not table:
+        return f"{Fore.YELLOW}No duplicate contacts found.{Style.RESET_ALL}"
+    return f"{Fore.GREEN}{len(proposals)} likely duplicates:\n{table}{Style.RESET_ALL}"
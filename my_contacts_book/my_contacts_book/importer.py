@@ -0,0 +1,261 @@
+import csv
+import json
+import os
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+from record import Record
+
+CSV_FIELDS = ["name", "phones", "birthday", "email", "address", "notes"]
+VCARD_EXTENSIONS = (".vcf", ".vcard")
+JSONL_EXTENSIONS = (".jsonl", ".ndjson")
+NOTE_PROPERTY = "X-CONTACTS-NOTE"
+CHUNK_SIZE = 1000
+
+
+def read_csv(filename: str) -> Iterator[Tuple[int, dict]]:
+    """
+    Reads contacts from a CSV file row by row.
+
+    The file has a header with the columns name, phones (separated by ";"), birthday
+    (DD.MM.YYYY), email, address and notes (a JSON list of [title, text, tag]).
+
+    Args:
+        filename (str): The CSV filename.
+
+    Returns:
+        Iterator[Tuple[int, dict]]: The line number and contact data of every row.
+    """
+    with open(filename, "r", encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            yield reader.line_num, {
+                "name": row.get("name") or "",
+                "phones": [phone for phone in (row.get("phones") or "").split(";") if phone],
+                "birthday": row.get("birthday") or None,
+                "email": row.get("email") or None,
+                "address": row.get("address") or None,
+                "notes": row.get("notes") or "[]",
+            }
+
+
+def read_jsonl(filename: str) -> Iterator[Tuple[int, str]]:
+    """
+    Reads contacts from a JSON lines file line by line.
+
+    Every non-empty line is a JSON object with the keys of Record.to_dict. The lines are
+    decoded by the validating workers.
+
+    Args:
+        filename (str): The JSON lines filename.
+
+    Returns:
+        Iterator[Tuple[int, str]]: The line number and text of every contact line.
+    """
+    with open(filename, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if line.strip():
+                yield number, line
+
+
+def unescape_vcard(value: str) -> str:
+    """
+    Reverts the vCard escaping of a text value.
+
+    Args:
+        value (str): The escaped value.
+
+    Returns:
+        str: The text.
+    """
+    result, escaped = [], False
+    for char in value:
+        if escaped:
+            result.append("\n" if char in "nN" else char)
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        else:
+            result.append(char)
+    return "".join(result)
+
+
+def split_vcard(value: str, separator: str = ";") -> List[str]:
+    """
+    Splits a structured vCard value on unescaped separators and unescapes the parts.
+
+    Args:
+        value (str): The structured value.
+        separator (str): The separator character.
+
+    Returns:
+        List[str]: The parts.
+    """
+    parts, current, escaped = [], [], False
+    for char in value:
+        if escaped:
+            current.append("\\" + char)
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == separator:
+            parts.append(unescape_vcard("".join(current)))
+            current = []
+        else:
+            current.append(char)
+    parts.append(unescape_vcard("".join(current)))
+    return parts
+
+
+def read_vcard(filename: str) -> Iterator[Tuple[int, dict]]:
+    """
+    Reads contacts from a vCard file card by card.
+
+    FN, TEL, BDAY, EMAIL and ADR are read into the name, phones, birthday, email and
+    address; notes are read from X-CONTACTS-NOTE properties holding title;text;tag.
+
+    Args:
+        filename (str): The vCard filename.
+
+    Returns:
+        Iterator[Tuple[int, dict]]: The line number of BEGIN:VCARD and the contact data of every card.
+    """
+    with open(filename, "r", encoding="utf-8") as f:
+        card, start, previous = None, 0, None
+        for number, line in enumerate(f, 1):
+            line = line.rstrip("\r\n")
+            if line[:1] in (" ", "\t") and previous is not None:
+                previous += line[1:]
+                continue
+            if previous is not None and card is not None:
+                _add_vcard_property(card, previous)
+            previous = line
+            if line.upper() == "BEGIN:VCARD":
+                card, start, previous = {"name": "", "phones": [], "birthday": None, "email": None,
+                                         "address": None, "notes": []}, number, None
+            elif line.upper() == "END:VCARD" and card is not None:
+                yield start, card
+                card, previous = None, None
+
+
+def _add_vcard_property(card: dict, line: str) -> None:
+    """
+    Reads one unfolded vCard content line into the contact data.
+
+    Args:
+        card (dict): The contact data of the current card.
+        line (str): The content line.
+    """
+    if ":" not in line:
+        return
+    key, value = line.split(":", 1)
+    name = key.split(";", 1)[0].split(".")[-1].upper()
+    if name == "FN":
+        card["name"] = unescape_vcard(value)
+    elif name == "TEL":
+        card["phones"].append(value.strip())
+    elif name == "BDAY":
+        digits = value.replace("-", "")
+        card["birthday"] = f"{digits[6:8]}.{digits[4:6]}.{digits[:4]}" if digits.isdigit() else value
+    elif name == "EMAIL":
+        card["email"] = unescape_vcard(value)
+    elif name == "ADR":
+        card["address"] = ", ".join(part for part in split_vcard(value) if part)
+    elif name == NOTE_PROPERTY:
+        card["notes"].append((split_vcard(value) + ["", ""])[:3])
+
+
+def read_contacts(filename: str) -> Iterator[Tuple[int, dict]]:
+    """
+    Reads contacts from a CSV, vCard or JSON lines file, chosen by the file extension.
+
+    Args:
+        filename (str): The filename.
+
+    Returns:
+        Iterator[Tuple[int, dict]]: The line number and contact data of every contact.
+    """
+    if filename.lower().endswith(VCARD_EXTENSIONS):
+        return read_vcard(filename)
+    if filename.lower().endswith(JSONL_EXTENSIONS):
+        return read_jsonl(filename)
+    return read_csv(filename)
+
+
+def validate_chunk(rows: List[Tuple[int, Union[dict, str]]]) -> List[Tuple[int, Optional[Record], Optional[str]]]:
+    """
+    Validates a chunk of contact rows by building records from them.
+
+    Runs in a worker process; records are built with the same validation as the add
+    commands (Phone.validate_phone, Birthday.validate_birthday, Email.validate_email).
+
+    Args:
+        rows (List[Tuple[int, Union[dict, str]]]): The line numbers and contact data, or
+            JSON lines, to validate.
+
+    Returns:
+        List[Tuple[int, Optional[Record], Optional[str]]]: The line number, the record or
+            None, and the error message or None, for every row.
+    """
+    results = []
+    for line, data in rows:
+        try:
+            if isinstance(data, str):
+                data = json.loads(data)
+                if not isinstance(data, dict):
+                    raise ValueError("Expected a JSON object.")
+                data.setdefault("phones", [])
+            if not data.get("name"):
+                raise ValueError("Name is missing.")
+            if isinstance(data.get("notes"), str):
+                data["notes"] = json.loads(data["notes"])
+            data["name"] = data["name"].capitalize()
+            results.append((line, Record.from_dict(data), None))
+        except (ValueError, TypeError, AttributeError) as e:
+            results.append((line, None, str(e)))
+    return results
+
+
+def chunked(rows: Iterable, size: int) -> Iterator[list]:
+    """
+    Splits rows into lists of at most size rows.
+
+    Args:
+        rows (Iterable): The rows.
+        size (int): The chunk size.
+
+    Returns:
+        Iterator[list]: The chunks.
+    """
+    iterator = iter(rows)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def validate_contacts(filename: str, workers: Optional[int] = None,
+                      chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[int, Optional[Record], Optional[str]]]:
+    """
+    Streams the contacts of a file through a pool of validating worker processes.
+
+    At most two chunks per worker are in flight at a time, so memory stays bounded
+    whatever the file size. Results come in file order.
+
+    Args:
+        filename (str): The CSV, vCard or JSON lines filename.
+        workers (Optional[int]): The number of worker processes, the CPU count by default.
+        chunk_size (int): The number of rows per chunk.
+
+    Returns:
+        Iterator[Tuple[int, Optional[Record], Optional[str]]]: The line number, the record
+            or None, and the error message or None, for every contact.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = workers or os.cpu_count() or 1
+    chunks = chunked(read_contacts(filename), chunk_size)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = [pool.submit(validate_chunk, chunk) for chunk in islice(chunks, workers * 2)]
+        while pending:
+            results = pending.pop(0).result()
+            for chunk in islice(chunks, 1):
+                pending.append(pool.submit(validate_chunk, chunk))
+            yield from results
@@ -0,0 +1,285 @@
+import math
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional
+
+BUCKETS_PER_DOUBLING = 8
+PERCENTILES = (50, 95, 99)
+
+recorder: Optional["Recorder"] = None
+_current: ContextVar[Optional["CommandStats"]] = ContextVar("instrumentation_command", default=None)
+
+
+def bucket_of(seconds: float) -> int:
+    """
+    Finds the histogram bucket of a latency.
+
+    Buckets grow geometrically, eight per doubling, so every bucket is about 9% wider than
+    the one before and a histogram stays small whatever the spread of the latencies.
+
+    Args:
+        seconds (float): The latency.
+
+    Returns:
+        int: The bucket number, 0 for a nanosecond or less.
+    """
+    return max(0, math.ceil(math.log2(max(seconds * 1e9, 1)) * BUCKETS_PER_DOUBLING))
+
+
+def bucket_limit(bucket: int) -> float:
+    """
+    Gets the upper limit of a histogram bucket.
+
+    Args:
+        bucket (int): The bucket number.
+
+    Returns:
+        float: The longest latency in the bucket, in seconds.
+    """
+    return 2 ** (bucket / BUCKETS_PER_DOUBLING) / 1e9
+
+
+class CommandStats:
+    """
+    Class to represent the measurements of one command.
+
+    Attributes:
+        calls (int): The number of times the command was run.
+        errors (Dict[str, int]): The number of input errors of every type.
+        total (float): The total wall time in seconds.
+        histogram (Dict[int, int]): The number of calls in every latency bucket.
+        allocated (int): The net bytes allocated by all calls, if memory is traced.
+        peak (int): The most memory a single call allocated at once, if memory is traced.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initializes empty measurements.
+        """
+        self.calls = 0
+        self.errors: Dict[str, int] = {}
+        self.total = 0.0
+        self.histogram: Dict[int, int] = {}
+        self.allocated = 0
+        self.peak = 0
+
+    def add(self, seconds: float, allocated: int = 0, peak: int = 0) -> None:
+        """
+        Adds the measurements of a call.
+
+        Args:
+            seconds (float): The wall time of the call.
+            allocated (int): The net bytes the call allocated.
+            peak (int): The most bytes the call had allocated at once.
+        """
+        self.calls += 1
+        self.total += seconds
+        bucket = bucket_of(seconds)
+        self.histogram[bucket] = self.histogram.get(bucket, 0) + 1
+        self.allocated += allocated
+        self.peak = max(self.peak, peak)
+
+    def percentile(self, percent: float) -> float:
+        """
+        Estimates a latency percentile from the histogram.
+
+        Args:
+            percent (float): The percentile, between 0 and 100.
+
+        Returns:
+            float: The upper limit of the bucket holding the percentile, in seconds, or 0
+                if there were no calls.
+        """
+        rank = math.ceil(self.calls * percent / 100)
+        seen = 0
+        for bucket in sorted(self.histogram):
+            seen += self.histogram[bucket]
+            if seen >= rank:
+                return bucket_limit(bucket)
+        return 0.0
+
+    def to_dict(self) -> dict:
+        """
+        Returns the measurements as a dictionary of plain values.
+
+        Returns:
+            dict: The measurements, with times in milliseconds.
+        """
+        data = {
+            "calls": self.calls,
+            "errors": dict(self.errors),
+            "total_ms": self.total * 1000,
+            "mean_ms": self.total * 1000 / self.calls if self.calls else 0.0,
+        }
+        for percent in PERCENTILES:
+            data[f"p{percent}_ms"] = self.percentile(percent) * 1000
+        data["histogram_us"] = {f"{bucket_limit(bucket) * 1e6:.1f}": count
+                                for bucket, count in sorted(self.histogram.items())}
+        data["allocated_bytes"] = self.allocated
+        data["peak_bytes"] = self.peak
+        return data
+
+
+class Recorder:
+    """
+    Class to represent the collection of per-command measurements.
+
+    Measurements of commands run side by side in threads are safe to record. Traced
+    allocations are counted for the whole process, so they are only exact for commands
+    run one at a time.
+
+    Attributes:
+        commands (Dict[str, CommandStats]): The measurements of every command.
+        trace_memory (bool): Whether allocations are traced with tracemalloc.
+    """
+
+    def __init__(self, trace_memory: bool = False) -> None:
+        """
+        Initializes an empty recorder.
+
+        Args:
+            trace_memory (bool): Whether to trace allocations, which slows every command down.
+        """
+        self.commands: Dict[str, CommandStats] = {}
+        self.trace_memory = trace_memory
+        self._lock = threading.Lock()
+        self._started_tracing = False
+        if trace_memory:
+            import tracemalloc
+
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+
+    def measure(self, command: str, func: Callable[..., str], *args) -> str:
+        """
+        Runs a command and records its measurements.
+
+        Args:
+            command (str): The name to record the measurements under.
+            func (Callable[..., str]): The function running the command.
+            *args: The arguments of the function.
+
+        Returns:
+            str: The response of the command.
+        """
+        with self._lock:
+            stats = self.commands.get(command)
+            if stats is None:
+                stats = self.commands[command] = CommandStats()
+        token = _current.set(stats)
+        allocated = peak = 0
+        try:
+            if self.trace_memory:
+                import tracemalloc
+
+                before = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                start = time.perf_counter()
+                response = func(*args)
+                elapsed = time.perf_counter() - start
+                current, highest = tracemalloc.get_traced_memory()
+                allocated, peak = current - before, highest - before
+            else:
+                start = time.perf_counter()
+                response = func(*args)
+                elapsed = time.perf_counter() - start
+        finally:
+            _current.reset(token)
+        with self._lock:
+            stats.add(elapsed, allocated, peak)
+        return response
+
+    def error(self, error: Exception) -> None:
+        """
+        Counts an input error of the command being measured.
+
+        Args:
+            error (Exception): The error.
+        """
+        stats = _current.get()
+        if stats is not None:
+            name = type(error).__name__
+            with self._lock:
+                stats.errors[name] = stats.errors.get(name, 0) + 1
+
+    def reset(self) -> None:
+        """
+        Forgets every measurement.
+        """
+        with self._lock:
+            self.commands = {}
+
+    def to_dict(self) -> dict:
+        """
+        Returns the measurements of every command as plain values.
+
+        Returns:
+            dict: The measurements, by command in alphabetical order.
+        """
+        with self._lock:
+            return {
+                "trace_memory": self.trace_memory,
+                "commands": {command: stats.to_dict() for command, stats in sorted(self.commands.items())},
+            }
+
+    def dump(self, filename: str) -> None:
+        """
+        Writes the measurements to a JSON file.
+
+        Args:
+            filename (str): The file to write.
+        """
+        import json
+
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+            f.write("\n")
+
+    def close(self) -> None:
+        """
+        Stops tracing allocations if this recorder started it.
+        """
+        if self._started_tracing:
+            import tracemalloc
+
+            tracemalloc.stop()
+            self._started_tracing = False
+
+
+def enable(trace_memory: bool = False) -> Recorder:
+    """
+    Starts measuring commands, replacing any earlier recorder.
+
+    Args:
+        trace_memory (bool): Whether to trace allocations too.
+
+    Returns:
+        Recorder: The new recorder.
+    """
+    global recorder
+    disable()
+    recorder = Recorder(trace_memory)
+    return recorder
+
+
+def disable() -> None:
+    """
+    Stops measuring commands. Commands then run without any measuring code around them.
+    """
+    global recorder
+    if recorder is not None:
+        recorder.close()
+        recorder = None
+
+
+def note_error(error: Exception) -> None:
+    """
+    Counts an input error of the command being measured, if commands are measured.
+
+    Args:
+        error (Exception): The error.
+    """
+    if recorder is not None:
+        recorder.error(error)
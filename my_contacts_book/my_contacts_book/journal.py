@@ -0,0 +1,228 @@
+import json
+import os
+import pickle
+import threading
+from typing import Optional
+from address_book import AddressBook
+from columnar_storage import ColumnarStorage, is_columnar, write_columnar
+from compressed_snapshot import detect_compression, read_compressed, write_compressed
+from sharded_storage import ShardedStorage
+
+JOURNAL_SUFFIX = ".journal"
+ROTATED_SUFFIX = ".journal.old"
+COMPACT_THRESHOLD = 1024 * 1024
+
+
+def replay(book: AddressBook, path: str) -> None:
+    """
+    Applies the mutations stored in a journal file to the address book.
+
+    Entries already contained in the book (by sequence number) are skipped, and so is
+    a truncated last line left behind by a crash.
+
+    Args:
+        book (AddressBook): The address book to apply the mutations to.
+        path (str): The journal file to replay.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    seq, op, name, *args = json.loads(line)
+                except ValueError:
+                    break
+                if seq <= book.journal_seq:
+                    continue
+                try:
+                    book.apply(op, name, *args)
+                except (KeyError, ValueError):
+                    pass
+                book.journal_seq = seq
+    except FileNotFoundError:
+        pass
+
+
+def write_snapshot(book: AddressBook, filename: str) -> None:
+    """
+    Writes the address book into a temporary file and atomically moves it into place.
+
+    Books on top of a columnar snapshot are written as a columnar snapshot again, sharded
+    books only write their dirty shards into their own directory, books with a
+    compression are pickled through it, and all others are pickled.
+
+    Args:
+        book (AddressBook): The address book to save.
+        filename (str): The snapshot filename.
+    """
+    if isinstance(book.storage, ColumnarStorage):
+        write_columnar(book.values(), filename, book.journal_seq)
+        return
+    if isinstance(book.storage, ShardedStorage):
+        book.storage.sync()
+        return
+    if book.compression is not None:
+        write_compressed(book, filename, book.compression)
+        return
+    tmp_filename = filename + ".tmp"
+    with open(tmp_filename, "wb") as f:
+        pickle.dump(book, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_filename, filename)
+
+
+def read_snapshot(filename: str) -> AddressBook:
+    """
+    Loads the address book from a snapshot file.
+
+    Columnar snapshots are detected by their magic bytes and only memory-mapped,
+    compressed snapshots by the magic bytes of their compression and decompressed while
+    they are unpickled, and all other files are unpickled.
+
+    Args:
+        filename (str): The snapshot filename.
+
+    Returns:
+        AddressBook: The loaded address book, or an empty one if the file does not exist.
+    """
+    if is_columnar(filename):
+        storage = ColumnarStorage(filename)
+        book = AddressBook(storage)
+        book.journal_seq = storage.journal_seq
+        return book
+    compression = detect_compression(filename)
+    if compression is not None:
+        return read_compressed(filename, compression)
+    try:
+        with open(filename, "rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return AddressBook()
+
+
+class Journal:
+    """
+    Class to represent an append-only write-ahead journal of address book mutations.
+
+    Every mutation is written as one JSON line ``[seq, op, name, *args]``, so saving
+    costs O(changes) instead of O(book). Once the journal grows past the threshold it is
+    rotated and a background thread folds it into a new snapshot.
+
+    Attributes:
+        snapshot (str): The snapshot filename the journal belongs to.
+        path (str): The journal filename.
+        threshold (int): The journal size in bytes that triggers a compaction.
+        seq (int): The sequence number of the last appended entry.
+    """
+
+    def __init__(self, snapshot: str, seq: int = 0, threshold: int = COMPACT_THRESHOLD) -> None:
+        """
+        Opens the journal of the snapshot for appending.
+
+        Args:
+            snapshot (str): The snapshot filename.
+            seq (int): The sequence number of the last entry already applied.
+            threshold (int): The journal size in bytes that triggers a compaction.
+        """
+        self.snapshot = snapshot
+        self.path = snapshot + JOURNAL_SUFFIX
+        self.threshold = threshold
+        self.seq = seq
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._size = self._file.tell()
+        self._compactor: Optional[threading.Thread] = None
+        if os.path.exists(snapshot + ROTATED_SUFFIX):
+            self._start_compaction()
+
+    def append(self, op: str, name: str, *args) -> int:
+        """
+        Appends a mutation to the journal.
+
+        Args:
+            op (str): The name of the mutation.
+            name (str): The name of the affected record.
+            *args: The arguments of the mutation.
+
+        Returns:
+            int: The sequence number of the new entry.
+        """
+        self.seq += 1
+        entry = json.dumps([self.seq, op, name, *args], ensure_ascii=False, separators=(",", ":"))
+        self._file.write(entry + "\n")
+        self._size += len(entry) + 1 if entry.isascii() else len(entry.encode("utf-8")) + 1
+        self._file.flush()
+        if self._size >= self.threshold:
+            self.compact()
+        return self.seq
+
+    def compact(self) -> None:
+        """
+        Rotates the journal and folds it into a new snapshot in a background thread.
+
+        Does nothing while a previous compaction is still running.
+        """
+        if self.rotate():
+            self._start_compaction()
+
+    def rotate(self) -> bool:
+        """
+        Moves the journal aside and starts a new one. The rotated journal is replayed on
+        start until a new snapshot holding its entries replaces it.
+
+        Returns:
+            bool: False if a rotated journal is still waiting for its snapshot, in which
+                case nothing is done.
+        """
+        if self._compactor is not None and self._compactor.is_alive():
+            return False
+        if os.path.exists(self.snapshot + ROTATED_SUFFIX):
+            return False
+        self._file.close()
+        os.replace(self.path, self.snapshot + ROTATED_SUFFIX)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._size = 0
+        return True
+
+    def _start_compaction(self) -> None:
+        """
+        Starts the background thread folding the rotated journal into the snapshot.
+        """
+        self._compactor = threading.Thread(target=self._fold, name="journal-compactor")
+        self._compactor.start()
+
+    def _fold(self) -> None:
+        """
+        Replays the rotated journal on top of the snapshot and writes the result as the new snapshot.
+
+        Works on its own copy of the book loaded from disk, so the live book is never touched.
+        """
+        rotated = self.snapshot + ROTATED_SUFFIX
+        book = read_snapshot(self.snapshot)
+        replay(book, rotated)
+        write_snapshot(book, self.snapshot)
+        if book.storage is not None:
+            book.storage.close()
+        os.remove(rotated)
+
+    def truncate(self) -> None:
+        """
+        Empties the journal once a snapshot holds all its entries.
+        """
+        self._file.truncate(0)
+        self._size = 0
+
+    def sync(self) -> None:
+        """
+        Flushes the journal to disk and waits for a running compaction to finish.
+        """
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        if self._compactor is not None:
+            self._compactor.join()
+
+    def close(self) -> None:
+        """
+        Syncs and closes the journal.
+        """
+        self.sync()
+        self._file.close()
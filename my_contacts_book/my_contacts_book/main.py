@@ -1,45 +1,155 @@
-import pickle
-from transliteration import suggest_command, transliterate
+import re
+import sys
+import time
+from contextlib import nullcontext
+from typing import IO, Iterable, Optional
+import instrumentation
+from compressed_snapshot import COMPRESSIONS
+from journal import Journal, JOURNAL_SUFFIX, ROTATED_SUFFIX, read_snapshot, replay, write_snapshot
+from sharded_storage import is_sharded
+from transliteration import CommandSuggester
 
 from address_book import AddressBook
-from note import Note
-from handlers import (
-    add_contact, change_contact, change_name, delete_contact, find_note_by_tag, find_note_by_title, show_notes, show_phone, show_all,
-    add_birthday, show_birthday, show_email, show_address, birthdays, add_email, delete_email, add_address,
-    delete_address, show_contact, add_note, change_note, delete_note, show_all_notes, show_all_notes_sorted_by_tag)
 
-from colorama import init, Fore, Style
+COMMANDS = ("hello", "add", "change-name", "change", "phone", "who", "contact", "find", "starts", "delete",
+            "add-birthday", "change-birthday", "show-birthday", "birthdays", "born-in", "ages", "birthday-weeks",
+            "add-email", "change-email", "show-email", "delete-email",
+            "show-address", "add-address", "change-address", "delete-address",
+            "add-note", "change-note", "show-notes", "delete-note",
+            "show-all-notes", "show-all-notes-sorted-by-tag", "tags", "find-note-by-title", "find-note-by-tag",
+            "search-notes", "all", "more", "import", "export", "dedupe", "stats", "reshard", "help", "close", "exit", "bye")
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+EXIT_COMMANDS = ("close", "exit", "bye")
+ANSI_PATTERN = re.compile(r"\x1b\[[0-9;]*m")
+AUTOSAVE_INTERVAL = 60
 
-init(autoreset=True)
 
-
-def save_data(book: AddressBook, filename: str = "addressbook.pkl") -> None:
+def save_data(book: AddressBook, filename: str = "addressbook.pkl", compression: Optional[str] = None) -> None:
     """
     Saves the address book to a file.
 
+    If the book keeps its records in a storage backend or journals its changes into this
+    file, only pending changes are flushed, as every change is already stored; a sharded
+    book writes its dirty shards. Otherwise the whole book is written as a new snapshot.
+    A book kept in memory is written as a whole in the given compression, if it is not
+    written in it already, and keeps it for later snapshots.
+
     Args:
         book (AddressBook): The address book instance to save.
         filename (str): The filename to save the address book to.
+        compression (Optional[str]): "lzma", "zlib", "bz2", or "none" for plain pickles.
+            The book keeps its compression if it is not given.
     """
-    with open(filename, "wb") as f:
-        pickle.dump(book, f)
+    if compression is not None and book.storage is None:
+        compression = None if compression == "none" else compression
+        if compression != book.compression:
+            book.compression = compression
+            if book.journal is not None and book.journal.snapshot == filename:
+                book.journal.sync()
+                write_snapshot(book, filename)
+                book.journal.truncate()
+                return
+    if book.journal is not None and book.journal.snapshot == filename:
+        if book.storage is not None:
+            book.storage.sync()
+        book.journal.sync()
+    elif book.storage is not None:
+        book.storage.sync()
+    else:
+        write_snapshot(book, filename)
 
 
 def load_data(filename: str = "addressbook.pkl") -> AddressBook:
     """
     Loads the address book from a file.
 
+    The last snapshot (pickled, compressed, or columnar and memory-mapped) is loaded and
+    the journaled changes made since are replayed on top of it. A journal is then attached to the book so that further changes are persisted
+    as they happen. Files with an SQLite extension (.db, .sqlite, .sqlite3) are opened
+    as an SQLite storage instead, which reads records only when they are accessed, and
+    directories written by sharded_storage as a sharded storage, which reads only the
+    shards that are accessed and replays the journal on top of them.
+
     Args:
         filename (str): The filename to load the address book from.
 
     Returns:
         AddressBook: The loaded address book instance.
     """
-    try:
-        with open(filename, "rb") as f:
-            return pickle.load(f)
-    except FileNotFoundError:
-        return AddressBook()
+    if filename.endswith(SQLITE_EXTENSIONS):
+        from sqlite_storage import SQLiteStorage
+        return AddressBook(SQLiteStorage(filename))
+    if is_sharded(filename):
+        from sharded_storage import ShardedStorage
+        storage = ShardedStorage(filename)
+        book = AddressBook(storage)
+        book.journal_seq = storage.journal_seq
+        replay(book, filename + JOURNAL_SUFFIX)
+        book.journal = Journal(filename, book.journal_seq, threshold=float("inf"))
+        return book
+    book = read_snapshot(filename)
+    replay(book, filename + ROTATED_SUFFIX)
+    replay(book, filename + JOURNAL_SUFFIX)
+    book.journal = Journal(filename, book.journal_seq)
+    return book
+
+
+def autosave_interval(options: list[str]) -> Optional[int]:
+    """
+    Reads the number of seconds between two autosaves from the --autosave option.
+
+    Args:
+        options (list[str]): The command line options.
+
+    Returns:
+        Optional[int]: The interval, AUTOSAVE_INTERVAL if the option is not given and 0 to
+            turn autosaving off, or None if the value is not a number.
+    """
+    if "--autosave" not in options:
+        return AUTOSAVE_INTERVAL
+    position = options.index("--autosave")
+    value = options[position + 1] if position + 1 < len(options) else ""
+    return int(value) if value.isdigit() else None
+
+
+def compression_option(options: list[str]) -> Optional[str]:
+    """
+    Reads the compression to save the book with from the --compress option.
+
+    Args:
+        options (list[str]): The command line options.
+
+    Returns:
+        Optional[str]: "lzma", "zlib", "bz2" or "none", None if the option is not given,
+            or "" if the value is not one of those.
+    """
+    if "--compress" not in options:
+        return None
+    position = options.index("--compress")
+    value = options[position + 1] if position + 1 < len(options) else ""
+    return value if value in COMPRESSIONS + ("none",) else ""
+
+
+def start_autosave(book: AddressBook, interval: int):
+    """
+    Starts saving the book into the snapshot it was loaded from in the background, every
+    interval seconds while it changes.
+
+    Args:
+        book (AddressBook): The address book instance, as returned by load_data.
+        interval (int): The number of seconds between two autosaves, 0 for none.
+
+    Returns:
+        Optional[Autosaver]: The running autosaver, or None if autosaving is off or the
+            book keeps its records in a storage backend storing every change as it is made.
+    """
+    if not interval or book.journal is None or (book.storage is not None and book.storage.autocommit):
+        return None
+    from autosave import Autosaver
+
+    autosaver = Autosaver(book, book.journal.snapshot, interval)
+    autosaver.start()
+    return autosaver
 
 
 def print_message(message: str, is_error: bool = False) -> None:
@@ -50,81 +160,139 @@ def print_message(message: str, is_error: bool = False) -> None:
         message (str): The message to print.
         is_error (bool): Flag indicating if the message is an error.
     """
+    from colorama import Fore, Style
+
     if is_error:
         print(Fore.YELLOW + message + Style.RESET_ALL)
     else:
         print(Fore.GREEN + message + Style.RESET_ALL)
 
 
-def handle_action(action: str, args: list[str], book: AddressBook) -> str:
+def handle_action(action: str, args: list[str], book: AddressBook, interactive: bool = True) -> str:
+    """
+    Handles the action, measuring it if instrumentation is enabled.
+
+    Unknown commands are measured together, under "unknown"; the stats command itself
+    is not measured.
+
+    Args:
+        action (str): The command to execute.
+        args (list[str]): The arguments for the action.
+        book (AddressBook): The address book instance.
+        interactive (bool): Whether handlers may ask the user for missing input.
+
+    Returns:
+        str: The response string after executing the command.
+    """
+    recorder = instrumentation.recorder
+    if recorder is None or action == "stats":
+        return dispatch(action, args, book, interactive)
+    return recorder.measure(action if action in COMMANDS else "unknown", dispatch, action, args, book, interactive)
+
+
+def dispatch(action: str, args: list[str], book: AddressBook, interactive: bool = True) -> str:
     """
     Handles the action by calling the appropriate function using match...case.
 
+    The handlers module, and prettytable with it, is only imported when the first
+    command is handled, so the prompt appears without waiting for it.
+
     Args:
         action (str): The command to execute.
         args (list[str]): The arguments for the action.
         book (AddressBook): The address book instance.
+        interactive (bool): Whether handlers may ask the user for missing input.
         
     Returns:
         str: The response string after executing the command.
     """
+    import handlers
+
     match action:
         case "hello":
             return "How can I help you?"
         case "add":
-            return add_contact(args, book)
+            return handlers.add_contact(args, book)
         case "change":
-            return change_contact(args, book)
+            return handlers.change_contact(args, book)
         case "change-name":
-            return change_name(args, book)
+            return handlers.change_name(args, book)
         case "phone":
-            return show_phone(args, book)
+            return handlers.show_phone(args, book)
+        case "who":
+            return handlers.show_phone_owner(args, book)
         case "contact":
-            return show_contact(args, book)
+            return handlers.show_contact(args, book)
+        case "find":
+            return handlers.find_contacts(args, book)
+        case "starts":
+            return handlers.show_starting(args, book)
         case "all":
-            return show_all(book)
+            return handlers.show_all(args, book)
+        case "more":
+            return handlers.show_more()
         case "add-birthday":
-            return add_birthday(args, book, action)
+            return handlers.add_birthday(args, book, action)
         case "show-birthday":
-            return show_birthday(args, book)
+            return handlers.show_birthday(args, book)
         case "show-address":
-            return show_address(args, book)
+            return handlers.show_address(args, book)
         case "birthdays":
-            return birthdays(args, book)
+            return handlers.birthdays(args, book)
+        case "born-in":
+            return handlers.born_in(args, book)
+        case "ages":
+            return handlers.aged(args, book)
+        case "birthday-weeks":
+            return handlers.birthday_weeks(args, book)
         case "change-birthday":
-            return add_birthday(args, book, action)
+            return handlers.add_birthday(args, book, action)
         case "add-email":
-            return add_email(args, book, action)
+            return handlers.add_email(args, book, action)
         case "show-email":
-            return show_email(args, book)
+            return handlers.show_email(args, book)
         case "delete-email":
-            return delete_email(args, book)
+            return handlers.delete_email(args, book)
         case "change-email":
-            return add_email(args, book, action)
+            return handlers.add_email(args, book, action)
         case "add-address":
-            return add_address(args, book, action)
+            return handlers.add_address(args, book, action)
         case "delete-address":
-            return delete_address(args, book)
+            return handlers.delete_address(args, book)
         case "change-address":
-            return add_address(args, book, action)
+            return handlers.add_address(args, book, action)
         case "delete":
-            return delete_contact(args, book)
+            return handlers.delete_contact(args, book)
         case "add-note":
-            return add_note(args, book)
+            return handlers.add_note(args, book, interactive)
         case "change-note":
-            return change_note(args, book)
+            return handlers.change_note(args, book, interactive)
         case "delete-note":
-            return delete_note(args, book)
+            return handlers.delete_note(args, book)
         case "show-all-notes":
-            return show_all_notes(book)
+            return handlers.show_all_notes(args, book)
         case "show-all-notes-sorted-by-tag":
-            return show_all_notes_sorted_by_tag(book)
+            return handlers.show_all_notes_sorted_by_tag(args, book)
+        case "tags":
+            return handlers.show_tags(book)
         case "find-note-by-tag":
-            return find_note_by_tag(args, book)
+            return handlers.find_note_by_tag(args, book)
         case "find-note-by-title":
-            return find_note_by_title(args, book)
+            return handlers.find_note_by_title(args, book)
+        case "search-notes":
+            return handlers.search_notes(args, book)
         case "show-notes":
-            return show_notes(args, book)
+            return handlers.show_notes(args, book)
+        case "import":
+            return handlers.import_contacts(args, book)
+        case "export":
+            return handlers.export_contacts(args, book)
+        case "stats":
+            return handlers.show_stats(args)
+        case "dedupe":
+            return handlers.dedupe(args, book)
+        case "reshard":
+            return handlers.reshard(args, book)
         case "help":
             return print_help()
         case "close" | "exit" | "bye":
@@ -152,24 +320,36 @@ def print_help() -> str:
     """
     Returns a help message listing available commands and their usage.
 
+    The message is only built when help is asked for.
+
     Returns:
         str: The help message string.
     """
+    from colorama import Fore, Style
+
     help_message = f"""
     {Fore.CYAN}Available commands:
     - hello: Displays a greeting message.
     - help: Shows this help message.
     - add <name> <phone>: Adds a new contact with the specified name and phone number. 
                           If the contact already exists but with a different number, the contact will be updated.
+                          A phone number that already belongs to another contact is rejected.
     - change <name> <old_phone> <new_phone>: Changes the phone number for an existing contact. 
                                              If only the name and the existing number are provided, the number will be removed.
     - change-name <old_name> <new_name>: Changes the name of an existing contact.
     - phone <name>: Shows the phone number for the specified contact.
+    - who <phone>: Shows the contact the phone number belongs to.
     - contact <name>: Shows the the specified contact.
-    - all: Shows all contacts with their phone numbers.
+    - find <fragment>: Shows the 10 contacts with names closest to the fragment, even with typos.
+    - starts <prefix> [--page N] [--size N]: Shows the contacts whose names start with the prefix, in alphabetical order.
+    - all [--page N] [--size N]: Shows all contacts in alphabetical order, 50 per page.
+    - more: Shows the next page of the last listing.
     - add-birthday <name> <birthday>: Adds a birthday to the specified contact.
     - show-birthday <name>: Shows the birthday for the specified contact.
-    - birthdays: Shows upcoming birthdays within the next 7 days.
+    - birthdays [days]: Shows upcoming birthdays within the next 7 (or the given number of) days.
+    - born-in <month> [--page N] [--size N]: Shows the contacts born in the month, given by its number or name.
+    - ages <min> [max] [--page N] [--size N]: Shows the contacts aged min to max years, youngest first.
+    - birthday-weeks [year]: Shows how many birthdays fall in every week of this (or the given) year.
     - change-birthday <name> <new_birthday>: Changes the birthday for an existing contact.
     - add-email <name> <email>: Add an email to the specified contact.
     - show-email <name>:  Shows the email for the specified contact.
@@ -180,61 +360,205 @@ def print_help() -> str:
     - change-address <name> <new address>: Change an address to the specified contact.
     - show-address <name>:  Shows the address for the specified contact.
     - delete <name>: Deletes a contact from the address book.
-    - add-note <name> <title>: Adds a new note.
-    - change-note <name> <title>: Changes the note for the specified contact.
+    - add-note <name> <title> [<tag> <text>]: Adds a new note, asking for the tag and text if they are not given.
+    - change-note <name> <title> [<tag> <text>]: Changes the note for the specified contact.
     - delete-note <name> <title>: Delete the note for the specified contact.
     - show-notes <name>: Shows the notes for the specified contact.
-    - show-all-notes: Shows all notes with their tags.
-    - show-all-notes-sorted-by-tag: Shows all notes sorted by their tags.
+    - show-all-notes [--page N] [--size N]: Shows all notes with their tags.
+    - show-all-notes-sorted-by-tag [--page N] [--size N]: Shows all notes sorted by their tags.
+    - tags: Shows all tags with the number of notes for each.
     - find-note-by-title <title>. Finds a notes by tytle.
     - find-note-by-tag <tag>. Finds a notes by tag.
+    - search-notes <terms...> [--page N] [--size N]: Finds the notes best matching the terms in their title, text or tag, 10 per page.
+    - import <file>: Imports contacts from a CSV, vCard (.vcf) or JSON lines (.jsonl) file.
+    - export <jsonl|csv|vcard> <file>: Exports all contacts to a file in the given format.
+    - dedupe [--page N] [--size N]: Proposes merging contacts that are likely the same person, such as alike names with a shared phone or email.
+    - stats [on [memory] | off | reset | dump <file>]: Shows how long every command took, or turns measuring on or off.
+    - reshard <count>: Spreads the contacts of a sharded address book over a new number of shard files.
     - close / exit / bye: Exits the program.{Style.RESET_ALL}
     """
     return help_message
 
 
+def run_script(lines: Iterable[str], book: AddressBook, out: IO[str] = sys.stdout) -> int:
+    """
+    Runs commands non-interactively, one per line, until the lines run out or an exit command.
+
+    Blank lines and lines starting with # are skipped. Commands are not corrected and
+    handlers never ask for input, so note tags and texts must be given inline. A storage
+    backend does not commit per command; the caller saves the book once at the end.
+
+    Args:
+        lines (Iterable[str]): The command lines.
+        book (AddressBook): The address book instance.
+        out (IO[str]): Where to write the responses. Colors are left out unless it is a terminal.
+
+    Returns:
+        int: The number of commands run.
+    """
+    if book.storage is not None:
+        book.storage.autocommit = False
+    colored = out.isatty()
+    count = 0
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        action, args = parse_input(line)
+        if action in EXIT_COMMANDS:
+            break
+        response = handle_action(action, args, book, interactive=False)
+        out.write((response if colored else ANSI_PATTERN.sub("", response)) + "\n")
+        count += 1
+    return count
+
+
 def main() -> None:
     """
     Main function to run the assistant bot.
+
+    With the --profile-startup option, prints where the start-up time goes instead. With
+    the --script option, runs the commands of the given file (or of the standard input
+    if the file is - or left out) and saves the book once at the end. With the --serve
+    option, shares the book with clients connecting to the given address (answering
+    lookups in as many worker processes as --processes gives), and with the --connect
+    option, runs the prompt against such a server. The --stats option measures every
+    command from the start, with allocations too if --trace-memory is given. At the prompt
+    and with --serve, the book is saved in the background every --autosave seconds (60 by
+    default, 0 for never) while it changes. The --book option opens another address book
+    than addressbook.pkl, such as an SQLite database or a sharded book, and the --compress
+    option saves it compressed with lzma, zlib or bz2 (or uncompressed again with none).
+    At the prompt, Tab completes commands and contact names where readline is available.
     """
-    book = load_data()
-    
+    options = sys.argv[1:]
+    filename = "addressbook.pkl"
+    if "--book" in options:
+        position = options.index("--book")
+        if position + 1 >= len(options):
+            print("Give me the address book file after --book, please.", file=sys.stderr)
+            return
+        filename = options[position + 1]
+
+    if "--profile-startup" in options:
+        from startup import profile_startup
+        print(profile_startup(filename))
+        return
+
+    if "--stats" in options:
+        instrumentation.enable(trace_memory="--trace-memory" in options)
+
+    interval = autosave_interval(options)
+    if interval is None:
+        print("Give me a number of seconds after --autosave, please.", file=sys.stderr)
+        return
+
+    compression = compression_option(options)
+    if compression == "":
+        print(f"Give me one of {', '.join(COMPRESSIONS)} or none after --compress, please.", file=sys.stderr)
+        return
+
+    if "--connect" in options:
+        from client import DEFAULT_ADDRESS, run_client
+        position = options.index("--connect")
+        run_client(options[position + 1] if position + 1 < len(options) else DEFAULT_ADDRESS)
+        return
+
+    if "--serve" in options:
+        import asyncio
+        from client import DEFAULT_ADDRESS
+        from server import Server
+        position = options.index("--serve")
+        address = DEFAULT_ADDRESS
+        if position + 1 < len(options) and not options[position + 1].startswith("--"):
+            address = options[position + 1]
+        processes = None
+        if "--processes" in options:
+            position = options.index("--processes")
+            value = options[position + 1] if position + 1 < len(options) else ""
+            if not value.isdigit() or int(value) < 1:
+                print("Give me a positive number after --processes, please.", file=sys.stderr)
+                return
+            processes = int(value)
+        book = load_data(filename)
+        autosaver = start_autosave(book, interval)
+        print(f"Serving the address book on {address}. Press Ctrl+C to stop.", file=sys.stderr)
+        try:
+            asyncio.run(Server(book, processes=processes, autosaver=autosaver).serve(address))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if autosaver is not None:
+                autosaver.stop()
+            save_data(book, filename, compression)
+        return
+
+    if "--script" in options:
+        position = options.index("--script")
+        path = options[position + 1] if position + 1 < len(options) else "-"
+        book = load_data(filename)
+        journal, book.journal = book.journal, None
+        start = time.perf_counter()
+        try:
+            if path == "-":
+                count = run_script(sys.stdin, book)
+            else:
+                with open(path, "r", encoding="utf-8") as lines:
+                    count = run_script(lines, book)
+        except OSError as e:
+            print(f"Could not read {path}: {e.strerror}.", file=sys.stderr)
+            count = 0
+        finally:
+            if journal is not None:
+                journal.close()
+                if compression is not None:
+                    book.compression = None if compression == "none" else compression
+                write_snapshot(book, journal.snapshot)
+            else:
+                save_data(book, filename, compression)
+        elapsed = time.perf_counter() - start
+        print(f"Ran {count} commands in {elapsed:.2f} s ({count / (elapsed or 1e-9):.0f} commands/s).", file=sys.stderr)
+        return
+
+    from colorama import init, Fore, Style
+
+    init(autoreset=True)
+    book = load_data(filename)
+    suggester = CommandSuggester(COMMANDS)
+    from completion import enable_completion
+    enable_completion(book, COMMANDS)
+    autosaver = start_autosave(book, interval)
+
     print(f"{Fore.BLUE}Welcome to the assistant bot!{Style.RESET_ALL}")
-    print(print_help())
+    print("Enter 'help' to see the available commands.")
     try:
         while True:
-            user_input = input("Enter a command:\n").strip().lower()
+            user_input = input("Enter a command:\n").strip()
             if not user_input:
                 continue
 
             action, args = parse_input(user_input)
 
-            COMMANDS = ["hello", "add", "change-name", "change", "phone", "contact", "delete",
-                        "add-birthday", "change-birthday", "show-birthday", "birthdays",
-                        "add-email", "change-email", "show-email", "delete-email",
-                        "show-address", "add-address", "change-address", "delete-address",
-                        "add-note", "change-note", "show-notes", "delete-note",
-                        "show-all-notes", "show-all-notes-sorted-by-tag", "find-note-by-title", "find-note-by-tag",
-                        "find-note-by-title", "find-note-by-tag",
-                        "all", "help", "close", "exit", "bye"]
-
-            suggested_command = suggest_command(action, COMMANDS)
+            suggested_command = suggester.suggest(action)
 
             if suggested_command and suggested_command != action:
                 confirm = input(f"Do you mean '{suggested_command}'? (y/n): ").strip().lower()
                 if confirm == 'y':
                     action = suggested_command
 
-            response = handle_action(action, args, book)
+            with autosaver.holding() if autosaver is not None else nullcontext():
+                response = handle_action(action, args, book)
             print(response)
-            if action in ["close", "exit", "bye"]:
-                save_data(book)
+            if action in EXIT_COMMANDS:
+                if autosaver is not None:
+                    autosaver.stop()
+                save_data(book, filename, compression)
                 
                 break
     except KeyboardInterrupt:
         print("\nProgram stopped. Exiting...")
-        
-        save_data(book)
+        if autosaver is not None:
+            autosaver.stop()
+        save_data(book, filename, compression)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,180 @@
+import heapq
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from itertools import chain
+from typing import Dict, List, Optional, Tuple
+
+PROBE_COST = 12
+COMPACT_MIN = 1024
+
+
+def name_trigrams(text: str) -> List[str]:
+    """
+    Splits a name, lowercased and padded with two spaces in front, into its distinct
+    three-character substrings.
+
+    Only the front is padded, so the trigrams of the beginning of a name are all trigrams
+    of the name.
+
+    Args:
+        text (str): The name or a fragment of it.
+
+    Returns:
+        List[str]: The trigrams.
+    """
+    padded = f"  {text.lower()}"
+    return list(dict.fromkeys(padded[i:i + 3] for i in range(len(padded) - 2)))
+
+
+def contains(postings: array, name_id: int) -> bool:
+    """
+    Checks whether a sorted posting list holds a name.
+
+    Args:
+        postings (array): The sorted ids of the names with a trigram.
+        name_id (int): The id of the name.
+
+    Returns:
+        bool: True if the name has the trigram.
+    """
+    i = bisect_left(postings, name_id)
+    return i < len(postings) and postings[i] == name_id
+
+
+class NameIndex:
+    """
+    Class to represent a trigram index of contact names for fuzzy search.
+
+    Every name gets an increasing id, so the posting list of ids of every trigram stays
+    sorted as names are appended, and is stored compactly as an array of 32-bit integers.
+    Removed names leave their ids behind until the dead ids outnumber the live ones and
+    the postings are rebuilt.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initializes an empty NameIndex instance.
+        """
+        self._names: List[Optional[str]] = []
+        self._ids: Dict[str, int] = {}
+        self._postings: Dict[str, array] = {}
+
+    def add(self, name: str) -> None:
+        """
+        Adds a name to the index, if it is not there.
+
+        Args:
+            name (str): The name.
+        """
+        if name in self._ids:
+            return
+        name_id = len(self._names)
+        self._names.append(name)
+        self._ids[name] = name_id
+        for gram in name_trigrams(name):
+            postings = self._postings.get(gram)
+            if postings is None:
+                postings = self._postings[gram] = array("I")
+            postings.append(name_id)
+
+    def remove(self, name: str) -> None:
+        """
+        Removes a name from the index, if it is there.
+
+        Args:
+            name (str): The name.
+        """
+        name_id = self._ids.pop(name, None)
+        if name_id is None:
+            return
+        self._names[name_id] = None
+        dead = len(self._names) - len(self._ids)
+        if dead > COMPACT_MIN and dead > len(self._ids):
+            self._compact()
+
+    def _compact(self) -> None:
+        """
+        Rebuilds the postings from the live names, dropping the ids of removed ones.
+        """
+        names = list(self._ids)
+        self._names, self._ids, self._postings = [], {}, {}
+        for name in names:
+            self.add(name)
+
+    def search(self, fragment: str, limit: int = 10) -> List[Tuple[float, str]]:
+        """
+        Finds the names closest to a fragment, such as a name with typos or its beginning.
+
+        Names with every trigram of the fragment are found first, by intersecting the
+        posting lists; of those, the shortest names are the most similar. Only if there
+        are fewer of them than the limit are names with at least half the trigrams looked
+        for, lowering the threshold step by step. To have all but k of the trigrams, a
+        name must be in one of the k + 1 shortest posting lists, so only those lists are
+        read in full; the longer lists are intersected with the candidates, which are
+        dropped as soon as they miss too many of them.
+
+        Args:
+            fragment (str): The text to look for.
+            limit (int): The maximum number of names.
+
+        Returns:
+            List[Tuple[float, str]]: The similarity, between 0 and 1, and name of the best
+                matches, best first.
+        """
+        grams = sorted(name_trigrams(fragment), key=lambda gram: len(self._postings.get(gram, ())))
+        lists = [self._postings.get(gram, array("I")) for gram in grams]
+        count = len(lists)
+        if not count or limit < 1:
+            return []
+        ids = set(lists[0])
+        for postings in lists[1:]:
+            if not ids:
+                break
+            if len(postings) <= PROBE_COST * len(ids):
+                ids.intersection_update(postings)
+            else:
+                ids = {name_id for name_id in ids if contains(postings, name_id)}
+        names = list(filter(None, map(self._names.__getitem__, ids)))
+        if len(names) >= limit or count == 1:
+            if len(names) > limit:
+                longest = len(heapq.nsmallest(limit, names, key=len)[-1])
+                names = [name for name in names if len(name) <= longest]
+            names.sort(key=lambda name: (len(name), name))
+            return [(count / len(name), name) for name in names[:limit]]
+
+        matches: List[Tuple[int, int]] = []
+        for needed in range(count - 1, (count + 1) // 2 - 1, -1):
+            first = count - needed + 1
+            hits = Counter(chain.from_iterable(lists[:first]))
+            for i in range(first, count):
+                remaining = count - i
+                if needed - remaining > 1:
+                    hits = Counter({name_id: hit for name_id, hit in hits.items() if hit + remaining >= needed})
+                if not hits:
+                    break
+                postings = lists[i]
+                if len(postings) <= PROBE_COST * len(hits):
+                    hits.update(hits.keys() & set(postings))
+                else:
+                    hits.update([name_id for name_id in hits if contains(postings, name_id)])
+            matches = [(hit, name_id) for name_id, hit in hits.items()
+                       if hit >= needed and self._names[name_id] is not None]
+            if len(matches) >= limit:
+                break
+
+        def similarity(match: Tuple[int, int]) -> float:
+            hit, name_id = match
+            return hit / (count + len(self._names[name_id]) - hit)
+
+        best = heapq.nsmallest(limit, matches, key=lambda match: (-similarity(match), self._names[match[1]]))
+        return [(similarity(match), self._names[match[1]]) for match in best]
+
+    def __len__(self) -> int:
+        """
+        Returns the number of names in the index.
+
+        Returns:
+            int: The number of names.
+        """
+        return len(self._ids)
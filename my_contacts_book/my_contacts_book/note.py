@@ -1,14 +1,19 @@
+import sys
 from field import Field
 class Note:
     """
     Class to represent a note.
 
+    Tags are interned, so all notes with the same tag share a single string.
+
     Attributes:
         title (Field): The title of the note.
         text (Field): The text content of the note.
         tag (Field): The tag associated with the note.
     """
 
+    __slots__ = ("title", "text", "tag")
+
     def __init__(self, title: str, text: str, tag: str) -> None:
         """
         Initializes a Note instance.
@@ -20,7 +25,30 @@ class Note:
         """
         self.title = Field(title)
         self.text = Field(text)
-        self.tag = Field(tag)
+        self.tag = Field(sys.intern(tag))
+
+    def __getstate__(self) -> dict:
+        """
+        Returns the picklable state of the note.
+
+        Returns:
+            dict: The note attributes.
+        """
+        return {"title": self.title, "text": self.text, "tag": self.tag}
+
+    def __setstate__(self, state: dict) -> None:
+        """
+        Restores the note from its pickled state, interning its tag.
+
+        Also accepts the __dict__ of notes pickled before __slots__ were introduced.
+
+        Args:
+            state (dict): The note attributes.
+        """
+        self.title = state["title"]
+        self.text = state["text"]
+        self.tag = state["tag"]
+        self.tag.value = sys.intern(self.tag.value)
 
     def __str__(self) -> str:
         """
@@ -0,0 +1,114 @@
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+
+TOKEN_PATTERN = re.compile(r"\w+")
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits text into lowercase word tokens.
+
+    Args:
+        text (str): The text to tokenize.
+
+    Returns:
+        List[str]: The tokens.
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class NoteIndex:
+    """
+    Class to represent an inverted full-text index over notes, ranked with BM25.
+
+    Every note is a document identified by the name of its contact and its title, made of
+    the tokens of its title, text and tag.
+
+    Attributes:
+        postings (Dict[str, Dict[Tuple[str, str], int]]): The term frequency of every term in every document.
+        lengths (Dict[Tuple[str, str], int]): The number of tokens of every document.
+        total_length (int): The number of tokens of all documents.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initializes an empty NoteIndex instance.
+        """
+        self.postings: Dict[str, Dict[Tuple[str, str], int]] = {}
+        self.lengths: Dict[Tuple[str, str], int] = {}
+        self._terms: Dict[Tuple[str, str], Counter] = {}
+        self.total_length = 0
+
+    def add(self, name: str, title: str, text: str, tag: str) -> None:
+        """
+        Adds a note to the index, replacing a previous version of it.
+
+        Args:
+            name (str): The name of the contact.
+            title (str): The title of the note.
+            text (str): The text of the note.
+            tag (str): The tag of the note.
+        """
+        key = (name, title)
+        self.remove(name, title)
+        terms = Counter(tokenize(title) + tokenize(text) + tokenize(tag))
+        for term, count in terms.items():
+            self.postings.setdefault(term, {})[key] = count
+        self._terms[key] = terms
+        self.lengths[key] = sum(terms.values())
+        self.total_length += self.lengths[key]
+
+    def remove(self, name: str, title: str) -> None:
+        """
+        Removes a note from the index, if it is there.
+
+        Args:
+            name (str): The name of the contact.
+            title (str): The title of the note.
+        """
+        key = (name, title)
+        terms = self._terms.pop(key, None)
+        if terms is None:
+            return
+        for term in terms:
+            documents = self.postings[term]
+            del documents[key]
+            if not documents:
+                del self.postings[term]
+        self.total_length -= self.lengths.pop(key)
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, str, float]]:
+        """
+        Finds the notes best matching the query terms.
+
+        Only the postings of the query terms are visited, so the cost depends on how common
+        the terms are, not on the number of notes.
+
+        Args:
+            query (str): The query text.
+            limit (int): The maximum number of results.
+
+        Returns:
+            List[Tuple[str, str, float]]: The contact name, note title and BM25 score of the
+                best matches, best first.
+        """
+        count = len(self.lengths)
+        if not count:
+            return []
+        average_length = self.total_length / count or 1
+        scores: Dict[Tuple[str, str], float] = {}
+        for term in set(tokenize(query)):
+            documents = self.postings.get(term)
+            if not documents:
+                continue
+            idf = math.log(1 + (count - len(documents) + 0.5) / (len(documents) + 0.5))
+            for key, frequency in documents.items():
+                norm = K1 * (1 - B + B * self.lengths[key] / average_length)
+                scores[key] = scores.get(key, 0.0) + idf * frequency * (K1 + 1) / (frequency + norm)
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [(name, title, score) for (name, title), score in best]
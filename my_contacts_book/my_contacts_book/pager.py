@@ -0,0 +1,241 @@
+from collections import deque
+from contextvars import ContextVar
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+PAGE_SIZE = 50
+SAMPLE_SIZE = 200
+MAX_WIDTH = 60
+
+_session: ContextVar[dict] = ContextVar("pager_session")
+_default_session: dict = {}
+
+
+def new_session() -> None:
+    """
+    Gives the current context its own cursor for the more command, so that clients served
+    side by side do not continue each other's listings.
+    """
+    _session.set({})
+
+
+def parse_page_args(args: List[str], size: int = PAGE_SIZE) -> Tuple[List[str], int, int]:
+    """
+    Takes the --page and --size options out of the arguments of a command.
+
+    Args:
+        args (List[str]): The arguments for the command.
+        size (int): The page size to use if --size is not given.
+
+    Returns:
+        Tuple[List[str], int, int]: The remaining arguments, the page number and the page size.
+
+    Raises:
+        ValueError: If an option has no value or the value is not a positive number.
+    """
+    rest, options = [], {"--page": 1, "--size": size}
+    arguments = iter(args)
+    for arg in arguments:
+        if arg.lower() not in options:
+            rest.append(arg)
+            continue
+        value = next(arguments, "")
+        if not value.isdigit() or int(value) < 1:
+            raise ValueError(f"Give me a positive number after {arg.lower()}, please.")
+        options[arg.lower()] = int(value)
+    return rest, options["--page"], options["--size"]
+
+
+class Cursor:
+    """
+    Class to represent a position in a listing that is rendered page by page.
+
+    Rows are pulled from the listing only as pages are rendered. Column widths are
+    computed once from a bounded sample of rows and kept for every following page, so
+    rendering a page costs the same whatever the size of the listing.
+
+    Attributes:
+        columns (Sequence[str]): The column headers.
+        rows (Iterator[Sequence]): The rows not rendered yet.
+        size (int): The number of rows per page.
+        page (int): The number of the last rendered page.
+        widths (Optional[List[int]]): The column widths, or None before the first page.
+    """
+
+    def __init__(self, columns: Sequence[str], rows: Iterable[Sequence], size: int = PAGE_SIZE) -> None:
+        """
+        Initializes a cursor at the start of a listing.
+
+        Args:
+            columns (Sequence[str]): The column headers.
+            rows (Iterable[Sequence]): The rows of the listing.
+            size (int): The number of rows per page.
+        """
+        self.columns = columns
+        self.rows: Iterator[Sequence] = iter(rows)
+        self.size = size
+        self.page = 0
+        self.widths: Optional[List[int]] = None
+        self._buffer: deque = deque()
+
+    def _take(self, count: int) -> List[Sequence]:
+        """
+        Takes the next rows, looking at the rows read ahead first.
+
+        Args:
+            count (int): The maximum number of rows to take.
+
+        Returns:
+            List[Sequence]: The rows.
+        """
+        rows = [self._buffer.popleft() for _ in range(min(count, len(self._buffer)))]
+        rows.extend(islice(self.rows, count - len(rows)))
+        return rows
+
+    def skip(self, pages: int) -> int:
+        """
+        Moves past pages without formatting them.
+
+        Args:
+            pages (int): The number of pages to skip.
+
+        Returns:
+            int: The number of rows skipped.
+        """
+        skipped = len(self._take(min(pages * self.size, len(self._buffer))))
+        skipped += sum(1 for _ in islice(self.rows, pages * self.size - skipped))
+        self.page += pages
+        return skipped
+
+    def has_more(self) -> bool:
+        """
+        Checks whether there are rows after the last rendered page.
+
+        Returns:
+            bool: True if there are more rows.
+        """
+        if not self._buffer:
+            self._buffer.extend(islice(self.rows, 1))
+        return bool(self._buffer)
+
+    def _measure(self) -> None:
+        """
+        Computes the column widths from the headers and a sample of the next rows.
+        """
+        self._buffer.extend(islice(self.rows, SAMPLE_SIZE - len(self._buffer)))
+        sample = self._buffer
+        self.widths = [len(column) for column in self.columns]
+        for row in sample:
+            for i, cell in enumerate(row):
+                self.widths[i] = max(self.widths[i], min(len(clean(cell)), MAX_WIDTH))
+
+    def next_page(self) -> Optional[str]:
+        """
+        Renders the next page of the listing.
+
+        Returns:
+            Optional[str]: The table of the page with a footer, or None if there are no more rows.
+        """
+        if self.widths is None:
+            self._measure()
+        rows = self._take(self.size)
+        if not rows:
+            return None
+        self.page += 1
+        first = (self.page - 1) * self.size + 1
+        footer = f"Page {self.page}, rows {first}-{first + len(rows) - 1}."
+        if self.has_more():
+            footer += " Enter 'more' for the next page."
+        return f"{format_table(self.columns, rows, self.widths)}\n{footer}"
+
+
+def clean(cell) -> str:
+    """
+    Converts a cell to a single line of text.
+
+    Args:
+        cell: The cell value.
+
+    Returns:
+        str: The text of the cell.
+    """
+    return str(cell).replace("\r", " ").replace("\n", " ")
+
+
+def format_table(columns: Sequence[str], rows: List[Sequence], widths: List[int]) -> str:
+    """
+    Formats rows as a table with fixed column widths, cutting longer cells short.
+
+    Args:
+        columns (Sequence[str]): The column headers.
+        rows (List[Sequence]): The rows.
+        widths (List[int]): The column widths.
+
+    Returns:
+        str: The table.
+    """
+    border = "+" + "+".join("-" * (width + 2) for width in widths) + "+"
+
+    def line(cells: Sequence) -> str:
+        texts = []
+        for cell, width in zip(cells, widths):
+            text = clean(cell)
+            if len(text) > width:
+                text = text[:width - 1] + "…"
+            texts.append(text.center(width))
+        return "| " + " | ".join(texts) + " |"
+
+    return "\n".join([border, line(columns), border, *(line(row) for row in rows), border])
+
+
+def render(columns: Sequence[str], rows: Iterable[Sequence], page: int = 1, size: int = PAGE_SIZE) -> Optional[str]:
+    """
+    Renders one page of a listing and keeps the cursor after it for the more command.
+
+    Args:
+        columns (Sequence[str]): The column headers.
+        rows (Iterable[Sequence]): The rows of the listing.
+        page (int): The number of the page to render, starting at 1.
+        size (int): The number of rows per page.
+
+    Returns:
+        Optional[str]: The table of the page with a footer, or None if the listing is empty.
+
+    Raises:
+        ValueError: If the listing has rows but not as many as the page needs.
+    """
+    session = _session.get(_default_session)
+    session["cursor"] = None
+    cursor = Cursor(columns, rows, size)
+    skipped = cursor.skip(page - 1)
+    text = cursor.next_page()
+    if text is None:
+        if skipped:
+            raise ValueError(f"There is no page {page}.")
+        return None
+    if cursor.has_more():
+        session["cursor"] = cursor
+    return text
+
+
+def render_more() -> Optional[str]:
+    """
+    Renders the page after the last rendered one.
+
+    Returns:
+        Optional[str]: The table of the page with a footer, or None if nothing is left to show.
+
+    Raises:
+        ValueError: If the listing was changed since its last page was rendered.
+    """
+    session = _session.get(_default_session)
+    cursor, session["cursor"] = session.get("cursor"), None
+    if cursor is None:
+        return None
+    try:
+        text = cursor.next_page()
+        if text is not None and cursor.has_more():
+            session["cursor"] = cursor
+    except RuntimeError:
+        raise ValueError("The address book has changed, run the command again.")
+    return text
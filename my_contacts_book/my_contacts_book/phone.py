@@ -2,9 +2,41 @@ import re
 from field import Field
 
 class Phone(Field):
+    """
+    Class to represent a phone number field.
+
+    Ten-digit numbers are stored as integers rather than strings to save memory.
+
+    Attributes:
+        value (str): The phone number as a string.
+    """
+
+    __slots__ = ()
+    # The packed number is kept in the value slot of Field, which the value property hides.
+    _number = Field.value
+
     def __init__(self, number: str):
         self.value = self.validate_phone(number)
 
+    @property
+    def value(self) -> str:
+        if isinstance(self._number, int):
+            return f"{self._number:010d}"
+        return self._number
+
+    @value.setter
+    def value(self, number: str) -> None:
+        self._number = int(number) if re.fullmatch(r"\d{10}", number) else number
+
+    def __getstate__(self) -> dict:
+        """
+        Returns the picklable state of the phone number.
+
+        Returns:
+            dict: The packed phone number.
+        """
+        return {"_number": self._number}
+
     def validate_phone(self, number: str) -> str:
         """
         Validate the phone number to ensure it contains exactly 10 digits.
@@ -1,3 +1,4 @@
+import sys
 from typing import List, Optional
 from name import Name
 from phone import Phone
@@ -17,8 +18,11 @@ class Record:
         email (Optional[Email]): The email address of the contact.
         address (Optional[Address]): The address of the contact.
         notes (Optional[List[Note]]): The optional list of notes associated with the contact.
+        version (int): The number of changes made to the contact since it was created or loaded.
     """
 
+    __slots__ = ("name", "phones", "birthday", "email", "address", "notes", "version", "_book")
+
     def __init__(self, name: str) -> None:
         """
         Initializes a Record instance.
@@ -32,8 +36,60 @@ class Record:
         self.email: Optional[Email] = None
         self.address: Optional[Address] = None
         self.notes: Optional[List[Note]] = []
+        self.version = 0
+        self._book = None
+
+    def __getstate__(self) -> dict:
+        """
+        Returns the picklable state of the record, without its version and the link to its
+        address book.
+
+        Returns:
+            dict: The record attributes.
+        """
+        return {attribute: getattr(self, attribute) for attribute in self.__slots__
+                if attribute not in ("version", "_book")}
+
+    def __setstate__(self, state: dict) -> None:
+        """
+        Restores the record from its pickled state.
+
+        Also accepts the __dict__ of records pickled before __slots__ were introduced.
+
+        Args:
+            state (dict): The record attributes.
+        """
+        self.birthday = self.email = self.address = None
+        self.phones, self.notes = [], []
+        for attribute, value in state.items():
+            setattr(self, attribute, value)
+        self.version = 0
+        self._book = None
+
+    def _will_change(self, op: str) -> None:
+        """
+        Warns the address book the record belongs to that the record is about to change,
+        so that a snapshot being saved can keep a copy of it as it was and indexes can let
+        go of the values about to be replaced.
+
+        Args:
+            op (str): The name of the mutating method.
+        """
+        if self._book is not None:
+            self._book.record_will_change(self, op)
+
+    def _changed(self, op: str, *args) -> None:
+        """
+        Counts a mutation and reports it to the address book the record belongs to.
+
+        Args:
+            op (str): The name of the mutating method.
+            *args: The arguments the method was called with.
+        """
+        self.version += 1
+        if self._book is not None:
+            self._book.record_changed(self, op, *args)
 
-    
     def add_phone(self, phone: str) -> None:
         """
         Adds a phone number to the contact.
@@ -41,7 +97,10 @@ class Record:
         Args:
             phone (str): The phone number to add.
         """
-        self.phones.append(Phone(phone))
+        phone_field = Phone(phone)
+        self._will_change("add_phone")
+        self.phones.append(phone_field)
+        self._changed("add_phone", phone)
 
     def remove_phone(self, phone: str) -> None:
         """
@@ -50,7 +109,10 @@ class Record:
         Args:
             phone (str): The phone number to remove.
         """
-        self.phones = [p for p in self.phones if p.value != phone]
+        if self.find_phone(phone):
+            self._will_change("remove_phone")
+            self.phones = [p for p in self.phones if p.value != phone]
+            self._changed("remove_phone", phone)
 
     def edit_phone(self, old_phone: str, new_phone: str) -> None:
         """
@@ -60,9 +122,12 @@ class Record:
             old_phone (str): The old phone number to be replaced.
             new_phone (str): The new phone number to replace the old one.
         """
-        for phone in self.phones:
-            if phone.value == old_phone:
-                phone.value = new_phone
+        if self.find_phone(old_phone):
+            self._will_change("edit_phone")
+            for phone in self.phones:
+                if phone.value == old_phone:
+                    phone.value = new_phone
+            self._changed("edit_phone", old_phone, new_phone)
 
     def find_phone(self, phone: str) -> Optional[Phone]:
         """
@@ -86,7 +151,10 @@ class Record:
         Args:
             birthday (str): The birthday value in DD.MM.YYYY format.
         """
-        self.birthday = Birthday(birthday)
+        birthday_field = Birthday(birthday)
+        self._will_change("add_birthday")
+        self.birthday = birthday_field
+        self._changed("add_birthday", birthday)
 
     def add_email(self, email) -> None:
         """
@@ -95,8 +163,11 @@ class Record:
         Args:
         email(str): The email value example@example.com format
         """
-        self.email = Email(email)
-        
+        email_field = Email(email)
+        self._will_change("add_email")
+        self.email = email_field
+        self._changed("add_email", email)
+
     def add_address(self, address: str) -> None:
         """
         Adds an address to the contact.
@@ -104,10 +175,105 @@ class Record:
         Args:
             address (str): The address as a string.
         """
-        self.address = Address(address)
-        
+        address_field = Address(address)
+        self._will_change("add_address")
+        self.address = address_field
+        self._changed("add_address", address)
+
     def add_note(self, note: Note) -> None:
-            self.notes.append(note)
+        """
+        Adds a note to the contact.
+
+        Args:
+            note (Note): The note to add.
+        """
+        self._will_change("add_note")
+        self.notes.append(note)
+        self._changed("add_note", note.title.value, note.text.value, note.tag.value)
+
+    def find_note(self, title: str) -> Optional[Note]:
+        """
+        Finds a note by its title.
+
+        Args:
+            title (str): The title of the note.
+
+        Returns:
+            Optional[Note]: The note if found, otherwise None.
+        """
+        for note in self.notes:
+            if note.title.value == title:
+                return note
+        return None
+
+    def change_note(self, title: str, text: str, tag: str) -> None:
+        """
+        Changes the text and tag of the note with the given title.
+
+        Args:
+            title (str): The title of the note to change.
+            text (str): The new text of the note.
+            tag (str): The new tag of the note.
+        """
+        note = self.find_note(title)
+        if note:
+            self._will_change("change_note")
+            note.text.value = text
+            note.tag.value = sys.intern(tag)
+            self._changed("change_note", title, text, tag)
+
+    def remove_note(self, title: str) -> None:
+        """
+        Removes the note with the given title from the contact.
+
+        Args:
+            title (str): The title of the note to remove.
+        """
+        note = self.find_note(title)
+        if note:
+            self._will_change("remove_note")
+            self.notes.remove(note)
+            self._changed("remove_note", title)
+
+    def to_dict(self) -> dict:
+        """
+        Returns the contact as a dictionary of plain values.
+
+        Returns:
+            dict: The contact data.
+        """
+        return {
+            "name": self.name.value,
+            "phones": [phone.value for phone in self.phones],
+            "birthday": self.birthday.value if self.birthday else None,
+            "email": self.email.value if self.email else None,
+            "address": self.address.value if self.address else None,
+            "notes": [[note.title.value, note.text.value, note.tag.value] for note in self.notes],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Record":
+        """
+        Creates a contact from a dictionary produced by to_dict.
+
+        Args:
+            data (dict): The contact data.
+
+        Returns:
+            Record: The new record.
+        """
+        record = cls(data["name"])
+        for phone in data["phones"]:
+            record.add_phone(phone)
+        if data.get("birthday"):
+            record.add_birthday(data["birthday"])
+        if data.get("email"):
+            record.add_email(data["email"])
+        if data.get("address"):
+            record.add_address(data["address"])
+        for title, text, tag in data.get("notes", []):
+            record.add_note(Note(title, text, tag))
+        return record
 
     def __str__(self) -> str:
         """
@@ -0,0 +1,264 @@
+import asyncio
+import contextvars
+import json
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Optional
+from address_book import AddressBook
+from client import DEFAULT_ADDRESS, parse_address
+from main import EXIT_COMMANDS, handle_action, parse_input
+import pager
+import snapshot
+
+PUBLISH_DELAY = 0.1
+READ_COMMANDS = frozenset({
+    "hello", "help", "phone", "who", "contact", "find", "starts", "all", "more", "show-birthday", "birthdays",
+    "born-in", "ages", "birthday-weeks", "show-email", "show-address", "show-notes", "show-all-notes",
+    "show-all-notes-sorted-by-tag", "tags", "find-note-by-title", "find-note-by-tag", "search-notes", "export", "dedupe", "stats",
+})
+
+
+class ReadWriteLock:
+    """
+    Class to represent an asyncio lock that many readers or one writer can hold.
+
+    Waiting writers keep new readers out, so a steady stream of reads cannot starve writes.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initializes an unlocked ReadWriteLock instance.
+        """
+        self._condition = asyncio.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    @asynccontextmanager
+    async def reading(self):
+        """
+        Holds the lock shared with other readers for the duration of the block.
+        """
+        async with self._condition:
+            await self._condition.wait_for(lambda: not self._writer and not self._waiting_writers)
+            self._readers += 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @asynccontextmanager
+    async def writing(self):
+        """
+        Holds the lock exclusively for the duration of the block.
+        """
+        async with self._condition:
+            self._waiting_writers += 1
+            try:
+                await self._condition.wait_for(lambda: not self._writer and not self._readers)
+            finally:
+                self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._writer = False
+                self._condition.notify_all()
+
+
+class Server:
+    """
+    Class to represent a server sharing one address book between many clients.
+
+    Every client sends command lines and gets back one line per command holding the
+    JSON-encoded response text. Commands that only read the book run side by side in
+    worker threads; commands that change it run one at a time, with no reads in between.
+
+    With worker processes, the lookups in snapshot.SNAPSHOT_HANDLERS are answered by the
+    processes from a snapshot of the book in shared memory, so they are not bound by the
+    interpreter lock of the server. After a change, lookups are answered in worker threads
+    until a new snapshot is published, so a client always sees its own changes. The new
+    snapshot is published in the background once the book has gone PUBLISH_DELAY seconds,
+    or as long as the last publish took, without a change.
+
+    Attributes:
+        book (AddressBook): The shared address book.
+        lock (ReadWriteLock): The lock serializing changes of the book.
+        autosaver (Optional[Autosaver]): The autosaver saving the book in the background, if any.
+    """
+
+    def __init__(self, book: AddressBook, workers: Optional[int] = None, processes: Optional[int] = None,
+                 autosaver=None) -> None:
+        """
+        Initializes a server for the address book.
+
+        Args:
+            book (AddressBook): The address book to share.
+            workers (Optional[int]): The number of worker threads running commands.
+            processes (Optional[int]): The number of worker processes answering lookups
+                from shared memory snapshots, or None to answer them in worker threads.
+            autosaver (Optional[Autosaver]): The autosaver saving the book in the background,
+                which commands changing the book have to hold off.
+        """
+        self.book = book
+        self.lock = ReadWriteLock()
+        self.autosaver = autosaver
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="command")
+        self._publisher = None
+        self._pool = None
+        if processes:
+            from concurrent.futures import ProcessPoolExecutor
+
+            self._publisher = snapshot.SnapshotPublisher()
+            self._pool = ProcessPoolExecutor(processes, initializer=snapshot.attach,
+                                             initargs=(self._publisher.prefix,))
+        self._stale = True
+        # Odd while a change is running, and two more after every change, so a snapshot
+        # encoded while it stayed the same and even holds no half-made change.
+        self._changes = 0
+        self._publish_time = 0.0
+        self._republishing: Optional[asyncio.Task] = None
+
+    async def execute(self, action: str, args: list[str]) -> str:
+        """
+        Runs a command in a worker thread under the read or the write lock.
+
+        The thread runs in the context of the calling client, so paged listings continue
+        where that client left off.
+
+        Args:
+            action (str): The command.
+            args (list[str]): The arguments of the command.
+
+        Returns:
+            str: The response text.
+        """
+        loop = asyncio.get_running_loop()
+        if self._pool is not None and action in snapshot.SNAPSHOT_HANDLERS and not self._stale:
+            return await loop.run_in_executor(self._pool, snapshot.answer, action, args)
+        context = contextvars.copy_context()
+        if action in READ_COMMANDS:
+            async with self.lock.reading():
+                return await loop.run_in_executor(
+                    self._executor, context.run, handle_action, action, args, self.book, False)
+        async with self.lock.writing():
+            self._stale = True
+            self._changes += 1
+            try:
+                return await loop.run_in_executor(self._executor, context.run, self._change, action, args)
+            finally:
+                self._changes += 1
+                if self._pool is not None and self._republishing is None:
+                    self._republishing = asyncio.create_task(self._republish())
+
+    def _change(self, action: str, args: list[str]) -> str:
+        """
+        Runs a command that may change the book, holding off the autosaver meanwhile.
+
+        Args:
+            action (str): The command.
+            args (list[str]): The arguments of the command.
+
+        Returns:
+            str: The response text.
+        """
+        if self.autosaver is None:
+            return handle_action(action, args, self.book, False)
+        with self.autosaver.holding():
+            return handle_action(action, args, self.book, False)
+
+    async def publish(self) -> bool:
+        """
+        Publishes a snapshot of the book for the worker processes.
+
+        The book is encoded without holding the lock, so changes are not held up, and the
+        snapshot is thrown away if the book changed meanwhile.
+
+        Returns:
+            bool: Whether the snapshot was published.
+        """
+        changes = self._changes
+        if changes % 2:
+            return False
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        try:
+            data = await loop.run_in_executor(self._executor, snapshot.encode, self.book)
+        except RuntimeError:
+            # The book changed size while it was encoded.
+            return False
+        if changes != self._changes:
+            return False
+        await loop.run_in_executor(self._executor, self._publisher.publish_encoded, data)
+        self._publish_time = loop.time() - start
+        if changes == self._changes:
+            self._stale = False
+        return True
+
+    async def _republish(self) -> None:
+        """
+        Publishes a new snapshot once the book stops changing, until one is current.
+        """
+        try:
+            while self._stale:
+                changes = self._changes
+                await asyncio.sleep(max(PUBLISH_DELAY, self._publish_time))
+                if changes == self._changes:
+                    await self.publish()
+        finally:
+            self._republishing = None
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Serves the commands of one client until it disconnects or sends an exit command.
+
+        Args:
+            reader (asyncio.StreamReader): The stream of the client's commands.
+            writer (asyncio.StreamWriter): The stream of the responses.
+        """
+        pager.new_session()
+        try:
+            while line := await reader.readline():
+                user_input = line.decode("utf-8", errors="replace").strip()
+                if not user_input:
+                    response = ""
+                else:
+                    action, args = parse_input(user_input)
+                    response = "Good bye!" if action in EXIT_COMMANDS else await self.execute(action, args)
+                writer.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+                await writer.drain()
+                if user_input and action in EXIT_COMMANDS:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, address: str = DEFAULT_ADDRESS) -> None:
+        """
+        Listens on the address and serves clients until cancelled.
+
+        Args:
+            address (str): unix:<path> for a Unix socket, or <host>:<port> for a TCP socket.
+        """
+        if self._pool is not None:
+            await self.publish()
+        kind, *location = parse_address(address)
+        if kind == "unix":
+            server = await asyncio.start_unix_server(self.handle_client, path=location[0])
+        else:
+            server = await asyncio.start_server(self.handle_client, *location)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if self._republishing is not None:
+                self._republishing.cancel()
+            self._executor.shutdown(wait=True)
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._publisher.close()
@@ -0,0 +1,413 @@
+import json
+import os
+import pickle
+import sys
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from record import Record
+from storage import Storage
+
+MANIFEST = "manifest.json"
+DEFAULT_SHARDS = 64
+CACHE_SIZE = 16
+
+
+def shard_of(name: str, shards: int) -> int:
+    """
+    Finds the shard a contact belongs to, from a hash of its case-folded name.
+
+    The hash is stable between runs, unlike the built-in hash of strings.
+
+    Args:
+        name (str): The contact name.
+        shards (int): The number of shards.
+
+    Returns:
+        int: The shard number.
+    """
+    return zlib.crc32(name.casefold().encode("utf-8")) % shards
+
+
+def is_sharded(filename: str) -> bool:
+    """
+    Checks whether a path holds a sharded address book.
+
+    Args:
+        filename (str): The path.
+
+    Returns:
+        bool: True if the path is a directory with a shard manifest.
+    """
+    return os.path.isfile(os.path.join(filename, MANIFEST))
+
+
+def read_shard(path: str) -> Dict[str, Record]:
+    """
+    Reads the records of a shard file. A file may hold several pickled dictionaries one
+    after another, as written by a reshard, which are merged.
+
+    Args:
+        path (str): The shard file.
+
+    Returns:
+        Dict[str, Record]: The records by name.
+    """
+    records: Dict[str, Record] = {}
+    with open(path, "rb") as f:
+        while True:
+            try:
+                records.update(pickle.load(f))
+            except EOFError:
+                return records
+
+
+def write_file(path: str, data: bytes) -> None:
+    """
+    Writes a file durably through a temporary file moved into place.
+
+    Args:
+        path (str): The file.
+        data (bytes): The contents.
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def write_sharded(records: Iterable[Record], directory: str, shards: int = DEFAULT_SHARDS,
+                  journal_seq: int = 0) -> None:
+    """
+    Writes records as a new sharded address book.
+
+    Args:
+        records (Iterable[Record]): The records.
+        directory (str): The directory to create, which must not hold a sharded book yet.
+        shards (int): The number of shards.
+        journal_seq (int): The sequence number of the last journaled mutation in the records.
+
+    Raises:
+        ValueError: If the directory already holds a sharded book or the shard count is
+            not positive.
+    """
+    if shards < 1:
+        raise ValueError("The number of shards must be positive.")
+    if is_sharded(directory):
+        raise ValueError(f"{directory} already holds a sharded address book.")
+    buckets: List[Dict[str, Record]] = [{} for _ in range(shards)]
+    for record in records:
+        buckets[shard_of(record.name.value, shards)][record.name.value] = record
+    os.makedirs(directory, exist_ok=True)
+    files: List[Optional[str]] = []
+    for i, bucket in enumerate(buckets):
+        files.append(f"{i:04d}-0.pkl" if bucket else None)
+        if bucket:
+            write_file(os.path.join(directory, files[-1]), pickle.dumps(bucket))
+    manifest = {"shards": shards, "journal_seq": journal_seq, "next_file": 1,
+                "files": files, "counts": [len(bucket) for bucket in buckets]}
+    write_file(os.path.join(directory, MANIFEST), json.dumps(manifest).encode("utf-8"))
+
+
+class ShardedStorage(Storage):
+    """
+    Class to represent an address book storage split into shard files by a hash of the names.
+
+    A directory holds a manifest and one pickle file per shard. Shards are read only when
+    a command touches one of their contacts and kept in a least recently used cache of
+    CACHE_SIZE shards, so a lookup by name reads one shard whatever the size of the book.
+    Changed shards are marked dirty and only they are written again: when they are
+    evicted from the cache and on sync.
+
+    Every write goes to a new shard file and the manifest naming the current file of
+    every shard is replaced atomically on sync, so the files on disk always form the book
+    as of the last sync; changes made since are kept in the journal. Changes are only
+    guaranteed to be stored by sync, which also empties the journal of the owning book.
+
+    Records whose shard was evicted stay valid: a change to such a record puts the record
+    back into its shard.
+
+    Attributes:
+        directory (str): The directory of the book.
+        shards (int): The number of shards.
+        cache_size (int): The number of shards kept in memory.
+        journal_seq (int): The sequence number of the last journaled mutation in the shard files.
+    """
+
+    autocommit = False
+
+    def __init__(self, directory: str, cache_size: int = CACHE_SIZE) -> None:
+        """
+        Opens a sharded address book, removing files left behind by an interrupted write.
+
+        Args:
+            directory (str): The directory of the book.
+            cache_size (int): The number of shards kept in memory.
+        """
+        self.directory = directory
+        self.cache_size = cache_size
+        with open(os.path.join(directory, MANIFEST), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        self.shards: int = manifest["shards"]
+        self.journal_seq: int = manifest["journal_seq"]
+        self._next_file: int = manifest["next_file"]
+        self._files: List[Optional[str]] = manifest["files"]
+        self._counts: List[int] = manifest["counts"]
+        self._committed: Set[str] = {file for file in self._files if file}
+        self._cache: "OrderedDict[int, Dict[str, Record]]" = OrderedDict()
+        self._dirty: Set[int] = set()
+        self._lock = threading.RLock()
+        for file in os.listdir(directory):
+            if file != MANIFEST and file not in self._committed:
+                os.remove(os.path.join(directory, file))
+
+    def _shard(self, i: int) -> Dict[str, Record]:
+        """
+        Gets the records of a shard, reading it if it is not cached.
+
+        Args:
+            i (int): The shard number.
+
+        Returns:
+            Dict[str, Record]: The records of the shard by name.
+        """
+        with self._lock:
+            records = self._cache.get(i)
+            if records is not None:
+                self._cache.move_to_end(i)
+                return records
+            records = read_shard(os.path.join(self.directory, self._files[i])) if self._files[i] else {}
+            for record in records.values():
+                record._book = self.owner
+            self._cache[i] = records
+            while len(self._cache) > self.cache_size:
+                self._evict()
+            return records
+
+    def _evict(self) -> None:
+        """
+        Drops the least recently used shard from the cache, writing it first if it is dirty.
+        """
+        i, records = self._cache.popitem(last=False)
+        if i in self._dirty:
+            self._write(i, records)
+
+    def _write(self, i: int, records: Dict[str, Record]) -> None:
+        """
+        Writes a shard into a new file. The file it replaces is removed right away if no
+        manifest names it, and after the next sync otherwise.
+
+        Args:
+            i (int): The shard number.
+            records (Dict[str, Record]): The records of the shard.
+        """
+        old_file = self._files[i]
+        if records:
+            self._files[i] = f"{i:04d}-{self._next_file}.pkl"
+            self._next_file += 1
+            write_file(os.path.join(self.directory, self._files[i]), pickle.dumps(records))
+        else:
+            self._files[i] = None
+        if old_file and old_file not in self._committed:
+            os.remove(os.path.join(self.directory, old_file))
+        self._dirty.discard(i)
+
+    def __getitem__(self, name: str) -> Record:
+        return self._shard(shard_of(name, self.shards))[name]
+
+    def __setitem__(self, name: str, record: Record) -> None:
+        with self._lock:
+            i = shard_of(name, self.shards)
+            records = self._shard(i)
+            if name not in records:
+                self._counts[i] += 1
+            records[name] = record
+            self._dirty.add(i)
+
+    def __delitem__(self, name: str) -> None:
+        with self._lock:
+            i = shard_of(name, self.shards)
+            del self._shard(i)[name]
+            self._counts[i] -= 1
+            self._dirty.add(i)
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and name in self._shard(shard_of(name, self.shards))
+
+    def __len__(self) -> int:
+        return sum(self._counts)
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(self.shards):
+            if self._counts[i]:
+                yield from list(self._shard(i))
+
+    def values(self) -> Iterator[Record]:
+        """
+        Iterates over the records, reading one shard at a time.
+
+        Returns:
+            Iterator[Record]: The records.
+        """
+        for i in range(self.shards):
+            if self._counts[i]:
+                yield from list(self._shard(i).values())
+
+    def items(self) -> Iterator[Tuple[str, Record]]:
+        """
+        Iterates over the names and records, reading one shard at a time.
+
+        Returns:
+            Iterator[Tuple[str, Record]]: The name and record pairs.
+        """
+        for record in self.values():
+            yield record.name.value, record
+
+    def add_many(self, records: List[Record]) -> None:
+        """
+        Stores many records at once, reading every shard they go to only once.
+
+        Args:
+            records (List[Record]): The records.
+        """
+        buckets: Dict[int, List[Record]] = {}
+        for record in records:
+            buckets.setdefault(shard_of(record.name.value, self.shards), []).append(record)
+        with self._lock:
+            for i, bucket in sorted(buckets.items()):
+                shard = self._shard(i)
+                for record in bucket:
+                    if record.name.value not in shard:
+                        self._counts[i] += 1
+                    shard[record.name.value] = record
+                self._dirty.add(i)
+
+    def record_changed(self, record: Record, op: str, *args) -> None:
+        """
+        Marks the shard of a changed record dirty, putting the record back if its shard was
+        evicted and read again since the record was handed out.
+
+        Args:
+            record (Record): The mutated record.
+            op (str): The name of the mutating method.
+            *args: The arguments the method was called with.
+        """
+        self[record.name.value] = record
+
+    def _commit(self) -> None:
+        """
+        Replaces the manifest with one naming the current shard files, then removes the
+        files it no longer names and empties the journal of the owning book.
+        """
+        journal = self.owner.journal if self.owner is not None else None
+        if self.owner is not None:
+            self.journal_seq = self.owner.journal_seq
+        manifest = {"shards": self.shards, "journal_seq": self.journal_seq, "next_file": self._next_file,
+                    "files": self._files, "counts": self._counts}
+        write_file(os.path.join(self.directory, MANIFEST), json.dumps(manifest).encode("utf-8"))
+        current = {file for file in self._files if file}
+        for file in self._committed - current:
+            os.remove(os.path.join(self.directory, file))
+        self._committed = current
+        if journal is not None:
+            journal.truncate()
+
+    def sync(self) -> None:
+        """
+        Writes the dirty shards and commits them with a new manifest.
+        """
+        with self._lock:
+            if not self._dirty and self.owner is not None and self.owner.journal_seq == self.journal_seq:
+                return
+            for i in sorted(self._dirty):
+                self._write(i, self._cache[i])
+            self._commit()
+
+    def reshard(self, shards: int) -> None:
+        """
+        Spreads the records over a new number of shards while the book stays open.
+
+        The shards are read one at a time and their records appended to the files of the
+        new shards, so only one shard and the cache are in memory at once. The file number
+        of the new layout is taken before the first shard is read, so dirty shards evicted
+        meanwhile are written to files of their own. The new layout replaces the old one at
+        once when its manifest is written.
+
+        Args:
+            shards (int): The new number of shards.
+
+        Raises:
+            ValueError: If the number of shards is not positive.
+        """
+        if shards < 1:
+            raise ValueError("The number of shards must be positive.")
+        with self._lock:
+            files = [f"{j:04d}-{self._next_file}.pkl" for j in range(shards)]
+            self._next_file += 1
+            counts = [0] * shards
+            for i in range(self.shards):
+                if not self._counts[i]:
+                    continue
+                parts: Dict[int, Dict[str, Record]] = {}
+                for name, record in self._shard(i).items():
+                    parts.setdefault(shard_of(name, shards), {})[name] = record
+                for j, part in parts.items():
+                    with open(os.path.join(self.directory, files[j]), "ab") as f:
+                        pickle.dump(part, f)
+                    counts[j] += len(part)
+            for j in range(shards):
+                if counts[j]:
+                    with open(os.path.join(self.directory, files[j]), "rb+") as f:
+                        os.fsync(f.fileno())
+                else:
+                    files[j] = None
+            for file in self._files:
+                if file and file not in self._committed:
+                    os.remove(os.path.join(self.directory, file))
+            self.shards, self._files, self._counts = shards, files, counts
+            self._cache.clear()
+            self._dirty.clear()
+            self._commit()
+
+
+def main() -> None:
+    """
+    Converts an address book file into a sharded book:
+    python -m sharded_storage <source> <directory> [--shards N].
+    """
+    from main import load_data
+
+    options = sys.argv[1:]
+    shards = DEFAULT_SHARDS
+    if "--shards" in options:
+        position = options.index("--shards")
+        value = options[position + 1] if position + 1 < len(options) else ""
+        if not value.isdigit() or int(value) < 1:
+            print("Give me a positive number after --shards, please.", file=sys.stderr)
+            return
+        shards = int(value)
+        del options[position:position + 2]
+    if len(options) != 2:
+        print("Usage: python -m sharded_storage <source> <directory> [--shards N]", file=sys.stderr)
+        return
+    source, directory = options
+    book = load_data(source)
+    count = len(book)
+    try:
+        write_sharded(book.values(), directory, shards, book.journal_seq)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return
+    finally:
+        if book.journal is not None:
+            book.journal.close()
+        if book.storage is not None:
+            book.storage.close()
+    print(f"Wrote {count} contacts into {shards} shards in {directory}.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+import json
+import os
+import struct
+from datetime import date
+from multiprocessing.shared_memory import SharedMemory
+from typing import List, Optional
+from birthday import day_of_year, upcoming_days
+from record import Record
+
+MAGIC = b"ABS1"
+HEADER = struct.Struct("<4sIIII")
+NAME_LENGTH = struct.Struct("<H")
+DAYS = 366
+SNAPSHOT_HANDLERS = {
+    "phone": "show_phone",
+    "contact": "show_contact",
+    "show-email": "show_email",
+    "birthdays": "birthdays",
+}
+
+_prefix: Optional[str] = None
+_control: Optional[SharedMemory] = None
+_snapshot: Optional["Snapshot"] = None
+
+
+def align(offset: int) -> int:
+    """
+    Rounds an offset up to a multiple of 8 bytes.
+
+    Args:
+        offset (int): The offset.
+
+    Returns:
+        int: The aligned offset.
+    """
+    return (offset + 7) & ~7
+
+
+def encode(book) -> bytearray:
+    """
+    Lays out the contacts of a book for the read commands answered from a snapshot.
+
+    The layout is a header, the record offsets sorted by name, 367 day of the year bucket
+    starts followed by the record numbers of every bucket, and the records, each the
+    length of its UTF-8 name, the name, and the JSON of the record without its notes.
+
+    Args:
+        book (AddressBook): The address book.
+
+    Returns:
+        bytearray: The snapshot.
+    """
+    names, blob, buckets = [], bytearray(), [[] for _ in range(DAYS)]
+    records = sorted(((record.name.value.encode("utf-8"), record) for record in book.values()),
+                     key=lambda item: item[0])
+    for number, (name, record) in enumerate(records):
+        data = record.to_dict()
+        del data["notes"]
+        names.append(len(blob))
+        blob += NAME_LENGTH.pack(len(name)) + name + json.dumps(data, ensure_ascii=False).encode("utf-8")
+        if record.birthday:
+            buckets[day_of_year(*record.birthday.day_month())].append(number)
+    index_offset = align(HEADER.size)
+    birthday_offset = align(index_offset + 8 * len(names))
+    data_offset = align(birthday_offset + 4 * (DAYS + 1 + len(names)))
+    starts, members = [0], []
+    for bucket in buckets:
+        members.extend(bucket)
+        starts.append(len(members))
+    ends = names[1:] + [len(blob)]
+    snapshot = bytearray(data_offset + len(blob))
+    HEADER.pack_into(snapshot, 0, MAGIC, len(names), index_offset, birthday_offset, data_offset)
+    struct.pack_into(f"<{2 * len(names)}I", snapshot, index_offset,
+                     *(value for start, end in zip(names, ends) for value in (start, end)))
+    struct.pack_into(f"<{len(starts) + len(members)}I", snapshot, birthday_offset, *starts, *members)
+    snapshot[data_offset:] = blob
+    return snapshot
+
+
+class Snapshot:
+    """
+    Class to represent a read-only view of an address book published in shared memory.
+
+    It answers the lookups of the read commands straight from the shared buffer, decoding
+    only the records they return, so any number of processes can use one copy of the book.
+
+    Attributes:
+        generation (int): The generation of the snapshot.
+        count (int): The number of records.
+    """
+
+    def __init__(self, segment: SharedMemory, generation: int) -> None:
+        """
+        Initializes a view of a snapshot segment.
+
+        Args:
+            segment (SharedMemory): The shared memory holding the snapshot.
+            generation (int): The generation of the snapshot.
+
+        Raises:
+            ValueError: If the segment does not hold a snapshot.
+        """
+        magic, self.count, index_offset, birthday_offset, data_offset = HEADER.unpack_from(segment.buf)
+        if magic != MAGIC:
+            raise ValueError(f"Shared memory {segment.name} does not hold an address book snapshot.")
+        self.generation = generation
+        self._segment = segment
+        buffer = segment.buf
+        self._index = buffer[index_offset:index_offset + 8 * self.count].cast("I")
+        self._buckets = buffer[birthday_offset:birthday_offset + 4 * (DAYS + 1 + self.count)].cast("I")
+        self._data = buffer[data_offset:]
+
+    def _name(self, number: int) -> bytes:
+        """
+        Reads the name of a record.
+
+        Args:
+            number (int): The position of the record in name order.
+
+        Returns:
+            bytes: The UTF-8 name.
+        """
+        start = self._index[2 * number]
+        length = NAME_LENGTH.unpack_from(self._data, start)[0]
+        return bytes(self._data[start + 2:start + 2 + length])
+
+    def _record(self, number: int) -> Record:
+        """
+        Decodes a record.
+
+        Args:
+            number (int): The position of the record in name order.
+
+        Returns:
+            Record: The record.
+        """
+        start, end = self._index[2 * number], self._index[2 * number + 1]
+        length = NAME_LENGTH.unpack_from(self._data, start)[0]
+        return Record.from_dict(json.loads(bytes(self._data[start + 2 + length:end])))
+
+    def find(self, name: str) -> Optional[Record]:
+        """
+        Finds a record by name with a binary search over the sorted names.
+
+        Args:
+            name (str): The name to find.
+
+        Returns:
+            Optional[Record]: The found record, or None if not found.
+        """
+        key = name.encode("utf-8")
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._name(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count and self._name(low) == key:
+            return self._record(low)
+        return None
+
+    def get_upcoming_birthdays(self, days: int = 7) -> List[Record]:
+        """
+        Gets contacts with upcoming birthdays within the next days, today included.
+
+        Args:
+            days (int): The number of days after today the window spans.
+
+        Returns:
+            List[Record]: A list of records with upcoming birthdays, in the order they are celebrated.
+        """
+        upcoming_birthdays = []
+        for day, month in upcoming_days(date.today(), days):
+            bucket = day_of_year(day, month)
+            start, end = self._buckets[bucket], self._buckets[bucket + 1]
+            for i in range(start, end):
+                upcoming_birthdays.append(self._record(self._buckets[DAYS + 1 + i]))
+        return upcoming_birthdays
+
+    def close(self) -> None:
+        """
+        Releases the view and detaches from the segment.
+        """
+        self._index.release()
+        self._buckets.release()
+        self._data.release()
+        self._segment.close()
+
+
+class SnapshotPublisher:
+    """
+    Class to represent the writer side of the shared memory snapshots of an address book.
+
+    Every publish writes a complete snapshot to a new segment and then switches a small
+    control segment to its generation number with a single 8-byte store, so readers see
+    either the old snapshot or the new one, never a mix. The segment of the generation
+    before the previous one is unlinked, leaving readers time to move on.
+
+    Attributes:
+        prefix (str): The name of the control segment, and the prefix of the snapshot segments.
+        generation (int): The generation of the last published snapshot, or 0.
+    """
+
+    def __init__(self, prefix: Optional[str] = None) -> None:
+        """
+        Creates the control segment.
+
+        Args:
+            prefix (Optional[str]): The name of the control segment. A name built from the
+                process id is used if it is not given.
+        """
+        self.prefix = prefix or f"addressbook-{os.getpid()}"
+        self.generation = 0
+        self._control = SharedMemory(self.prefix, create=True, size=8)
+        self._control.buf[:8] = bytes(8)
+        self._segments: List[SharedMemory] = []
+
+    def publish(self, book) -> int:
+        """
+        Publishes a new snapshot of the address book.
+
+        Args:
+            book (AddressBook): The address book.
+
+        Returns:
+            int: The generation of the new snapshot.
+        """
+        return self.publish_encoded(encode(book))
+
+    def publish_encoded(self, data: bytes) -> int:
+        """
+        Publishes a snapshot that has already been encoded.
+
+        Args:
+            data (bytes): The snapshot, as encode lays it out.
+
+        Returns:
+            int: The generation of the new snapshot.
+        """
+        generation = self.generation + 1
+        segment = SharedMemory(f"{self.prefix}-{generation}", create=True, size=max(len(data), 1))
+        segment.buf[:len(data)] = data
+        generation_view = self._control.buf.cast("Q")
+        generation_view[0] = generation
+        generation_view.release()
+        self.generation = generation
+        self._segments.append(segment)
+        while len(self._segments) > 2:
+            old = self._segments.pop(0)
+            old.close()
+            old.unlink()
+        return generation
+
+    def close(self) -> None:
+        """
+        Unlinks every segment.
+        """
+        for segment in self._segments + [self._control]:
+            segment.close()
+            segment.unlink()
+        self._segments = []
+
+
+def attach(prefix: str) -> None:
+    """
+    Prepares a worker process to answer commands from the snapshots published under a prefix.
+
+    Args:
+        prefix (str): The prefix of the publisher.
+    """
+    global _prefix, _control
+    _prefix = prefix
+    _control = SharedMemory(prefix)
+
+
+def current() -> Snapshot:
+    """
+    Gets the latest published snapshot, moving the worker to it if it has changed.
+
+    Returns:
+        Snapshot: The snapshot.
+    """
+    global _snapshot
+    while True:
+        generation_view = _control.buf.cast("Q")
+        generation = generation_view[0]
+        generation_view.release()
+        if _snapshot is not None and _snapshot.generation == generation:
+            return _snapshot
+        try:
+            snapshot = Snapshot(SharedMemory(f"{_prefix}-{generation}"), generation)
+        except FileNotFoundError:
+            continue
+        if _snapshot is not None:
+            _snapshot.close()
+        _snapshot = snapshot
+
+
+def answer(action: str, args: List[str]) -> str:
+    """
+    Answers a read command from the latest snapshot.
+
+    Args:
+        action (str): One of the commands in SNAPSHOT_HANDLERS.
+        args (List[str]): The arguments of the command.
+
+    Returns:
+        str: The response text.
+    """
+    import handlers
+
+    return getattr(handlers, SNAPSHOT_HANDLERS[action])(args, current())
@@ -0,0 +1,360 @@
+import sqlite3
+from contextlib import nullcontext
+from datetime import date
+from typing import Iterator, List, Optional, Tuple
+from record import Record
+from note import Note
+from storage import Storage
+from birthday import upcoming_days
+
+PAGE_SIZE = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contacts (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    birthday TEXT,
+    birthday_md INTEGER,
+    email TEXT,
+    address TEXT
+);
+CREATE INDEX IF NOT EXISTS contacts_birthday_md ON contacts (birthday_md);
+CREATE TABLE IF NOT EXISTS phones (
+    id INTEGER PRIMARY KEY,
+    contact_id INTEGER NOT NULL REFERENCES contacts (id) ON DELETE CASCADE,
+    phone TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS phones_contact_id ON phones (contact_id);
+CREATE INDEX IF NOT EXISTS phones_phone ON phones (phone);
+CREATE TABLE IF NOT EXISTS notes (
+    id INTEGER PRIMARY KEY,
+    contact_id INTEGER NOT NULL REFERENCES contacts (id) ON DELETE CASCADE,
+    title TEXT NOT NULL,
+    text TEXT NOT NULL,
+    tag TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS notes_contact_id ON notes (contact_id);
+CREATE INDEX IF NOT EXISTS notes_title ON notes (title);
+CREATE INDEX IF NOT EXISTS notes_tag ON notes (tag COLLATE NOCASE);
+"""
+
+
+def birthday_md(birthday: Optional[str]) -> Optional[int]:
+    """
+    Encodes the day and month of a birthday as a sortable integer.
+
+    Args:
+        birthday (Optional[str]): The birthday value in DD.MM.YYYY format.
+
+    Returns:
+        Optional[int]: The birthday as month * 100 + day, or None if there is no birthday.
+    """
+    if not birthday:
+        return None
+    day, month, _ = birthday.split(".")
+    return int(month) * 100 + int(day)
+
+
+class SQLiteStorage(Storage):
+    """
+    Class to represent an address book storage kept in an SQLite database.
+
+    Contacts live in one table, and phones and notes in indexed child tables. Records are
+    only materialized when they are accessed, and lookups and scans run as SQL queries.
+    The connection may be used from several threads as long as changes are serialized.
+
+    Attributes:
+        path (str): The database filename.
+        conn (sqlite3.Connection): The database connection.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Opens the database, creating the schema if needed.
+
+        Args:
+            path (str): The database filename.
+        """
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def _contact_id(self, name: str) -> Optional[int]:
+        """
+        Gets the row id of a contact.
+
+        Args:
+            name (str): The contact name.
+
+        Returns:
+            Optional[int]: The row id, or None if the contact does not exist.
+        """
+        row = self.conn.execute("SELECT id FROM contacts WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _materialize(self, row: tuple) -> Record:
+        """
+        Builds a record from a contacts row and its child rows.
+
+        Args:
+            row (tuple): The (id, name, birthday, email, address) contacts row.
+
+        Returns:
+            Record: The record, linked to the owning address book.
+        """
+        contact_id, name, birthday, email, address = row
+        record = Record(name)
+        for (phone,) in self.conn.execute(
+                "SELECT phone FROM phones WHERE contact_id = ? ORDER BY id", (contact_id,)):
+            record.add_phone(phone)
+        if birthday:
+            record.add_birthday(birthday)
+        if email:
+            record.add_email(email)
+        if address:
+            record.add_address(address)
+        for title, text, tag in self.conn.execute(
+                "SELECT title, text, tag FROM notes WHERE contact_id = ? ORDER BY id", (contact_id,)):
+            record.add_note(Note(title, text, tag))
+        record._book = self.owner
+        return record
+
+    def _transaction(self):
+        """
+        Gets the context to run a change in.
+
+        Returns:
+            The connection, committing the change on exit, or a null context leaving it to
+            sync if autocommit is off.
+        """
+        return self.conn if self.autocommit else nullcontext()
+
+    def __getitem__(self, name: str) -> Record:
+        row = self.conn.execute(
+            "SELECT id, name, birthday, email, address FROM contacts WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return self._materialize(row)
+
+    def _insert(self, name: str, record: Record) -> None:
+        """
+        Writes a record and its child rows, replacing a stored record with the same name.
+
+        Args:
+            name (str): The contact name.
+            record (Record): The record.
+        """
+        self.conn.execute("DELETE FROM contacts WHERE name = ?", (name,))
+        data = record.to_dict()
+        cursor = self.conn.execute(
+            "INSERT INTO contacts (name, birthday, birthday_md, email, address) VALUES (?, ?, ?, ?, ?)",
+            (name, data["birthday"], birthday_md(data["birthday"]), data["email"], data["address"]))
+        contact_id = cursor.lastrowid
+        self.conn.executemany(
+            "INSERT INTO phones (contact_id, phone) VALUES (?, ?)",
+            [(contact_id, phone) for phone in data["phones"]])
+        self.conn.executemany(
+            "INSERT INTO notes (contact_id, title, text, tag) VALUES (?, ?, ?, ?)",
+            [(contact_id, *note) for note in data["notes"]])
+
+    def __setitem__(self, name: str, record: Record) -> None:
+        with self._transaction():
+            self._insert(name, record)
+
+    def add_many(self, records: List[Record]) -> None:
+        """
+        Writes many records in a single transaction.
+
+        Args:
+            records (List[Record]): The records.
+        """
+        with self._transaction():
+            for record in records:
+                self._insert(record.name.value, record)
+
+    def __delitem__(self, name: str) -> None:
+        with self._transaction():
+            cursor = self.conn.execute("DELETE FROM contacts WHERE name = ?", (name,))
+        if cursor.rowcount == 0:
+            raise KeyError(name)
+
+    def __contains__(self, name: object) -> bool:
+        return self.conn.execute("SELECT 1 FROM contacts WHERE name = ?", (name,)).fetchone() is not None
+
+    def __iter__(self) -> Iterator[str]:
+        for (name,) in self.conn.execute("SELECT name FROM contacts ORDER BY id"):
+            yield name
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM contacts").fetchone()[0]
+
+    def values(self) -> Iterator[Record]:
+        """
+        Iterates over the stored records, materializing them one at a time.
+
+        Rows are fetched in pages of PAGE_SIZE by id, so only one page is held in memory.
+
+        Returns:
+            Iterator[Record]: The records in insertion order.
+        """
+        last_id = 0
+        while True:
+            rows = self.conn.execute(
+                "SELECT id, name, birthday, email, address FROM contacts WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, PAGE_SIZE)).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield self._materialize(row)
+            last_id = rows[-1][0]
+
+    def items(self) -> Iterator[Tuple[str, Record]]:
+        """
+        Iterates over the stored names and records, materializing them one at a time.
+
+        Returns:
+            Iterator[Tuple[str, Record]]: The name and record pairs in insertion order.
+        """
+        for record in self.values():
+            yield record.name.value, record
+
+    def record_changed(self, record: Record, op: str, *args) -> None:
+        """
+        Persists a mutation of a stored record as an SQL statement.
+
+        Args:
+            record (Record): The mutated record.
+            op (str): The name of the mutating method.
+            *args: The arguments the method was called with.
+        """
+        contact_id = self._contact_id(record.name.value)
+        if contact_id is None:
+            return
+        with self._transaction():
+            if op == "add_phone":
+                self.conn.execute("INSERT INTO phones (contact_id, phone) VALUES (?, ?)", (contact_id, *args))
+            elif op == "remove_phone":
+                self.conn.execute("DELETE FROM phones WHERE contact_id = ? AND phone = ?", (contact_id, *args))
+            elif op == "edit_phone":
+                old_phone, new_phone = args
+                self.conn.execute(
+                    "UPDATE phones SET phone = ? WHERE contact_id = ? AND phone = ?",
+                    (new_phone, contact_id, old_phone))
+            elif op == "add_birthday":
+                self.conn.execute(
+                    "UPDATE contacts SET birthday = ?, birthday_md = ? WHERE id = ?",
+                    (args[0], birthday_md(args[0]), contact_id))
+            elif op == "add_email":
+                self.conn.execute("UPDATE contacts SET email = ? WHERE id = ?", (args[0], contact_id))
+            elif op == "add_address":
+                self.conn.execute("UPDATE contacts SET address = ? WHERE id = ?", (args[0], contact_id))
+            elif op == "add_note":
+                self.conn.execute(
+                    "INSERT INTO notes (contact_id, title, text, tag) VALUES (?, ?, ?, ?)", (contact_id, *args))
+            elif op == "change_note":
+                title, text, tag = args
+                self.conn.execute(
+                    "UPDATE notes SET text = ?, tag = ? WHERE contact_id = ? AND title = ?",
+                    (text, tag, contact_id, title))
+            elif op == "remove_note":
+                self.conn.execute("DELETE FROM notes WHERE contact_id = ? AND title = ?", (contact_id, *args))
+
+    def find_by_phone(self, phone: str) -> List[str]:
+        """
+        Finds the names of the records a phone number belongs to using the phone index.
+
+        Args:
+            phone (str): The phone number to find.
+
+        Returns:
+            List[str]: The names of the records with this phone number.
+        """
+        rows = self.conn.execute(
+            "SELECT DISTINCT c.name FROM phones p JOIN contacts c ON c.id = p.contact_id "
+            "WHERE p.phone = ? ORDER BY c.name", (phone,))
+        return [name for (name,) in rows]
+
+    def upcoming_birthdays(self, start: date, days: int) -> List[Record]:
+        """
+        Gets the records with a birthday within the given window, in the order they are
+        celebrated, using the birthday index.
+
+        Args:
+            start (date): The first day of the window.
+            days (int): The number of days after the first one the window spans.
+
+        Returns:
+            List[Record]: The records with a birthday in the window.
+        """
+        keys = [month * 100 + day for day, month in upcoming_days(start, days)]
+        position = {key: i for i, key in enumerate(keys)}
+        placeholders = ", ".join("?" * len(keys))
+        rows = self.conn.execute(
+            f"SELECT id, name, birthday, email, address FROM contacts WHERE birthday_md IN ({placeholders})",
+            keys).fetchall()
+        rows.sort(key=lambda row: (position[birthday_md(row[2])], row[1]))
+        return [self._materialize(row) for row in rows]
+
+    def find_notes(self, title: str = None, tag: str = None) -> Iterator[Tuple[str, Note]]:
+        """
+        Finds notes by exact title and/or case-insensitive tag using the notes indexes.
+
+        Args:
+            title (str): The title to match, or None to match any title.
+            tag (str): The tag to match, or None to match any tag.
+
+        Returns:
+            Iterator[Tuple[str, Note]]: Pairs of contact name and matching note.
+        """
+        query = "SELECT c.name, n.title, n.text, n.tag FROM notes n JOIN contacts c ON c.id = n.contact_id"
+        conditions, params = [], []
+        if title is not None:
+            conditions.append("n.title = ?")
+            params.append(title)
+        if tag is not None:
+            conditions.append("n.tag = ? COLLATE NOCASE")
+            params.append(tag)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        for name, title_value, text, tag_value in self.conn.execute(query + " ORDER BY n.id", params).fetchall():
+            yield name, Note(title_value, text, tag_value)
+
+    def notes_sorted_by_tag(self) -> Iterator[Tuple[str, Note]]:
+        """
+        Iterates over all notes in case-insensitive tag order using the tag index.
+
+        Returns:
+            Iterator[Tuple[str, Note]]: Pairs of contact name and note.
+        """
+        rows = self.conn.execute(
+            "SELECT c.name, n.title, n.text, n.tag FROM notes n JOIN contacts c ON c.id = n.contact_id "
+            "ORDER BY n.tag COLLATE NOCASE, n.id")
+        for name, title, text, tag in rows.fetchall():
+            yield name, Note(title, text, tag)
+
+    def tag_counts(self) -> List[Tuple[str, int]]:
+        """
+        Gets the number of notes with every tag using the tag index.
+
+        Returns:
+            List[Tuple[str, int]]: The lowercase tags in sorted order and their note counts.
+        """
+        rows = self.conn.execute(
+            "SELECT LOWER(tag), COUNT(*) FROM notes GROUP BY tag COLLATE NOCASE ORDER BY tag COLLATE NOCASE")
+        return rows.fetchall()
+
+    def sync(self) -> None:
+        """
+        Commits any pending transaction.
+        """
+        self.conn.commit()
+
+    def close(self) -> None:
+        """
+        Commits and closes the database connection.
+        """
+        self.sync()
+        self.conn.close()
@@ -0,0 +1,98 @@
+import json
+import os
+import subprocess
+import sys
+from typing import List, Tuple
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+LAZY_MODULES = ("handlers", "prettytable", "colorama", "sqlite3", "concurrent.futures")
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+book = main.load_data(sys.argv[1])
+loaded = time.perf_counter()
+main.CommandSuggester(main.COMMANDS)
+ready = time.perf_counter()
+if book.journal is not None:
+    book.journal.close()
+if book.storage is not None:
+    book.storage.close()
+import json
+print(json.dumps({
+    "timings": {"imports": imported - start, "load_data": loaded - imported, "commands": ready - loaded},
+    "loaded": [name for name in sys.argv[2:] if name in sys.modules],
+}))
+"""
+
+
+def run_probe(filename: str = "addressbook.pkl", importtime: bool = False) -> Tuple[dict, List[str], str]:
+    """
+    Starts the bot up to its first prompt in a fresh interpreter and times the steps.
+
+    Args:
+        filename (str): The address book file to load.
+        importtime (bool): Whether to run the interpreter with -X importtime.
+
+    Returns:
+        Tuple[dict, List[str], str]: The seconds spent importing, loading the book and
+            indexing the commands, the lazily imported modules that were loaded anyway,
+            and the error output of the interpreter.
+    """
+    command = [sys.executable] + (["-X", "importtime"] if importtime else [])
+    command += ["-c", PROBE, filename, *LAZY_MODULES]
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [PACKAGE_DIR, os.environ.get("PYTHONPATH")])))
+    result = subprocess.run(command, capture_output=True, text=True, env=env, check=True)
+    data = json.loads(result.stdout.splitlines()[-1])
+    return data["timings"], data["loaded"], result.stderr
+
+
+def parse_importtime(output: str) -> List[Tuple[str, int, int, int]]:
+    """
+    Parses the report of -X importtime.
+
+    Args:
+        output (str): The error output of an interpreter run with -X importtime.
+
+    Returns:
+        List[Tuple[str, int, int, int]]: The module name, nesting depth, self and
+            cumulative microseconds of every import, in the order they finished.
+    """
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((name.strip(), depth, int(own), int(cumulative)))
+    return imports
+
+
+def profile_startup(filename: str = "addressbook.pkl", limit: int = 20) -> str:
+    """
+    Builds a report of where the start-up time of the bot goes.
+
+    Args:
+        filename (str): The address book file to load.
+        limit (int): The number of slowest imports to list.
+
+    Returns:
+        str: The report.
+    """
+    timings, loaded, stderr = run_probe(filename, importtime=True)
+    lines = ["Start-up time:"]
+    for step, seconds in timings.items():
+        lines.append(f"  {step:<12}{seconds * 1000:8.1f} ms")
+    lines.append(f"  {'total':<12}{sum(timings.values()) * 1000:8.1f} ms")
+    if loaded:
+        lines.append(f"Imported before the first command: {', '.join(loaded)}")
+
+    imports = parse_importtime(stderr)
+    slowest = set(sorted(range(len(imports)), key=lambda i: imports[i][3], reverse=True)[:limit])
+    lines.append("")
+    lines.append(f"Slowest imports (ms):\n  {'self':>7} {'cumulative':>10}  module")
+    for i, (name, depth, own, cumulative) in enumerate(imports):
+        if i in slowest:
+            lines.append(f"  {own / 1000:7.1f} {cumulative / 1000:10.1f}  {'  ' * depth}{name}")
+    return "\n".join(lines)
@@ -0,0 +1,128 @@
+from abc import abstractmethod
+from collections import Counter
+from collections.abc import MutableMapping
+from datetime import date
+from typing import Iterator, List, Tuple
+from record import Record
+from birthday import upcoming_days
+from note import Note
+
+
+class Storage(MutableMapping):
+    """
+    Base class for pluggable address book storage backends.
+
+    A storage is a mapping of contact names to records that an AddressBook uses in place
+    of its in-memory dictionary. Records it returns must report their mutations back to
+    the owning book, which forwards them to record_changed.
+
+    Attributes:
+        owner (AddressBook): The address book using the storage.
+        autocommit (bool): Whether every change is committed as it is made. When False,
+            changes are only guaranteed to be stored by sync.
+    """
+
+    owner = None
+    autocommit = True
+
+    @abstractmethod
+    def record_changed(self, record: Record, op: str, *args) -> None:
+        """
+        Persists a mutation of a stored record.
+
+        Args:
+            record (Record): The mutated record.
+            op (str): The name of the mutating method.
+            *args: The arguments the method was called with.
+        """
+
+    def add_many(self, records: List[Record]) -> None:
+        """
+        Stores many records at once.
+
+        Args:
+            records (List[Record]): The records.
+        """
+        for record in records:
+            self[record.name.value] = record
+
+    def find_by_phone(self, phone: str) -> List[str]:
+        """
+        Finds the names of the records a phone number belongs to.
+
+        Args:
+            phone (str): The phone number to find.
+
+        Returns:
+            List[str]: The names of the records with this phone number.
+        """
+        return sorted(record.name.value for record in self.values() if record.find_phone(phone))
+
+    def upcoming_birthdays(self, start: date, days: int) -> List[Record]:
+        """
+        Gets the records with a birthday within the given window, in the order they are celebrated.
+
+        Args:
+            start (date): The first day of the window.
+            days (int): The number of days after the first one the window spans.
+
+        Returns:
+            List[Record]: The records with a birthday in the window.
+        """
+        position = {pair: i for i, pair in enumerate(upcoming_days(start, days))}
+        upcoming = []
+        for record in self.values():
+            if record.birthday and record.birthday.day_month() in position:
+                upcoming.append((position[record.birthday.day_month()], record))
+        return [record for _, record in sorted(upcoming, key=lambda item: item[0])]
+
+    def find_notes(self, title: str = None, tag: str = None) -> Iterator[Tuple[str, Note]]:
+        """
+        Finds notes by exact title and/or case-insensitive tag.
+
+        Args:
+            title (str): The title to match, or None to match any title.
+            tag (str): The tag to match, or None to match any tag.
+
+        Returns:
+            Iterator[Tuple[str, Note]]: Pairs of contact name and matching note.
+        """
+        for record in self.values():
+            for note in record.notes:
+                if title is not None and note.title.value != title:
+                    continue
+                if tag is not None and note.tag.value.lower() != tag.lower():
+                    continue
+                yield record.name.value, note
+
+    def notes_sorted_by_tag(self) -> Iterator[Tuple[str, Note]]:
+        """
+        Iterates over all notes in case-insensitive tag order.
+
+        Returns:
+            Iterator[Tuple[str, Note]]: Pairs of contact name and note.
+        """
+        notes = list(self.find_notes())
+        notes.sort(key=lambda item: item[1].tag.value.lower())
+        return iter(notes)
+
+    def tag_counts(self) -> List[Tuple[str, int]]:
+        """
+        Gets the number of notes with every tag.
+
+        Returns:
+            List[Tuple[str, int]]: The lowercase tags in sorted order and their note counts.
+        """
+        counts = Counter(note.tag.value.lower() for _, note in self.find_notes())
+        return sorted(counts.items())
+
+    def sync(self) -> None:
+        """
+        Makes sure every change is durably stored.
+        """
+
+    def close(self) -> None:
+        """
+        Syncs and releases the storage.
+        """
+        self.sync()
@@ -0,0 +1,84 @@
+from bisect import bisect_left, insort
+from typing import Dict, Iterator, List, Tuple
+
+
+class TagIndex:
+    """
+    Class to represent a case-insensitive tag to notes multimap with sorted keys.
+
+    Notes are identified by the name of their contact and their title. The tags are kept
+    in sorted order as notes are added and removed, so listings by tag need no sorting.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initializes an empty TagIndex instance.
+        """
+        self._notes: Dict[str, Dict[Tuple[str, str], None]] = {}
+        self._tags: Dict[Tuple[str, str], str] = {}
+        self._keys: List[str] = []
+
+    def add(self, name: str, title: str, tag: str) -> None:
+        """
+        Adds a note to the index, replacing a previous version of it.
+
+        Args:
+            name (str): The name of the contact.
+            title (str): The title of the note.
+            tag (str): The tag of the note.
+        """
+        self.remove(name, title)
+        key = tag.lower()
+        if key not in self._notes:
+            self._notes[key] = {}
+            insort(self._keys, key)
+        self._notes[key][(name, title)] = None
+        self._tags[(name, title)] = key
+
+    def remove(self, name: str, title: str) -> None:
+        """
+        Removes a note from the index, if it is there.
+
+        Args:
+            name (str): The name of the contact.
+            title (str): The title of the note.
+        """
+        key = self._tags.pop((name, title), None)
+        if key is None:
+            return
+        notes = self._notes[key]
+        del notes[(name, title)]
+        if not notes:
+            del self._notes[key]
+            del self._keys[bisect_left(self._keys, key)]
+
+    def find(self, tag: str) -> List[Tuple[str, str]]:
+        """
+        Finds the notes with a tag, ignoring case.
+
+        Args:
+            tag (str): The tag.
+
+        Returns:
+            List[Tuple[str, str]]: The contact name and title of every note with the tag.
+        """
+        return list(self._notes.get(tag.lower(), ()))
+
+    def sorted_notes(self) -> Iterator[Tuple[str, str]]:
+        """
+        Iterates over all notes in tag order.
+
+        Returns:
+            Iterator[Tuple[str, str]]: The contact name and title of every note.
+        """
+        for key in self._keys:
+            yield from self._notes[key]
+
+    def counts(self) -> List[Tuple[str, int]]:
+        """
+        Gets the number of notes with every tag.
+
+        Returns:
+            List[Tuple[str, int]]: The lowercase tags in sorted order and their note counts.
+        """
+        return [(key, len(self._notes[key])) for key in self._keys]
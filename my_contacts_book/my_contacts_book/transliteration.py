@@ -1,4 +1,5 @@
-import difflib
+from functools import lru_cache
+from typing import Dict, Iterable, List, Set, Tuple
 
 TRANS_CYRILLIC_TO_LATIN = {
     
@@ -7,6 +8,9 @@ TRANS_CYRILLIC_TO_LATIN = {
     'о': 'j', 'л': 'k', 'д': 'l', 'я': 'z', 'ч': 'x', 'с': 'c', 'м': 'v', 'и': 'b',
     'т': 'n', 'ь': 'm'
 }
+TRANS_LATIN_TO_CYRILLIC = {latin: cyrillic for cyrillic, latin in TRANS_CYRILLIC_TO_LATIN.items()}
+CACHE_SIZE = 256
+MAX_DISTANCE = 3
 
 def transliterate(text: str) -> str:
     """
@@ -20,6 +24,208 @@ def transliterate(text: str) -> str:
     """
     return ''.join(TRANS_CYRILLIC_TO_LATIN.get(char, char) for char in text)
 
+def to_cyrillic_layout(text: str) -> str:
+    """
+    Spells Latin text as it comes out when typed with the Cyrillic keyboard layout on.
+
+    Args:
+        text (str): The Latin text.
+
+    Returns:
+        str: The text in Cyrillic letters.
+    """
+    return ''.join(TRANS_LATIN_TO_CYRILLIC.get(char, char) for char in text)
+
+def edit_distance(a: str, b: str, limit: int = None) -> int:
+    """
+    Computes the edit distance between two strings, counting a swap of neighbouring
+    characters as a single edit.
+
+    Args:
+        a (str): The first string.
+        b (str): The second string.
+        limit (int): If given, stop as soon as the distance is known to exceed it.
+
+    Returns:
+        int: The number of insertions, deletions, substitutions and swaps turning a into b,
+            or limit + 1 if that number exceeds the limit.
+    """
+    before, previous = None, list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            distance = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+            if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                distance = min(distance, before[j - 2] + 1)
+            current.append(distance)
+        if limit is not None and min(current) > limit and min(previous) >= limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+def trigrams(word: str) -> Set[str]:
+    """
+    Splits a word, padded with spaces, into its distinct three-character substrings.
+
+    Args:
+        word (str): The word.
+
+    Returns:
+        Set[str]: The trigrams.
+    """
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class TrigramIndex:
+    """
+    Class to represent an index of words by their trigrams and lengths.
+
+    An edit changes at most four trigrams of a word (a swap of neighbouring characters
+    touches four, any other edit three), so a word within distance k of the query must
+    share all but 4 * k of its trigrams and differ in length by at most k. Only words
+    passing these filters have their edit distance computed.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initializes an empty TrigramIndex instance.
+        """
+        self.words: List[str] = []
+        self._postings: Dict[str, List[int]] = {}
+        self._lengths: Dict[int, List[int]] = {}
+
+    def add(self, word: str) -> None:
+        """
+        Adds a word to the index.
+
+        Args:
+            word (str): The word to add.
+        """
+        word_id = len(self.words)
+        self.words.append(word)
+        for gram in trigrams(word):
+            self._postings.setdefault(gram, []).append(word_id)
+        self._lengths.setdefault(len(word), []).append(word_id)
+
+    def search(self, word: str, max_distance: int) -> List[Tuple[int, str]]:
+        """
+        Finds the words within a distance of the given word.
+
+        Args:
+            word (str): The word to look up.
+            max_distance (int): The largest edit distance to accept.
+
+        Returns:
+            List[Tuple[int, str]]: The distance and word of every match.
+        """
+        grams = trigrams(word)
+        needed = len(grams) - 4 * max_distance
+        if needed > 0:
+            shared: Dict[int, int] = {}
+            for gram in grams:
+                for word_id in self._postings.get(gram, ()):
+                    shared[word_id] = shared.get(word_id, 0) + 1
+            candidates = [word_id for word_id, count in shared.items() if count >= needed]
+        else:
+            candidates = [word_id for length in range(len(word) - max_distance, len(word) + max_distance + 1)
+                          for word_id in self._lengths.get(length, ())]
+        matches = []
+        for word_id in candidates:
+            candidate = self.words[word_id]
+            if abs(len(candidate) - len(word)) > max_distance:
+                continue
+            distance = edit_distance(word, candidate, max_distance)
+            if distance <= max_distance:
+                matches.append((distance, candidate))
+        return matches
+
+class CommandSuggester:
+    """
+    Class to suggest the command closest to a mistyped one.
+
+    The command names and their spellings with the Cyrillic keyboard layout on are kept in
+    a trigram index built once, and recent lookups are cached, so suggestions stay fast as
+    commands are added, for example by plugins.
+    """
+
+    def __init__(self, commands: Iterable[str] = ()) -> None:
+        """
+        Initializes a suggester over the given commands.
+
+        Args:
+            commands (Iterable[str]): The available commands.
+        """
+        self.commands: Dict[str, int] = {}
+        self._keys: Dict[str, str] = {}
+        self._index = TrigramIndex()
+        self._suggest = lru_cache(maxsize=CACHE_SIZE)(self._search)
+        self.add(*commands)
+
+    def add(self, *commands: str) -> None:
+        """
+        Makes commands available for suggestions.
+
+        Args:
+            *commands (str): The commands to add.
+        """
+        for command in commands:
+            if command in self.commands:
+                continue
+            self.commands[command] = len(self.commands)
+            for key in (command, to_cyrillic_layout(command)):
+                if key not in self._keys:
+                    self._keys[key] = command
+                    self._index.add(key)
+        self._suggest.cache_clear()
+
+    def _search(self, user_input: str) -> str:
+        """
+        Looks up the command closest to the input in the trigram index, as typed and
+        transliterated, so input typed partly with the Cyrillic layout on is matched too.
+
+        Args:
+            user_input (str): The user input text.
+
+        Returns:
+            str: The closest command, the earliest added one on ties, or '' if none is close.
+        """
+        max_distance = min(MAX_DISTANCE, max(1, len(user_input) // 3))
+        matches = self._index.search(user_input, max_distance)
+        transliterated = transliterate(user_input)
+        if transliterated != user_input:
+            matches += self._index.search(transliterated, max_distance)
+        if not matches:
+            return ""
+        distance, key = min(matches, key=lambda match: (match[0], self.commands[self._keys[match[1]]]))
+        return self._keys[key]
+
+    def suggest(self, user_input: str) -> str:
+        """
+        Suggests the closest matching command based on user input.
+
+        Args:
+            user_input (str): The user input text.
+
+        Returns:
+            str: The suggested command or '' if no close match is found.
+        """
+        if user_input in self.commands:
+            return user_input
+        return self._suggest(user_input)
+
+@lru_cache(maxsize=8)
+def _suggester(commands: Tuple[str, ...]) -> CommandSuggester:
+    """
+    Gets a suggester over the given commands, building it once per command list.
+
+    Args:
+        commands (Tuple[str, ...]): The available commands.
+
+    Returns:
+        CommandSuggester: The suggester.
+    """
+    return CommandSuggester(commands)
+
 def suggest_command(user_input: str, commands: list[str]) -> str:
     """
     Suggests the closest matching command based on user input.
@@ -31,11 +237,4 @@ def suggest_command(user_input: str, commands: list[str]) -> str:
     Returns:
         str: The suggested command or '' if no close match is found.
     """
-    
-    user_input_transliterated = transliterate(user_input)
-    closest_matches = difflib.get_close_matches(user_input_transliterated, commands, n=1, cutoff=0.1)
-    
-    
-    if closest_matches:
-        return closest_matches[0]
-    return ""
\ No newline at end of file
+    return _suggester(tuple(commands)).suggest(user_input)
@@ -9,6 +9,7 @@ setup(
     author_email='ksunya.donchuk@gmail.com',
     packages=find_packages(include=['my_contacts_book', 'my_contacts_book.*']),
     entry_points={'console_scripts': ['my_contacts_book=my_contacts_book.main:main']},
+    extras_require={'stats': ['numpy']},
     python_requires='>=3.6',
     classifiers=[
         'Programming Language :: Python :: 3',